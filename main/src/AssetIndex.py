@@ -0,0 +1,295 @@
+"""
+**************************************************************************
+
+ AssetIndex.py
+
+**************************************************************************
+ Description:
+
+ Checks the assets each test vector references exist, i.e. the profile
+ image and data (<asc_dir>/<EPN>.png, <asc_dir>/<EPN>.asc) and batch file
+ (Batch_<Batch Number>.txt), without a file system call per test vector.
+
+ The asc directory is listed once, when the index is created, and the
+ names found are held in sets. The batch files are already known from the
+ batch directory (see PageBuilder.processBatchDirectory). So each check is
+ a set lookup, however many test vectors reference the same asset. Profiles
+ in a profile library (see ProfileLibrary.py) count as available, even if
+ their .asc file is not in the asc directory.
+
+ Rows whose profile image is missing show a placeholder image instead of
+ a broken image. Every missing asset is recorded, with the number of test
+ vectors referencing it, and written to a missing asset report next to the
+ page, i.e. index.html gets index_missing_assets.txt. A profile image is
+ only reported missing for rows that show it, i.e. not for rows showing a
+ sparkline or sprite atlas thumbnail in its place.
+
+ The index is built once per page build. Processes rendering split pages
+ are given the image names found, rather than listing the directory again.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+
+# For common operations
+from Common import Common
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class AssetIndex(object):
+    """
+    An in-memory index of the profile images, profile data and batch files available.
+    """
+
+    # The image shown in place of a missing profile image, relative to the page.
+    PLACEHOLDER = 'images/missing_profile.svg'
+
+    # The kinds of asset checked, as (kind, report heading) pairs.
+    KINDS = [('image', 'Profile images (run CreatePulseProfilePng.py)'),
+             ('profile', 'Profile data (.asc files)'),
+             ('batch', 'Batch files')]
+
+    # ****************************************************************************************************
+
+    def __init__(self, asc_dir, batch_info=None, library=None, substitutes=None, images=None):
+        """
+        Default constructor, which lists the asc directory.
+
+        Parameters
+        ----------
+        :param asc_dir: path to the directory containing .asc files and their PNGs.
+        :param batch_info: a dictionary of batch information, keyed by batch file name.
+        :param library: an optional profile library, whose profiles are also available.
+        :param substitutes: an optional list of functions of an EPN profile name, returning True if
+                            rows show something in place of the profile image (i.e. a sparkline).
+        :param images: the names of the profile images available, if already known (i.e. from another index),
+                       in which case the asc directory is not listed, and only images are looked up.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.asc_dir = asc_dir
+        self.images = set()
+        self.profiles = set()
+        self.substitutes = substitutes or []
+
+        names = []
+        if images is not None:
+            self.images = images
+        elif asc_dir is not None and Common.dir_exists(asc_dir):
+            names = os.listdir(asc_dir)
+
+        for name in names:
+            if name.endswith('.png'):
+                self.images.add(name[:-len('.png')])
+            elif name.endswith('.asc'):
+                self.profiles.add(name[:-len('.asc')])
+
+        if library is not None:
+            self.profiles.update(library.keys())
+
+        self.batches = set()
+        if batch_info is not None:
+            self.batches = set(batch_info.keys())
+
+        # Maps each kind of asset to a dictionary of missing asset names, and the
+        # number of test vectors referencing them.
+        self.missing = dict([(kind, {}) for kind, heading in self.KINDS])
+
+    # ****************************************************************************************************
+
+    def imageFor(self, epn):
+        """
+        Gets the image of a profile, or the placeholder image if it is missing.
+
+        Parameters
+        ----------
+        :param epn: the EPN profile name, i.e. <Pulsar>_<Freq>.
+
+        Returns
+        ----------
+        :return: the image path.
+
+        """
+        if epn in self.images:
+            return self.asc_dir + "/" + epn + '.png'
+
+        return self.PLACEHOLDER
+
+    # ****************************************************************************************************
+
+    def check(self, parameters):
+        """
+        Records the assets a test vector references that are missing.
+
+        Parameters
+        ----------
+        :param parameters: the test vector parameter list, see PageBuilder.readTestVectors.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        epn = parameters[7]
+
+        if epn not in self.images and not self.substituted(epn):
+            self.record('image', epn + '.png')
+
+        if epn not in self.profiles:
+            self.record('profile', epn + '.asc')
+
+        batch_key = 'Batch_' + parameters[1] + '.txt'
+        if batch_key not in self.batches:
+            self.record('batch', batch_key)
+
+    # ****************************************************************************************************
+
+    def substituted(self, epn):
+        """
+        Checks whether rows show something in place of a profile's image.
+
+        Parameters
+        ----------
+        :param epn: the EPN profile name, i.e. <Pulsar>_<Freq>.
+
+        Returns
+        ----------
+        :return: True if any substitute is available, else False.
+
+        """
+        for substitute in self.substitutes:
+            if substitute(epn):
+                return True
+
+        return False
+
+    # ****************************************************************************************************
+
+    def record(self, kind, name):
+        """
+        Records a missing asset.
+
+        Parameters
+        ----------
+        :param kind: the kind of asset, see KINDS.
+        :param name: the asset file name.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        missing = self.missing[kind]
+        missing[name] = missing.get(name, 0) + 1
+
+    # ****************************************************************************************************
+
+    def track(self, test_vectors):
+        """
+        Checks each test vector's assets as it is read, so the assets are checked in
+        the same pass over the catalogue that builds the page.
+
+        Parameters
+        ----------
+        :param test_vectors: an iterable of test vector parameter lists.
+
+        Returns
+        ----------
+        :return: a generator of the same test vector parameter lists.
+
+        """
+        for parameters in test_vectors:
+            self.check(parameters)
+            yield parameters
+
+    # ****************************************************************************************************
+
+    def missingImages(self):
+        """
+        Gets the profiles whose image is missing.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: a sorted list of EPN profile names.
+
+        """
+        return sorted([name[:-len('.png')] for name in self.missing['image'].keys()])
+
+    # ****************************************************************************************************
+
+    def writeReport(self, output_file):
+        """
+        Writes the missing asset report next to the page, listing each missing asset
+        and the number of test vectors referencing it. A report left by a previous
+        build is removed if nothing is missing.
+
+        Parameters
+        ----------
+        :param output_file: the output path the page is written to (i.e. index.html).
+
+        Returns
+        ----------
+        :return: the number of missing assets.
+
+        """
+        report_path = os.path.splitext(output_file)[0] + '_missing_assets.txt'
+        count = sum([len(missing) for missing in self.missing.values()])
+
+        if count == 0:
+            Common.delete_file(report_path)
+            return 0
+
+        lines = []
+        for kind, heading in self.KINDS:
+
+            missing = self.missing[kind]
+            if len(missing) == 0:
+                continue
+
+            lines.append(heading + ' missing: ' + str(len(missing)))
+            for name in sorted(missing.keys()):
+                lines.append('\t' + name + ' (' + str(missing[name]) + ' test vectors)')
+            lines.append('')
+
+        temp_path = report_path + '.' + str(os.getpid()) + '.tmp'
+
+        with open(temp_path, 'w') as f:
+            f.write('\n'.join(lines))
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(report_path)
+
+        os.rename(temp_path, report_path)
+
+        return count
+
+    # ****************************************************************************************************
@@ -0,0 +1,286 @@
+"""
+**************************************************************************
+
+ CatalogueMerger.py
+
+**************************************************************************
+ Description:
+
+ Combines several test vector database files (catalogues) into a single
+ stream of test vectors, e.g. when TestVectorDirectoryParserApp.py is run
+ separately on several storage servers, each writing its own CSV file.
+
+ Each catalogue is merged sorted by the merge column. Catalogues are first
+ checked (see isSorted), and those not sorted (i.e. in the order the parser
+ wrote them) are sorted by an external merge sort within a memory budget,
+ see ExternalSorter.py. The catalogues are then combined by a streaming
+ k-way merge, i.e. only the next test vector of each
+ catalogue is held in memory, in a heap ordered by,
+
+ (merge column value, file name, MD5 hash, catalogue number)
+
+ So peak memory depends on the number of catalogues, not their size. As the
+ file name and MD5 hash follow the merge column in the ordering, copies of
+ the same test vector listed in several catalogues always arrive together.
+ Only the first copy is kept, i.e. the copy from the catalogue listed first.
+ Test vectors with the same file name but a different MD5 hash are distinct
+ files, so both are kept.
+
+ Numeric merge columns (i.e. period, DM) are compared as numbers. Values
+ that are not numeric are ordered after every numeric value.
+
+ Alternatively, every catalogue can be sorted, and merged, by another
+ column (see sort).
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import heapq
+
+# For sorting catalogues larger than memory
+from ExternalSorter import ExternalSorter
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class CatalogueMerger(object):
+    """
+    Merges sorted test vector catalogues, removing duplicate test vectors.
+    """
+
+    # The columns catalogues can be merged by, mapped to (database column, True if numeric).
+    MERGE_COLUMNS = {'filename': (0, False), 'batch': (1, True), 'type': (2, False), 'period': (3, True),
+                     'dm': (4, True), 'accel': (5, True), 'snr': (6, True), 'epn': (7, False),
+                     'freq': (8, True), 'size': (11, True), 'md5': (13, False)}
+
+    # ****************************************************************************************************
+
+    def __init__(self, column='filename'):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param column: the merge column, one of the keys of MERGE_COLUMNS.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.column = column
+        self.index, self.numeric = self.MERGE_COLUMNS[column]
+
+        # Counts the test vectors merged, and the duplicates removed, for summary output.
+        self.merged = 0
+        self.duplicates = 0
+
+        # The external sorters of the catalogues sorted before they are merged, or of every
+        # catalogue when sorted by another column.
+        self.sorters = []
+
+    # ****************************************************************************************************
+
+    def key(self, parameters):
+        """
+        Gets the merge key of a test vector.
+
+        Parameters
+        ----------
+        :param parameters: the test vector parameter list, see PageBuilder.readTestVectors.
+
+        Returns
+        ----------
+        :return: a tuple of (merge column value, file name, MD5 hash).
+
+        """
+        value = parameters[self.index]
+
+        if self.numeric:
+            try:
+                value = (0, float(value))
+            except ValueError:
+                value = (1, value)
+
+        return value, parameters[0], parameters[13]
+
+    # ****************************************************************************************************
+
+    def keyed(self, name, number, test_vectors):
+        """
+        Decorates each test vector of a catalogue with its merge key, checking the
+        catalogue is sorted as it is read.
+
+        Parameters
+        ----------
+        :param name: the catalogue name, for error messages.
+        :param number: the catalogue number, which breaks ties between catalogues.
+        :param test_vectors: an iterable of the catalogue's test vector parameter lists.
+
+        Returns
+        ----------
+        :return: a generator of (merge key, catalogue number, parameters) tuples. A
+                 ValueError is raised if the catalogue is not sorted by the merge column.
+
+        """
+        previous = None
+
+        for parameters in test_vectors:
+            key = self.key(parameters)
+
+            if previous is not None and key < previous:
+                print '\t\tCatalogue not sorted by ', self.column, ': ', name
+                raise ValueError('Catalogue not sorted by ' + self.column + ': ' + name)
+
+            previous = key
+
+            yield key, number, parameters
+
+    # ****************************************************************************************************
+
+    def isSorted(self, test_vectors):
+        """
+        Checks whether a catalogue is sorted by the merge column.
+
+        Parameters
+        ----------
+        :param test_vectors: an iterable of the catalogue's test vector parameter lists.
+
+        Returns
+        ----------
+        :return: True if the catalogue is sorted, else False.
+
+        """
+        previous = None
+
+        for parameters in test_vectors:
+            key = self.key(parameters)
+
+            if previous is not None and key < previous:
+                return False
+
+            previous = key
+
+        return True
+
+    # ****************************************************************************************************
+
+    def sortCatalogue(self, test_vectors, memory):
+        """
+        Sorts a catalogue by the merge column, so it can be merged. See ExternalSorter.
+
+        Parameters
+        ----------
+        :param test_vectors: an iterable of the catalogue's test vector parameter lists.
+        :param memory: the memory budget of the sort, in bytes.
+
+        Returns
+        ----------
+        :return: a generator of the test vector parameter lists, sorted by the merge column.
+
+        """
+        sorter = ExternalSorter(self.key, memory)
+        self.sorters.append(sorter)
+
+        return sorter.sort(test_vectors)
+
+    # ****************************************************************************************************
+
+    def merge(self, catalogues):
+        """
+        Merges catalogues into a single stream of test vectors, sorted by the merge column.
+
+        Parameters
+        ----------
+        :param catalogues: a list of (catalogue name, iterable of test vector parameter lists) pairs,
+                           each sorted by the merge column.
+
+        Returns
+        ----------
+        :return: a generator of test vector parameter lists, without duplicates.
+
+        """
+        streams = [self.keyed(name, number, test_vectors)
+                   for number, (name, test_vectors) in enumerate(catalogues)]
+
+        return self.unique(heapq.merge(*streams))
+
+    # ****************************************************************************************************
+
+    def sort(self, catalogues, memory):
+        """
+        Sorts and merges catalogues in any order into a single stream of test vectors, sorted
+        by the merge column. The test vectors are sorted by an external merge sort, so only
+        the memory budget is used however large the catalogues are. See ExternalSorter.
+
+        Parameters
+        ----------
+        :param catalogues: a list of (catalogue name, iterable of test vector parameter lists) pairs.
+        :param memory: the memory budget of the sort, in bytes.
+
+        Returns
+        ----------
+        :return: a generator of test vector parameter lists, without duplicates.
+
+        """
+
+        # Each test vector carries its catalogue number while sorted, as the final field.
+        def tagged():
+            for number, (name, test_vectors) in enumerate(catalogues):
+                for parameters in test_vectors:
+                    yield parameters + [str(number)]
+
+        sorter = ExternalSorter(lambda row: self.key(row) + (int(row[-1]),), memory)
+        self.sorters.append(sorter)
+
+        return self.unique((self.key(row), int(row[-1]), row[:-1]) for row in sorter.sort(tagged()))
+
+    # ****************************************************************************************************
+
+    def unique(self, stream):
+        """
+        Removes duplicate test vectors from a sorted stream.
+
+        Parameters
+        ----------
+        :param stream: an iterable of (merge key, catalogue number, parameters) tuples, in order.
+
+        Returns
+        ----------
+        :return: a generator of test vector parameter lists, without duplicates.
+
+        """
+        previous = None
+
+        for key, number, parameters in stream:
+
+            # The same file name and MD5 hash, so the same test vector.
+            if previous is not None and key == previous:
+                self.duplicates += 1
+                continue
+
+            previous = key
+            self.merged += 1
+
+            yield parameters
+
+    # ****************************************************************************************************
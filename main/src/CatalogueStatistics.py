@@ -0,0 +1,362 @@
+"""
+**************************************************************************
+
+ CatalogueStatistics.py
+
+**************************************************************************
+ Description:
+
+ Summarises the test vector catalogue, for a statistics section on the
+ test vector page. It computes,
+
+ 1. Histograms of the period, DM, acceleration and S/N of the test vectors.
+    Periods span several orders of magnitude, so they are binned by log10.
+
+ 2. The number of test vectors, and the storage they use, per batch and per
+    EPN profile.
+
+ The catalogue is read once. Each row only appends its numeric values to
+ compact arrays, with batch and EPN profile names coded as integers as they
+ are first seen. The histograms and grouped sums are then computed by Numpy
+ over whole arrays (numpy.histogram and numpy.bincount), so the statistics
+ of a million test vectors take seconds, and a few tens of MB of memory.
+
+ The summary is rendered as static HTML, i.e. each histogram is an inline
+ SVG bar chart, and the groups are tables of the largest batches and EPN
+ profiles. So it needs no images, or scripts, to display.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import cgi
+import numpy
+from array import array
+
+# For converting the sizes in bits to GB.
+import DataConversions
+
+# Stands in for missing values, which numpy ignores in the statistics.
+NAN = float('nan')
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class CatalogueStatistics(object):
+    """
+    Accumulates, computes and renders summary statistics of the test vector catalogue.
+    """
+
+    # The database columns summarised as histograms, as (label, index, log binned) tuples.
+    HISTOGRAM_COLUMNS = [('Period (ms)', 3, True), ('DM', 4, False), ('Accel.', 5, False), ('S/N', 6, False)]
+
+    # The database columns test vectors are grouped by, as (label, index) pairs.
+    GROUP_COLUMNS = [('Batch', 1), ('EPN Template', 7)]
+
+    # The database column holding the test vector size in bits. The size in GB column is
+    # rounded, so summing it over many small vectors would under or over count the total.
+    SIZE_COLUMN = 11
+
+    # The size of each histogram chart in pixels.
+    CHART_WIDTH = 240
+    CHART_HEIGHT = 80
+
+    # ****************************************************************************************************
+
+    def __init__(self, bins=20, top=10):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param bins: the number of bins in each histogram.
+        :param top: the number of groups listed in each table, largest first.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.bins = bins
+        self.top = top
+        self.count = 0
+
+        # One array of values per histogram column, NaN where a value is missing.
+        self.values = [array('d') for column in self.HISTOGRAM_COLUMNS]
+        self.sizes = array('d')
+
+        # One array of group codes per group column, and the maps from group names to codes.
+        self.codes = [array('l') for column in self.GROUP_COLUMNS]
+        self.groups = [{} for column in self.GROUP_COLUMNS]
+
+        # The arrays paired with the columns they are read from, so add does no lookups.
+        self.numeric = [(values, index) for values, (label, index, log) in zip(self.values, self.HISTOGRAM_COLUMNS)]
+        self.numeric.append((self.sizes, self.SIZE_COLUMN))
+        self.categorical = [(codes, groups, index) for codes, groups, (label, index)
+                            in zip(self.codes, self.groups, self.GROUP_COLUMNS)]
+
+    # ****************************************************************************************************
+
+    def add(self, parameters):
+        """
+        Adds a test vector to the statistics.
+
+        Parameters
+        ----------
+        :param parameters: the test vector parameter list, see PageBuilder.readTestVectors.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        for values, index in self.numeric:
+            try:
+                values.append(float(parameters[index]))
+            except ValueError:
+                values.append(NAN)
+
+        for codes, groups, index in self.categorical:
+            codes.append(groups.setdefault(parameters[index], len(groups)))
+
+        self.count += 1
+
+    # ****************************************************************************************************
+
+    def track(self, test_vectors):
+        """
+        Adds each test vector to the statistics as it is read, so the statistics are
+        gathered in the same pass over the catalogue that builds the page.
+
+        Parameters
+        ----------
+        :param test_vectors: an iterable of test vector parameter lists.
+
+        Returns
+        ----------
+        :return: a generator of the same test vector parameter lists.
+
+        """
+        for parameters in test_vectors:
+            self.add(parameters)
+            yield parameters
+
+    # ****************************************************************************************************
+
+    def histogram(self, values, log):
+        """
+        Computes the histogram of a column, ignoring missing and infinite values.
+
+        Parameters
+        ----------
+        :param values: the column values, as a numpy array.
+        :param log: if True, the values are binned by log10, ignoring values <= 0.
+
+        Returns
+        ----------
+        :return: a tuple of (bin counts, bin edges), else None if there are no values.
+
+        """
+        values = values[numpy.isfinite(values)]
+
+        if log:
+            values = values[values > 0]
+
+        if len(values) == 0:
+            return None
+
+        if not log:
+            return numpy.histogram(values, self.bins)
+
+        counts, edges = numpy.histogram(numpy.log10(values), self.bins)
+
+        return counts, 10.0 ** edges
+
+    # ****************************************************************************************************
+
+    def compute(self):
+        """
+        Computes the statistics of the test vectors added so far.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: a dictionary of the form,
+
+                 {'count': <number of test vectors>, 'size': <total size in GB>,
+                  'histograms': [(label, counts, edges), ...],
+                  'groups': [(label, [(name, count, size in GB), ...], number of groups), ...]}
+
+                 where each group list holds the largest groups by size, largest first.
+
+        """
+        # The sizes are summed in bits, and only the sums converted to GB.
+        sizes = numpy.frombuffer(self.sizes, dtype=numpy.float64)
+        sizes = numpy.where(numpy.isnan(sizes), 0.0, sizes)
+        gb_per_bit = DataConversions.convertBitToByte(1, 'GB')
+
+        histograms = []
+        for values, (label, index, log) in zip(self.values, self.HISTOGRAM_COLUMNS):
+            result = self.histogram(numpy.frombuffer(values, dtype=numpy.float64), log)
+            if result is not None:
+                histograms.append((label, result[0], result[1]))
+
+        groups = []
+        for codes, names, (label, index) in zip(self.codes, self.groups, self.GROUP_COLUMNS):
+
+            if len(names) == 0:
+                continue
+
+            codes = numpy.frombuffer(codes, dtype=numpy.dtype('l'))
+            counts = numpy.bincount(codes, minlength=len(names))
+            totals = numpy.bincount(codes, weights=sizes, minlength=len(names)) * gb_per_bit
+
+            # Order the group names by their code, to index them like the sums.
+            ordered = [None] * len(names)
+            for name, code in names.iteritems():
+                ordered[code] = name
+
+            largest = numpy.argsort(-totals, kind='mergesort')[:self.top]
+            groups.append((label, [(ordered[i], int(counts[i]), float(totals[i])) for i in largest], len(names)))
+
+        return {'count': self.count, 'size': float(sizes.sum()) * gb_per_bit, 'histograms': histograms,
+                'groups': groups}
+
+    # ****************************************************************************************************
+
+    def render(self):
+        """
+        Renders the statistics as a HTML summary section.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: the HTML string, which is empty if no test vectors were added.
+
+        """
+        if self.count == 0:
+            return ''
+
+        statistics = self.compute()
+
+        html = ['<div class="statistics">\n',
+                '<h2>Catalogue Statistics</h2>\n',
+                '<p>%d test vectors, using %s GB of storage.</p>\n' % (statistics['count'],
+                                                                         self.formatValue(statistics['size']))]
+
+        for label, counts, edges in statistics['histograms']:
+            html.append(self.renderHistogram(label, counts, edges))
+
+        for label, rows, total in statistics['groups']:
+            html.append(self.renderGroups(label, rows, total))
+
+        html.append('</div>\n')
+
+        return ''.join(html)
+
+    # ****************************************************************************************************
+
+    def renderHistogram(self, label, counts, edges):
+        """
+        Renders a histogram as an inline SVG bar chart.
+
+        Parameters
+        ----------
+        :param label: the column label.
+        :param counts: the bin counts.
+        :param edges: the bin edges, one more than the counts.
+
+        Returns
+        ----------
+        :return: the HTML string.
+
+        """
+        width = float(self.CHART_WIDTH) / len(counts)
+        scale = float(self.CHART_HEIGHT) / max(counts.max(), 1)
+
+        bars = []
+        for i, count in enumerate(counts):
+            height = count * scale
+            bars.append('<rect x="%.1f" y="%.1f" width="%.1f" height="%.1f"><title>%s to %s: %d</title></rect>' %
+                        (i * width, self.CHART_HEIGHT - height, max(width - 1, 1), height,
+                         self.formatValue(edges[i]), self.formatValue(edges[i + 1]), count))
+
+        return ('<div class="chart">\n<h4>%s</h4>\n'
+                '<svg width="%d" height="%d" viewBox="0 0 %d %d">%s</svg>\n'
+                '<p><span>%s</span><span class="right">%s</span></p>\n</div>\n') % (
+            cgi.escape(label), self.CHART_WIDTH, self.CHART_HEIGHT, self.CHART_WIDTH, self.CHART_HEIGHT,
+            ''.join(bars), self.formatValue(edges[0]), self.formatValue(edges[-1]))
+
+    # ****************************************************************************************************
+
+    def renderGroups(self, label, rows, total):
+        """
+        Renders the largest groups of test vectors as a table.
+
+        Parameters
+        ----------
+        :param label: the group column label.
+        :param rows: a list of (name, count, size in GB) tuples, largest first.
+        :param total: the total number of groups.
+
+        Returns
+        ----------
+        :return: the HTML string.
+
+        """
+        html = ['<div class="groups">\n',
+                '<h4>Storage by %s (largest %d of %d)</h4>\n' % (cgi.escape(label), len(rows), total),
+                '<table class="table table-condensed">\n',
+                '<tr><th>%s</th><th>Test Vectors</th><th>Size (GB)</th></tr>\n' % cgi.escape(label)]
+
+        for name, count, size in rows:
+            html.append('<tr><td>%s</td><td>%d</td><td>%s</td></tr>\n' %
+                        (cgi.escape(name), count, self.formatValue(size)))
+
+        html.append('</table>\n</div>\n')
+
+        return ''.join(html)
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def formatValue(value):
+        """
+        Formats a bin edge for display.
+
+        Parameters
+        ----------
+        :param value: the bin edge.
+
+        Returns
+        ----------
+        :return: the value to 4 significant figures.
+
+        """
+        return '%.4g' % value
+
+    # ****************************************************************************************************
@@ -18,6 +18,22 @@
     | --dir (string) path to the directory containing .asc files.            |
     |                                                                        |
     **************************************************************************
+    | Optional Command Line Arguments:                                       |
+    |                                                                        |
+    | --workers (int) the number of processes rendering PNGs in parallel.    |
+    |                 By default PNGs are rendered one at a time.            |
+    |                                                                        |
+    | --force (flag) render every PNG, even those that are up to date.       |
+    |                                                                        |
+    | --backend (string) the plotting backend, matplotlib (the default), or  |
+    |                    numpy, which draws the same plots without           |
+    |                    Matplotlib, several times faster.                   |
+    |                                                                        |
+    | --library (string) read the profiles from a profile library (see       |
+    |                    ProfileLibraryApp.py) instead of the .asc files.    |
+    |                    PNGs are still written to --dir.                    |
+    |                                                                        |
+    **************************************************************************
     | License:                                                               |
     |                                                                        |
     | Code made available under the GPLv3 (GNU General Public License), that |
@@ -36,13 +52,26 @@ from optparse import OptionParser
 import os
 import sys
 import datetime
-import operator
+import json
+import hashlib
 import numpy
+import multiprocessing
 
 # For common operations.
 from Common import Common
 
-import matplotlib.pyplot as plt
+# For drawing plots without Matplotlib.
+from ProfileRasteriser import ProfileRasteriser
+
+# For reading profiles from a profile library.
+from ProfileLibrary import ProfileLibrary
+
+# For centring profiles in batches.
+from ProfileBatch import ProfileBatch
+
+# Matplotlib is imported on first use, see initMatplotlib, so that each
+# worker process initialises it once, with the Agg backend.
+plt = None
 
 # ******************************
 #
@@ -54,10 +83,68 @@ import matplotlib.pyplot as plt
 class CreatePulsarProfilePng(object):
     """
     Parses a directory containing .asc files, and produces PNG plots
-    of the pulse. The plots are created using Matplotlib.
+    of the pulse. The plots are created using Matplotlib, or with the
+    numpy backend, drawn directly by ProfileRasteriser.
+
+    A PNG is only rendered if it is out of date, i.e. it is older than
+    its .asc file, and the .asc file content has changed since the PNG
+    was rendered. The content hash of each rendered .asc file is kept in
+    a file in the directory (see HASH_FILE). So copying or touching the
+    .asc files does not cause every PNG to be rendered again.
+
+    The profiles may instead be read from a profile library, which holds
+    the content hash of each .asc file it was built from. A PNG is then
+    out of date if its hash differs from the library's.
 
     """
 
+    # The file, in the .asc directory, recording the content hash of each
+    # .asc file a PNG was rendered from.
+    HASH_FILE = 'profile_hashes.json'
+
+    # The plotting backends.
+    BACKENDS = ['matplotlib', 'numpy']
+
+    # The number of profiles read, and centred, together (see ProfileBatch).
+    BATCH_SIZE = 256
+
+    # ****************************************************************************************************
+
+    def __init__(self, backend='matplotlib', library_path=None, directory=None):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param backend: the plotting backend, one of BACKENDS.
+        :param library_path: the path of a profile library to read profiles from, else None to read .asc files.
+        :param directory: the directory PNGs are written to, which library keys are relative to.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.backend = backend
+        self.directory = directory
+
+        # The profile library, when profiles are read from one.
+        self.library_path = library_path
+        self.library = None
+
+        if library_path is not None:
+            self.library = ProfileLibrary(library_path)
+
+        # Draws the plots for the numpy backend. Built on first use.
+        self.rasteriser = None
+
+        # The figure, and its artists, reused for every profile rendered by this
+        # object. Built on first use, see createFigure.
+        self.fig = None
+        self.ax = None
+        self.line = None
+        self.title = None
+
     # ******************************
     #
     # MAIN METHOD AND ENTRY POINT.
@@ -97,10 +184,18 @@ class CreatePulsarProfilePng(object):
         # REQUIRED ARGUMENTS
         parser.add_option("--dir", action="store", dest="dir", help='Path to the directory to parse (required).', default=None)
 
+        # OPTIONAL ARGUMENTS
+        parser.add_option("--workers", type="int", dest="workers", help='Number of rendering processes (optional).', default=None)
+        parser.add_option("--force", action="store_true", dest="force", help='Render every PNG, even if up to date (optional).', default=False)
+        parser.add_option("--library", action="store", dest="library", help='Path to a profile library to read (optional).', default=None)
+        parser.add_option("--backend", type="choice", dest="backend", choices=self.BACKENDS, help='Plotting backend, matplotlib or numpy (optional).', default='matplotlib')
+
         (args, options) = parser.parse_args()
 
         # Update variables with command line parameters.
         directory = args.dir
+        self.backend = args.backend
+        self.directory = directory
 
         ############################################################
         #              Check user supplied parameters              #
@@ -114,142 +209,69 @@ class CreatePulsarProfilePng(object):
             print "No valid directory supplied, exiting."
             sys.exit()
 
+        if args.workers is not None and args.workers < 1:
+            print "The number of worker processes must be at least 1, exiting."
+            sys.exit()
+
+        if args.library is not None:
+            if not Common.file_exists(args.library):
+                print "No valid profile library supplied, exiting."
+                sys.exit()
+
+            try:
+                self.library = ProfileLibrary(args.library)
+                self.library_path = args.library
+            except ValueError as e:
+                print str(e), ", exiting."
+                sys.exit()
+
         ############################################################
         #               Start parsing the directory                #
         ############################################################
 
-        print "\tSearching: ", directory
-
-        # Count of the profile files found.
-        ascFileCount = 0
+        if self.library is not None:
+            print "\tReading: ", self.library_path
+        else:
+            print "\tSearching: ", directory
 
         # Used to measure processing time.
         start = datetime.datetime.now()
 
-        # For each type of file this program recognises...
-        for filetype in ['.asc']:
-
-            # Loop through the specified directory
+        # Find the profile files. Those in a library are named as if they were in the directory.
+        paths = []
+        if self.library is not None:
+            paths = [os.path.join(directory, key.replace('/', os.sep) + '.asc') for key in self.library.keys()]
+        else:
             for root, subFolders, filenames in os.walk(directory):
-
-                # If the file type matches '.asc'
-
                 for file_name in filenames:
 
                     # Double check it is a .asc file
-                    if file_name.endswith(filetype):
-
-                        # Increment asc file count,  as we have found
-                        # a valid file.
-                        ascFileCount += 1
-
-                        # Get the full path to the file.
-                        full_file_path = os.path.join(root, file_name)
-
-                        # Read the data in from the .asc file. This data
-                        # should describe a valid pulse profile. The file
-                        # should be structured so that there is only a single
-                        # data item on each line, e.g.,
-                        #
-                        # 0.4
-                        # 0.5
-                        # 0.3
-                        # 0.9
-                        # ...
-                        #
-                        # So each line should be read, and the data extracted.
-                        data_str = Common.read_file(full_file_path)
-
-                        if data_str is None:
-                            print 'File empty: ', file_name
-                        else:
-
-                            data_points = len(data_str)
-
-                            # Check there is more than 1 data point
-                            if data_points < 1:
-                                print 'Too few data points in file: ', file_name
-                            else:
-                                # Now store the data in a simple list.
-                                data = []
-
-                                try:
-                                    # For each data item, try to cast as a float
-                                    # if the cast files, the file is invalid. The
-                                    # file should contain only numerical values.
-                                    for s in data_str:
-                                        d = float(s)
-                                        data.append(d)
-
-                                except Exception as e:
-                                    print 'Error converting numerical values to float in file: ', file_name
-                                    print 'Does the file contain strings or invalid characters? '
-
-                                # If the code above succeeded, there should be more than
-                                # 1 data item in the list.
-                                if len(data) > 0:
-
-                                    # From the .asc file name, we can get the pulsar name.
-                                    # The asc file should be named as follows:
-                                    #
-                                    # <Pulsar>_<Freq>_<version>.asc
-                                    #
-                                    # Where the version element may or may not be included.
-
-                                    # So for example file names could include,
-                                    #
-                                    # J0000+0000_1400.asc
-                                    # J0000-0000_1400.asc
-                                    # J0000+0000_1400_1.asc
-                                    # J0000-0000_1400_1.asc
-                                    # J0000+0000_1400_2.asc
-                                    # J0000-0000_1400_2.asc
-                                    # J0000+0000_600.asc
-                                    # J0000-0000_600.asc
-                                    # ...
-                                    #
-                                    # etc.
-                                    file_name_components = file_name.replace('.asc', '').split('_')
-
-                                    if file_name_components is None:
-                                        print 'Unexpected .asc file name - must be of form <Pulsar>_<Freq>.asc'
-                                    else:
-
-                                        if len(file_name_components) <= 1:
-                                            print 'Unexpected .asc file name - must be of form <Pulsar>_<Freq>.asc'
-                                        else:
-
-                                            # Get pulsar name and frequency
-                                            name = str(file_name_components[0])
-                                            freq = str(file_name_components[1])
-
-                                            # Now produce the plot
-                                            centred_data = self.centre_on_peak(data)
-                                            fig = plt.figure(figsize=(3, 3))
-                                            ax = plt.subplot(111)
-                                            ax.plot(centred_data)
-                                            ax.set_xlim([0, data_points])
-                                            ax.set_ylabel('Intensity')
-                                            ax.set_xlabel('Bin')
-
-                                            # Remove axis ticks
-                                            ax.set_yticklabels([])
-                                            ax.set_xticklabels([])
-                                            plt.axis('off')
-
-                                            title = name + ' @ ' + freq + ' MHz'
-                                            plt.title(title)
-
-                                            # Now save the image file. If the destination file
-                                            # path exists, simply delete it, then create the
-                                            # new image.
-                                            if Common.file_exists(full_file_path.replace('.asc', '.png')):
-                                                Common.delete_file(full_file_path.replace('.asc', '.png'))
-
-                                            fig.savefig(full_file_path.replace('.asc', '.png'))
-
-                                            # Must close to prevent memory issues.
-                                            plt.close(fig)
+                    if file_name.endswith('.asc'):
+                        paths.append(os.path.join(root, file_name))
+
+        hash_path = os.path.join(directory, self.HASH_FILE)
+        hashes = self.loadHashes(hash_path)
+
+        if args.force:
+            stale = paths
+        else:
+            stale = [path for path in paths if not self.upToDate(path, directory, hashes)]
+
+        if len(stale) == 0:
+            rendered, errors = [], []
+        elif args.workers is None:
+            if self.backend == 'matplotlib':
+                initMatplotlib()
+            rendered, errors = renderChunk(stale, self)
+        else:
+            rendered, errors = self.renderParallel(stale, args.workers)
+
+        # Record the content hashes of the profiles rendered, forgetting those deleted.
+        for path, digest in rendered:
+            hashes[os.path.relpath(path, directory)] = digest
+
+        current = set([os.path.relpath(path, directory) for path in paths])
+        self.saveHashes(hash_path, dict([(key, value) for key, value in hashes.iteritems() if key in current]))
 
         # Finally get the time that the procedure finished.
         end = datetime.datetime.now()
@@ -258,13 +280,509 @@ class CreatePulsarProfilePng(object):
         #                    Summarise outcome                     #
         ############################################################
 
+        seconds = max((end - start).total_seconds(), 1e-6)
+
+        for error in errors:
+            print '\t', error
+
         print "\tFinished parsing"
-        print "\tTotal .asc files found: ", str(ascFileCount)
+        print "\tTotal .asc files found: ", str(len(paths))
+        print "\tPNGs up to date: ", str(len(paths) - len(stale))
+        print "\tPNGs rendered: ", str(len(rendered))
+        print "\tErrors: ", str(len(errors))
         print "\tExecution time: ", str(end - start)
+        print "\tThroughput: ", '%.1f' % (len(rendered) / seconds), " PNGs per second"
         print "Done."
 
     # ****************************************************************************************************
 
+    def renderParallel(self, paths, workers):
+        """
+        Renders the PNGs of profile files using a pool of processes. Each process
+        initialises its plotting backend once, then renders chunks of files.
+
+        Parameters
+        ----------
+        :param paths: the paths of the .asc files.
+        :param workers: the number of processes.
+
+        Returns
+        ----------
+        :return: a tuple of (a list of (.asc path, content hash) pairs for the PNGs rendered,
+                 a list of error messages).
+
+        """
+        # Several chunks per process balance the load, while keeping the
+        # number of tasks sent to the pool small.
+        chunk_size = max(1, min(64, -(-len(paths) // (workers * 4))))
+        chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+        rendered = []
+        errors = []
+
+        pool = multiprocessing.Pool(workers, initWorker, (self.backend, self.library_path, self.directory))
+        try:
+            for chunk_rendered, chunk_errors in pool.imap_unordered(renderChunk, chunks):
+                rendered += chunk_rendered
+                errors += chunk_errors
+        finally:
+            pool.close()
+            pool.join()
+
+        return rendered, errors
+
+    # ****************************************************************************************************
+
+    def upToDate(self, full_file_path, directory, hashes):
+        """
+        Checks whether the PNG of a profile file is up to date, i.e. it is newer than the
+        .asc file, or the .asc file content matches the hash recorded when the PNG was
+        rendered. In the latter case the PNG is touched, so the next check is quicker.
+
+        Parameters
+        ----------
+        :param full_file_path: the path of the .asc file.
+        :param directory: the directory the recorded hashes are relative to.
+        :param hashes: the recorded content hashes, see loadHashes.
+
+        Returns
+        ----------
+        :return: True if the PNG is up to date, else False.
+
+        """
+        png_path = full_file_path.replace('.asc', '.png')
+
+        # A library records the content hash of each profile, so only the hashes are compared.
+        if self.library is not None:
+            digest = hashes.get(os.path.relpath(full_file_path, directory))
+            return digest is not None and digest == self.profileHash(full_file_path) and Common.file_exists(png_path)
+
+        try:
+            png_time = os.path.getmtime(png_path)
+            asc_time = os.path.getmtime(full_file_path)
+        except OSError:
+            return False  # No PNG yet.
+
+        if png_time >= asc_time:
+            return True
+
+        digest = hashes.get(os.path.relpath(full_file_path, directory))
+        if digest is None or digest != fileHash(full_file_path):
+            return False
+
+        try:
+            os.utime(png_path, None)
+        except OSError:
+            pass  # Only means the hash is checked again next time.
+
+        return True
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def loadHashes(hash_path):
+        """
+        Loads the content hashes recorded when PNGs were last rendered.
+
+        Parameters
+        ----------
+        :param hash_path: the path of the hash file.
+
+        Returns
+        ----------
+        :return: a dictionary mapping .asc paths (relative to their directory) to content hashes.
+
+        """
+        if not Common.file_exists(hash_path):
+            return {}
+
+        try:
+            return json.loads(Common.read_file_as_string(hash_path) or '{}')
+        except ValueError:
+            print '\tIgnoring invalid hash file: ', hash_path
+            return {}
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def saveHashes(hash_path, hashes):
+        """
+        Writes the content hashes of the rendered profiles, via a temporary file.
+
+        Parameters
+        ----------
+        :param hash_path: the path of the hash file.
+        :param hashes: a dictionary mapping .asc paths (relative to their directory) to content hashes.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        temp_path = hash_path + '.' + str(os.getpid()) + '.tmp'
+
+        with open(temp_path, 'w') as f:
+            json.dump(hashes, f, separators=(',', ':'), sort_keys=True)
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(hash_path)
+
+        os.rename(temp_path, hash_path)
+
+    # ****************************************************************************************************
+
+    def renderProfile(self, full_file_path):
+        """
+        Renders the PNG plot of a single profile file, next to the file.
+
+        Parameters
+        ----------
+        :param full_file_path: the path of the .asc file.
+
+        Returns
+        ----------
+        :return: None if the PNG was rendered, else an error message.
+
+        """
+        return self.renderProfiles([full_file_path])[0][1]
+
+    # ****************************************************************************************************
+
+    def renderProfiles(self, paths):
+        """
+        Renders the PNG plots of several profile files, next to the files. The profiles
+        are read first, then centred together as a batch, see ProfileBatch.
+
+        Parameters
+        ----------
+        :param paths: the paths of the .asc files.
+
+        Returns
+        ----------
+        :return: a list holding, for each file, a tuple of (the content hash of the profile read,
+                 None) if the PNG was rendered, else (None, an error message).
+
+        """
+        results = [(None, None)] * len(paths)
+
+        # The index in paths, data and title of each valid profile.
+        numbers = []
+        profiles = []
+        titles = []
+
+        for number, full_file_path in enumerate(paths):
+
+            data, digest, error = self.readProfile(full_file_path)
+
+            if error is None:
+                title, error = self.titleFor(os.path.basename(full_file_path))
+
+            if error is not None:
+                results[number] = (None, error)
+                continue
+
+            results[number] = (digest, None)
+            numbers.append(number)
+            profiles.append(data)
+            titles.append(title)
+
+        batch = ProfileBatch(profiles)
+        batch.centre()
+
+        for row, number in enumerate(numbers):
+            error = self.writePng(paths[number], batch.profile(row), titles[row])
+
+            if error is not None:
+                results[number] = (None, error)
+
+        return results
+
+    # ****************************************************************************************************
+
+    def titleFor(self, file_name):
+        """
+        Gets the plot title of a profile, from its file name.
+
+        Parameters
+        ----------
+        :param file_name: the .asc file name.
+
+        Returns
+        ----------
+        :return: a tuple of (the title, None), else (None, an error message) if the file name is invalid.
+
+        """
+        # From the .asc file name, we can get the pulsar name.
+        # The asc file should be named as follows:
+        #
+        # <Pulsar>_<Freq>_<version>.asc
+        #
+        # Where the version element may or may not be included.
+
+        # So for example file names could include,
+        #
+        # J0000+0000_1400.asc
+        # J0000-0000_1400.asc
+        # J0000+0000_1400_1.asc
+        # J0000-0000_1400_1.asc
+        # J0000+0000_1400_2.asc
+        # J0000-0000_1400_2.asc
+        # J0000+0000_600.asc
+        # J0000-0000_600.asc
+        # ...
+        #
+        # etc.
+        file_name_components = file_name.replace('.asc', '').split('_')
+
+        if len(file_name_components) <= 1:
+            return None, 'Unexpected .asc file name - must be of form <Pulsar>_<Freq>.asc: ' + file_name
+
+        # Get pulsar name and frequency
+        name = str(file_name_components[0])
+        freq = str(file_name_components[1])
+
+        return name + ' @ ' + freq + ' MHz', None
+
+    # ****************************************************************************************************
+
+    def writePng(self, full_file_path, centred_data, title):
+        """
+        Plots a centred profile, and writes the plot as a PNG next to its .asc file.
+
+        Parameters
+        ----------
+        :param full_file_path: the path of the .asc file.
+        :param centred_data: the profile data, centred on its peak.
+        :param title: the plot title.
+
+        Returns
+        ----------
+        :return: None if the PNG was written, else an error message.
+
+        """
+        png_path = full_file_path.replace('.asc', '.png')
+
+        try:
+            # Now save the image file. If the destination file
+            # path exists, simply delete it, then create the
+            # new image.
+            if Common.file_exists(png_path):
+                Common.delete_file(png_path)
+
+            if self.backend == 'numpy':
+                self.drawPng(png_path, centred_data, title)
+            else:
+                self.plotPng(png_path, centred_data, title)
+
+        except (IOError, OSError) as e:
+            return 'Unable to write PNG: ' + png_path + ' (' + str(e) + ')'
+        except ValueError as e:
+            # The numpy backend cannot draw the title, see ProfileRasteriser.drawText.
+            return 'Unable to draw PNG: ' + png_path + ' (' + str(e) + ')'
+
+        return None
+
+    # ****************************************************************************************************
+
+    def readProfile(self, full_file_path):
+        """
+        Reads the data of a profile, from the profile library if there is one, else from the .asc file.
+        The content hash is that of the bytes read, so the file is not read again to record it.
+
+        Parameters
+        ----------
+        :param full_file_path: the path of the .asc file.
+
+        Returns
+        ----------
+        :return: a tuple of (the profile data points, the MD5 hash of the .asc file content, None),
+                 else (None, None, an error message).
+
+        """
+        if self.library is not None:
+            key = self.libraryKey(full_file_path)
+
+            if not self.library.has(key):
+                return None, None, 'Profile not in library: ' + key
+
+            # A view of the mapped library data, so no text is parsed.
+            return self.library.profile(key), self.library.digest(key), None
+
+        # Read the data in from the .asc file. This data
+        # should describe a valid pulse profile. The file
+        # should be structured so that there is only a single
+        # data item on each line, e.g.,
+        #
+        # 0.4
+        # 0.5
+        # 0.3
+        # 0.9
+        # ...
+        #
+        # So each line should be read, and the data extracted.
+        file_name = os.path.basename(full_file_path)
+
+        try:
+            with open(full_file_path, 'rb') as f:
+                content = f.read()
+        except IOError:
+            content = ''
+
+        if content == '':
+            return None, None, 'File empty: ' + file_name
+
+        # The lines of the file, as readlines would split them.
+        data_str = content.split('\n')
+        if data_str[-1] == '':
+            data_str.pop()
+
+        data_points = len(data_str)
+
+        # Check there is more than 1 data point
+        if data_points < 1:
+            return None, None, 'Too few data points in file: ' + file_name
+
+        try:
+            # For each data item, try to cast as a float
+            # if the cast files, the file is invalid. The
+            # file should contain only numerical values.
+            data = [float(s) for s in data_str]
+        except ValueError:
+            return None, None, 'Error converting numerical values to float in file: ' + file_name + \
+                               ' (does the file contain strings or invalid characters?)'
+
+        return data, hashlib.md5(content).hexdigest(), None
+
+
+    # ****************************************************************************************************
+
+    def libraryKey(self, full_file_path):
+        """
+        Gets the profile library key of a profile file.
+
+        Parameters
+        ----------
+        :param full_file_path: the path of the .asc file.
+
+        Returns
+        ----------
+        :return: the key, i.e. the .asc path relative to the directory, without extension.
+
+        """
+        return os.path.relpath(full_file_path, self.directory)[:-len('.asc')].replace(os.sep, '/')
+
+    # ****************************************************************************************************
+
+    def profileHash(self, full_file_path):
+        """
+        Gets the content hash of a profile file, as recorded in the profile library if there is one.
+
+        Parameters
+        ----------
+        :param full_file_path: the path of the .asc file.
+
+        Returns
+        ----------
+        :return: the MD5 hash as a hex string, else None if the profile cannot be read.
+
+        """
+        if self.library is not None:
+            key = self.libraryKey(full_file_path)
+            return self.library.digest(key) if self.library.has(key) else None
+
+        return fileHash(full_file_path)
+
+    # ****************************************************************************************************
+
+    def plotPng(self, png_path, centred_data, title):
+        """
+        Plots a profile with Matplotlib, and saves the plot as a PNG.
+
+        Parameters
+        ----------
+        :param png_path: the path of the PNG.
+        :param centred_data: the profile data, centred on its peak.
+        :param title: the plot title.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        # Building a figure costs far more than drawing one, so the figure is built
+        # once, and only the line, limits and title are updated for each profile.
+        if self.fig is None:
+            self.createFigure()
+
+        self.line.set_data(numpy.arange(len(centred_data)), centred_data)
+
+        # Rescale the y-axis to the new line, as plotting it would.
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        self.ax.set_xlim([0, len(centred_data)])
+
+        self.title.set_text(title)
+
+        self.fig.savefig(png_path)
+
+    # ****************************************************************************************************
+
+    def drawPng(self, png_path, centred_data, title):
+        """
+        Draws a profile plot without Matplotlib, and saves it as a PNG. See ProfileRasteriser.
+
+        Parameters
+        ----------
+        :param png_path: the path of the PNG.
+        :param centred_data: the profile data, centred on its peak.
+        :param title: the plot title.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        if self.rasteriser is None:
+            self.rasteriser = ProfileRasteriser()
+
+        png = self.rasteriser.render(centred_data, title)
+
+        with open(png_path, 'wb') as f:
+            f.write(png)
+
+    # ****************************************************************************************************
+
+    def createFigure(self):
+        """
+        Builds the figure profiles are plotted in, with an empty line and title that are
+        updated for each profile. The figure is never closed, as it is reused until the
+        process exits.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.fig = plt.figure(figsize=(3, 3))
+        self.ax = self.fig.add_subplot(111)
+        self.line, = self.ax.plot([], [])
+        self.ax.set_ylabel('Intensity')
+        self.ax.set_xlabel('Bin')
+
+        # Remove axis ticks
+        self.ax.set_yticklabels([])
+        self.ax.set_xticklabels([])
+        self.ax.axis('off')
+
+        self.title = self.ax.set_title('')
+
+    # ****************************************************************************************************
+
     def centre_on_peak(self, data):
         """
         Centre the data such that the maximum y-axis value is in the
@@ -278,25 +796,124 @@ class CreatePulsarProfilePng(object):
         ----------
         :return: the centred data array.
         """
-        # Stores the centred data.
-        centred_data = []
+        batch = ProfileBatch([data])
+        batch.centre()
 
-        # Get the index of the maximum value.
-        index, value = max(enumerate(data), key=operator.itemgetter(1))
+        return batch.profile(0)
 
-        # Find midpoint of the data.
-        midpoint = int(len(data) / 2)
+    # ****************************************************************************************************
 
-        # Figure out the shift required to centre the data (put max value in centre bin).
-        n = midpoint - index  # N gives the number of bins the data should be shifted.
-        a = n % len(data)
 
-        # Apply the correction.
-        centred_data = numpy.concatenate([data[-a:], data[:-a]])
+# ******************************
+#
+# PROCESS POOL WORKER
+#
+# ******************************
 
-        return centred_data
+# The profile renderer of a worker process, created once per process by initWorker.
+worker = None
+
+
+def initMatplotlib():
+    """
+    Imports Matplotlib with the Agg backend, which renders straight to PNG without
+    a display. Only the first call in each process has any effect.
+
+    Parameters
+    ----------
+    N/A
+
+    Returns
+    ----------
+    N/A
+
+    """
+    global plt
+
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as pyplot
+        plt = pyplot
+
+
+def initWorker(backend='matplotlib', library_path=None, directory=None):
+    """
+    Initialises a worker process, i.e. the plotting backend and the profile renderer.
+    Each process maps the profile library (if there is one) itself.
+
+    Parameters
+    ----------
+    :param backend: the plotting backend, see CreatePulsarProfilePng.BACKENDS.
+    :param library_path: the path of a profile library to read profiles from, else None.
+    :param directory: the directory PNGs are written to.
+
+    Returns
+    ----------
+    N/A
+
+    """
+    global worker
+
+    if backend == 'matplotlib':
+        initMatplotlib()
+
+    worker = CreatePulsarProfilePng(backend, library_path, directory)
+
+
+def renderChunk(paths, renderer=None):
+    """
+    Renders the PNGs of a chunk of profile files. This is a module level function,
+    so that it can be passed to a multiprocessing pool.
+
+    Parameters
+    ----------
+    :param paths: the paths of the .asc files.
+    :param renderer: the profile renderer, by default that of the worker process.
+
+    Returns
+    ----------
+    :return: a tuple of (a list of (.asc path, content hash) pairs for the PNGs rendered,
+             a list of error messages).
+
+    """
+    if renderer is None:
+        renderer = worker
+
+    rendered = []
+    errors = []
+
+    for start in range(0, len(paths), renderer.BATCH_SIZE):
+        batch = paths[start:start + renderer.BATCH_SIZE]
+
+        for path, (digest, error) in zip(batch, renderer.renderProfiles(batch)):
+            if error is None:
+                rendered.append((path, digest))
+            else:
+                errors.append(error)
+
+    return rendered, errors
+
+
+def fileHash(path):
+    """
+    Computes the content hash of a file.
+
+    Parameters
+    ----------
+    :param path: the path of the file.
+
+    Returns
+    ----------
+    :return: the MD5 hash as a hex string, else None if the file cannot be read.
+
+    """
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.md5(f.read()).hexdigest()
+    except IOError:
+        return None
 
-    # ****************************************************************************************************
 
 if __name__ == '__main__':
     CreatePulsarProfilePng().main()
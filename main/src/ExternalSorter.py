@@ -0,0 +1,279 @@
+"""
+**************************************************************************
+
+ ExternalSorter.py
+
+**************************************************************************
+ Description:
+
+ Sorts test vector rows that may not fit in memory, using an external
+ merge sort, i.e.
+
+ 1. Rows are read into memory until the memory budget is used, sorted,
+    and spilled to a temporary file as a sorted run.
+
+ 2. Once every row has been read, the runs are merged by a streaming k-way
+    merge, which only holds the next row of each run in memory. The sorted
+    rows are yielded as they are merged, so they can be rendered directly.
+
+ If every row fits within the memory budget, nothing is spilled. If there
+ are more runs than can be merged at once (each run is an open file), the
+ oldest runs are first merged into a single longer run.
+
+ The sort is stable, i.e. rows with equal keys keep their input order.
+
+ The memory used by a row is estimated from the length of its fields, plus
+ a fixed overhead per field for the Python objects holding them. It is an
+ estimate, so the budget should leave some headroom.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import heapq
+import tempfile
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class ExternalSorter(object):
+    """
+    Sorts rows (lists of strings without commas or newlines) within a memory budget.
+    """
+
+    # The estimated memory overhead, in bytes, of a row list, and of each field
+    # (a string object, its list pointer, and its share of the sort key).
+    ROW_OVERHEAD = 128
+    FIELD_OVERHEAD = 64
+
+    # The maximum number of runs merged at once.
+    MAX_RUNS = 128
+
+    # ****************************************************************************************************
+
+    def __init__(self, key, memory=256 * 1024 * 1024):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param key: a function returning the sort key of a row.
+        :param memory: the memory budget for rows held in memory, in bytes.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.key = key
+        self.memory = memory
+
+        # The runs spilled so far, and the rows held in memory (with their estimated size).
+        self.runs = []
+        self.buffered = []
+        self.used = 0
+
+        # Counts the runs spilled to disk, for summary output.
+        self.spilled = 0
+
+    # ****************************************************************************************************
+
+    def sort(self, rows):
+        """
+        Sorts rows.
+
+        Parameters
+        ----------
+        :param rows: an iterable of rows.
+
+        Returns
+        ----------
+        :return: a generator of the rows in sorted order.
+
+        """
+        try:
+            for row in rows:
+                self.add(row)
+
+            for row in self.rows():
+                yield row
+
+        finally:
+            self.close()
+
+    # ****************************************************************************************************
+
+    def add(self, row):
+        """
+        Adds a row to be sorted, spilling the rows held in memory to a sorted run once
+        the memory budget is used. Calling add for every row, then rows, is equivalent
+        to sort, for rows produced one at a time rather than by an iterable.
+
+        Parameters
+        ----------
+        :param row: the row, a list (or tuple) of strings, which must not contain commas or newlines.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.buffered.append(row)
+        self.used += self.ROW_OVERHEAD + self.FIELD_OVERHEAD * len(row) + len(','.join(row))
+
+        if self.used >= self.memory:
+            self.runs.append(self.spill(self.buffered))
+            self.buffered = []
+            self.used = 0
+
+            if len(self.runs) >= self.MAX_RUNS:
+                self.runs = [self.spill(self.merge(self.runs))]
+
+    # ****************************************************************************************************
+
+    def rows(self):
+        """
+        Gets every row added, in sorted order. Once started, the sorter is emptied.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: a generator of the rows in sorted order.
+
+        """
+        buffered = self.buffered
+        self.buffered = []
+        self.used = 0
+
+        buffered.sort(key=self.key)
+
+        # Everything fitted in memory.
+        if len(self.runs) == 0:
+            for row in buffered:
+                yield row
+            return
+
+        if len(buffered) > 0:
+            self.runs.append(self.spill(buffered))
+            buffered = []
+
+        for row in self.merge(self.runs):
+            yield row
+
+    # ****************************************************************************************************
+
+    def close(self):
+        """
+        Deletes any runs that have not been merged, i.e. if sorting stopped early.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        N/A
+
+        """
+        for run in self.runs:
+            run.close()
+
+        self.runs = []
+        self.buffered = []
+        self.used = 0
+
+    # ****************************************************************************************************
+
+    def spill(self, rows):
+        """
+        Writes rows to a temporary file as a sorted run. The file is deleted when closed.
+
+        Parameters
+        ----------
+        :param rows: the rows, a list which is sorted in place, or an iterable already in sorted order.
+
+        Returns
+        ----------
+        :return: the run file, positioned at its start.
+
+        """
+        if isinstance(rows, list):
+            rows.sort(key=self.key)
+
+        run = tempfile.TemporaryFile()
+
+        for row in rows:
+            run.write(','.join(row) + '\n')
+
+        run.seek(0)
+        self.spilled += 1
+
+        return run
+
+    # ****************************************************************************************************
+
+    def merge(self, runs):
+        """
+        Merges sorted runs. Ties are broken by run order, then by position in the run,
+        so the merge is stable. Merged runs are closed once exhausted.
+
+        Parameters
+        ----------
+        :param runs: a list of run files, which is emptied.
+
+        Returns
+        ----------
+        :return: a generator of the rows in sorted order.
+
+        """
+        streams = [self.read(number, run) for number, run in enumerate(runs)]
+        del runs[:]
+
+        for key, number, position, row in heapq.merge(*streams):
+            yield row
+
+    # ****************************************************************************************************
+
+    def read(self, number, run):
+        """
+        Reads the rows of a run, decorated for merging.
+
+        Parameters
+        ----------
+        :param number: the run number.
+        :param run: the run file.
+
+        Returns
+        ----------
+        :return: a generator of (key, run number, position, row) tuples.
+
+        """
+        try:
+            for position, line in enumerate(run):
+                row = line.rstrip('\n').split(',')
+                yield self.key(row), number, position, row
+        finally:
+            run.close()
+
+    # ****************************************************************************************************
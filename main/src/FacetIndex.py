@@ -0,0 +1,309 @@
+"""
+**************************************************************************
+
+ FacetIndex.py
+
+**************************************************************************
+ Description:
+
+ Builds facet indexes over the test vector catalogue at page build time,
+ so that the page can filter test vectors by DM, period, S/N, batch, type
+ and EPN pulsar, without scanning every row in the browser.
+
+ Two kinds of index are written, as compact static JSON files:
+
+ Numeric columns (period, DM, S/N) - the rows are sorted by value, and
+ split into buckets of roughly equal size. Each bucket file holds the
+ sorted values and the matching row IDs. The bucket boundaries are listed
+ in the data feed manifest, so a range filter only fetches the buckets
+ that overlap the range, then binary searches within them.
+
+ Categorical columns (batch, type, EPN pulsar) - an inverted list of the
+ row IDs holding each value. The row IDs are sorted and delta encoded, to
+ keep the files small. The lists are sorted by value, and split into
+ shards of about shard_bytes of JSON each, with the first and last value
+ of each shard listed in the data feed manifest. So a value filter only
+ fetches the one shard holding the value, however many values there are.
+
+ Row IDs are the positions of the test vectors in the JSON data feed.
+
+ The values of each numeric column are added to an external merge sort
+ (see ExternalSorter.py) as the catalogue is streamed, so they are spilled
+ to disk once the memory budget is used, rather than held in memory for
+ the whole catalogue. The categorical columns have few distinct values, so
+ their row IDs are held in memory, as compact arrays of integers (4 to 8
+ bytes a row, rather than a Python int and list slot each).
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+from array import array
+
+# For sorting the facet values within a memory budget
+from ExternalSorter import ExternalSorter
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class FacetIndex(object):
+    """
+    Collects the facet values of each test vector as the catalogue is streamed,
+    then writes out the facet index files.
+    """
+
+    # The numeric columns indexed, as (name, index) pairs into the test vector parameters.
+    NUMERIC_COLUMNS = [('period', 3), ('dm', 4), ('snr', 6)]
+
+    # The categorical columns indexed, as (name, index) pairs.
+    CATEGORICAL_COLUMNS = [('batch', 1), ('type', 2), ('pulsar', 7)]
+
+    # ****************************************************************************************************
+
+    def __init__(self, bucket_size=10000, shard_bytes=128 * 1024, memory=128 * 1024 * 1024):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param bucket_size: the number of rows in each numeric facet bucket.
+        :param shard_bytes: the approximate size of each categorical facet shard, in bytes of JSON.
+        :param memory: the memory budget for the numeric facet values, in bytes, shared between
+                       the columns, beyond which they are spilled to disk.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.bucket_size = bucket_size
+        self.shard_bytes = shard_bytes
+
+        column_memory = memory // len(self.NUMERIC_COLUMNS)
+
+        # Sorts the (value, row ID) pairs of each numeric column, by value. As row IDs are
+        # added in ascending order, and the sort is stable, equal values stay in row ID order.
+        self.numeric = dict([(name, ExternalSorter(lambda row: float(row[0]), column_memory))
+                             for name, index in self.NUMERIC_COLUMNS])
+
+        # The row IDs holding each value of each categorical column, in ascending order.
+        self.categorical = dict([(name, {}) for name, index in self.CATEGORICAL_COLUMNS])
+
+    # ****************************************************************************************************
+
+    def add(self, row_id, parameters):
+        """
+        Adds a test vector to the index.
+
+        Parameters
+        ----------
+        :param row_id: the row ID of the test vector.
+        :param parameters: the test vector parameters, see PageBuilder.readTestVectors.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        row_key = str(row_id)
+
+        for name, index in self.NUMERIC_COLUMNS:
+            try:
+                value = float(parameters[index])
+            except ValueError:
+                continue  # Rows without a numeric value can never match a range filter.
+
+            if value == value:  # i.e. not NaN, which neither sorts nor encodes as JSON.
+                self.numeric[name].add((parameters[index], row_key))
+
+        for name, index in self.CATEGORICAL_COLUMNS:
+            value = parameters[index]
+
+            # The EPN profile is <Pulsar>_<Freq>, but users filter by pulsar.
+            if name == 'pulsar':
+                value = value.split('_')[0]
+
+            rows = self.categorical[name].get(value)
+
+            if rows is None:
+                rows = self.categorical[name][value] = array('l')
+
+            rows.append(row_id)
+
+    # ****************************************************************************************************
+
+    def write(self, feed_dir, write_json):
+        """
+        Writes the facet index files to the data feed directory.
+
+        Parameters
+        ----------
+        :param feed_dir: the data feed directory.
+        :param write_json: the function used to write a JSON file, i.e. PageBuilder.writeJson.
+
+        Returns
+        ----------
+        :return: a description of the facets, for the data feed manifest, and the list of
+                 file names written.
+
+        """
+        facets = {'numeric': {}, 'categorical': {}}
+        files = []
+
+        for name, index in self.NUMERIC_COLUMNS:
+
+            buckets = []
+            bucket = []
+
+            try:
+                for row in self.numeric[name].rows():
+                    bucket.append((float(row[0]), int(row[1])))
+
+                    if len(bucket) == self.bucket_size:
+                        self.writeBucket(feed_dir, write_json, name, bucket, buckets, files)
+                        bucket = []
+
+                if len(bucket) > 0:
+                    self.writeBucket(feed_dir, write_json, name, bucket, buckets, files)
+
+            finally:
+                self.numeric[name].close()
+
+            facets['numeric'][name] = buckets
+
+        for name, index in self.CATEGORICAL_COLUMNS:
+
+            shards = []
+            inverted = self.categorical[name]
+
+            # The values and delta encoded row IDs of the shard being filled, and its estimated JSON size.
+            values = []
+            ids = []
+            size = 0
+
+            for value in sorted(inverted):
+                deltas = self.deltaEncode(inverted.pop(value))
+
+                values.append(value)
+                ids.append(deltas)
+
+                # The value and its row IDs, with their quotes, brackets and commas.
+                size += len(value) + 5 + sum([len(str(delta)) + 1 for delta in deltas])
+
+                if size >= self.shard_bytes:
+                    self.writeShard(feed_dir, write_json, name, values, ids, shards, files)
+                    values = []
+                    ids = []
+                    size = 0
+
+            if len(values) > 0:
+                self.writeShard(feed_dir, write_json, name, values, ids, shards, files)
+
+            facets['categorical'][name] = shards
+
+        return facets, files
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def writeBucket(feed_dir, write_json, name, bucket, buckets, files):
+        """
+        Writes a numeric facet bucket, and adds it to the bucket descriptions.
+
+        Parameters
+        ----------
+        :param feed_dir: the data feed directory.
+        :param write_json: the function used to write a JSON file, i.e. PageBuilder.writeJson.
+        :param name: the name of the numeric column.
+        :param bucket: the (value, row ID) tuples in the bucket, in value order.
+        :param buckets: the list of bucket descriptions, to which the bucket is added.
+        :param files: the list of file names written, to which the bucket's file name is added.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        file_name = 'facet_' + name + '_' + str(len(buckets)) + '.json'
+
+        write_json(os.path.join(feed_dir, file_name),
+                   {'values': [value for value, row_id in bucket],
+                    'ids': [row_id for value, row_id in bucket]})
+
+        buckets.append([bucket[0][0], bucket[-1][0], file_name])
+        files.append(file_name)
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def writeShard(feed_dir, write_json, name, values, ids, shards, files):
+        """
+        Writes a categorical facet shard, and adds it to the shard descriptions.
+
+        Parameters
+        ----------
+        :param feed_dir: the data feed directory.
+        :param write_json: the function used to write a JSON file, i.e. PageBuilder.writeJson.
+        :param name: the name of the categorical column.
+        :param values: the sorted values in the shard.
+        :param ids: the delta encoded row IDs holding each value.
+        :param shards: the list of shard descriptions, to which the shard is added.
+        :param files: the list of file names written, to which the shard's file name is added.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        file_name = 'facet_' + name + '_' + str(len(shards)) + '.json'
+
+        write_json(os.path.join(feed_dir, file_name), {'values': values, 'ids': ids})
+
+        shards.append([values[0], values[-1], file_name])
+        files.append(file_name)
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def deltaEncode(row_ids):
+        """
+        Delta encodes a list of row IDs, i.e. [3, 5, 9] becomes [3, 2, 4].
+
+        Parameters
+        ----------
+        :param row_ids: the row IDs, in ascending order.
+
+        Returns
+        ----------
+        :return: the delta encoded list.
+
+        """
+        deltas = []
+        previous = 0
+
+        for row_id in row_ids:
+            deltas.append(row_id - previous)
+            previous = row_id
+
+        return deltas
+
+    # ****************************************************************************************************
@@ -0,0 +1,282 @@
+"""
+**************************************************************************
+
+ HashCache.py
+
+**************************************************************************
+ Description:
+
+ A persistent cache of file content hashes. Computing the MD5 hash of a
+ test vector is expensive, as vectors can be up to 36GB in size. This
+ cache stores hashes on disk, keyed by the identity of the file on disk
+ and its state, i.e.
+
+ (device, inode, size, modification time in nanoseconds)
+
+ If none of these have changed, the file contents are assumed unchanged,
+ and the cached hash is returned without reading the file. As the cache
+ lives in its own directory, it is shared by every test vector database
+ file (and every run of the directory parser) that points at it.
+
+ The cache is bounded in size. When it grows beyond the maximum number of
+ entries, the least recently used entries are evicted.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+import time
+from collections import OrderedDict
+
+# For common operations
+from Common import Common
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class HashCache(object):
+    """
+    An LRU bounded, on disk cache of file hashes. The cache file is a simple
+    CSV file, with one entry per line in the format,
+
+    <Device>,<Inode>,<Size Bytes>,<Mtime ns>,<MD5>,<Last used>
+
+    Entries are held in least to most recently used order.
+    """
+
+    # The name of the cache file inside the cache directory.
+    CACHE_FILE_NAME = 'md5_cache.csv'
+
+    # ****************************************************************************************************
+
+    def __init__(self, cache_dir, max_entries=1000000):
+        """
+        Default constructor. Loads the cache from the cache directory if it exists.
+
+        Parameters
+        ----------
+        :param cache_dir: the directory the cache file is stored in.
+        :param max_entries: the maximum number of hashes to keep in the cache.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.cache_dir = cache_dir
+        self.cache_path = os.path.join(cache_dir, self.CACHE_FILE_NAME)
+        self.max_entries = max_entries
+
+        # Maps keys to [md5, last used time], in least to most recently used order.
+        self.entries = self.load()
+
+        # Counts cache use, for summary output.
+        self.hits = 0
+        self.misses = 0
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def key(path):
+        """
+        Builds the cache key for the file at the specified path.
+
+        Parameters
+        ----------
+        :param path: the full path to the file.
+
+        Returns
+        ----------
+        :return: the (device, inode, size, mtime_ns) tuple describing the file, else None if it cannot be read.
+
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        # Python 2 has no st_mtime_ns, so derive it from the float timestamp.
+        mtime_ns = getattr(stat, 'st_mtime_ns', None)
+        if mtime_ns is None:
+            mtime_ns = int(round(stat.st_mtime * 1e9))
+
+        return stat.st_dev, stat.st_ino, stat.st_size, mtime_ns
+
+    # ****************************************************************************************************
+
+    def get(self, key):
+        """
+        Gets the hash stored for a key, marking it as recently used.
+
+        Parameters
+        ----------
+        :param key: the key built by the key function.
+
+        Returns
+        ----------
+        :return: the cached MD5 hash, else None if the key is not in the cache.
+
+        """
+        if key is None or key not in self.entries:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        # Re-insert to move the entry to the most recently used position.
+        md5_value = self.entries.pop(key)[0]
+        self.entries[key] = [md5_value, time.time()]
+
+        return md5_value
+
+    # ****************************************************************************************************
+
+    def put(self, key, md5_value):
+        """
+        Stores the hash for a key, evicting the least recently used entries if the cache is full.
+
+        Parameters
+        ----------
+        :param key: the key built by the key function.
+        :param md5_value: the MD5 hash of the file.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        if key is None:
+            return
+
+        if key in self.entries:
+            self.entries.pop(key)
+
+        self.entries[key] = [md5_value, time.time()]
+        self.evict(self.entries)
+
+    # ****************************************************************************************************
+
+    def evict(self, entries):
+        """
+        Removes the least recently used entries until the cache is within its size bound.
+
+        Parameters
+        ----------
+        :param entries: the ordered dictionary of cache entries.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    # ****************************************************************************************************
+
+    def load(self):
+        """
+        Loads the cache file.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: an ordered dictionary of the cache entries, empty if there is no cache file.
+
+        """
+        rows = []
+
+        lines = Common.read_file(self.cache_path)
+
+        if lines is not None:
+            for line in lines:
+
+                components = line.strip().split(',')
+
+                if len(components) != 6:
+                    continue
+
+                try:
+                    key = (int(components[0]), int(components[1]), int(components[2]), int(components[3]))
+                    rows.append((float(components[5]), key, components[4]))
+                except ValueError:
+                    print "\t\tIgnoring corrupt hash cache entry: ", line.strip()
+
+        # Order the entries from least to most recently used.
+        rows.sort()
+
+        entries = OrderedDict()
+        for last_used, key, md5_value in rows:
+            entries[key] = [md5_value, last_used]
+
+        return entries
+
+    # ****************************************************************************************************
+
+    def save(self):
+        """
+        Writes the cache to disk. Another process may have updated the cache file since
+        it was loaded (e.g. a parse of a different database), so the entries on disk are
+        merged with those in memory first. The file is written to a temporary path and
+        then renamed, so readers never see a partially written cache.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        N/A
+
+        """
+        if not Common.create_dir(self.cache_dir):
+            print "\t\tUnable to create hash cache directory: ", self.cache_dir
+            return
+
+        merged = self.load()
+
+        for key, value in self.entries.iteritems():
+            if key not in merged or merged[key][1] < value[1]:
+                merged[key] = value
+
+        # Restore least to most recently used order before evicting.
+        merged = OrderedDict(sorted(merged.iteritems(), key=lambda item: item[1][1]))
+        self.evict(merged)
+
+        temp_path = self.cache_path + '.' + str(os.getpid()) + '.tmp'
+
+        with open(temp_path, 'w') as f:
+            for key, value in merged.iteritems():
+                f.write('%d,%d,%d,%d,%s,%r\n' % (key[0], key[1], key[2], key[3], value[0], value[1]))
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(self.cache_path)
+
+        os.rename(temp_path, self.cache_path)
+
+        self.entries = merged
+
+    # ****************************************************************************************************
@@ -39,7 +39,19 @@
 # For general purposes
 import datetime
 from Common import Common
+from FacetIndex import FacetIndex
+from AssetIndex import AssetIndex
+from CatalogueMerger import CatalogueMerger
+from SearchIndex import SearchIndex
+from ThumbnailAtlas import ThumbnailAtlas
+from SitePublisher import SitePublisher
 import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import multiprocessing
 
 
 # ******************************
@@ -122,23 +134,831 @@ class PageBuilder(object):
     We parse the batch file here, and put the information found into the test vector
     page HTML.
 
+    Output Formats
+    ------------------
+    Three output formats are supported. The first (1) embeds every test vector in the
+    page as a HTML table row, which the dynatable plugin then makes interactive. This
+    is simple, but browsers stall when the catalogue is large. The second (2) writes
+    the catalogue as a chunked JSON data feed next to a lightweight page. The page
+    fetches the chunks only as they are needed, and renders only the visible rows
+    (see table/feed.js). So the page load time stays flat as the catalogue grows.
+    The third (3) splits the catalogue into one page per batch, and one page per EPN
+    pulsar, linked to from a small index page. As users usually browse a single batch
+    or pulsar, each page they load stays small.
+    """
+
+    # The script making the HTML table (output format 1) interactive.
+    TABLE_SCRIPT = '''<script type="text/javascript">
+            $('#spec_table').dynatable();
+        </script>'''
+
+    # The script rendering the JSON data feed (output format 2), where
+    # @FEED_DIR@ is replaced by the feed directory name.
+    FEED_SCRIPT = '''<script type="text/javascript" src="table/feed.js"></script>
+        <script type="text/javascript">
+            new TestVectorFeed('#spec_table', '@FEED_DIR@').start();
+        </script>'''
+
+    # The onclick handler of a batch link, where @BATCH@ is replaced by the batch number.
+    # The popup content is only fetched when a link is clicked, see popup/batches.js.
+    BATCH_LINK = "return TestVectorBatches.show('@BATCH@');"
+
+    # The single popup that shows batch descriptions, followed by the script that fetches
+    # them, where @BATCH_FILE@ is replaced by the name of the batch description file.
+    BATCH_POPUP = '''
+<div id="batch_pop" class="well" style="display:none">
+\t\t<h4></h4>
+<pre class="prettyprint"><code></code></pre>
+<button onclick="$('#batch_pop').popup('hide');" class="fade_close btn btn-default"> Close </button>
+</div>
+<script type="text/javascript" src="popup/batches.js"></script>
+<script type="text/javascript">
+\tTestVectorBatches.init('@BATCH_FILE@');
+</script>
+'''
+
+    # The script loading profile thumbnails as their rows scroll into view, added
+    # to the HTML table when thumbnails come from the sprite atlases.
+    LAZY_SCRIPT = '''
+        <script type="text/javascript" src="table/lazy.js"></script>
+        <script type="text/javascript">
+            LazyThumbnails.watch('#spec_table');
+        </script>'''
+
+    # The database columns written to the JSON data feed, as (name, index) pairs.
+    # The parent directory is omitted, as it is implied by the path.
+    FEED_COLUMNS = [('filename', 0), ('batch', 1), ('type', 2), ('period', 3), ('dm', 4), ('z', 5),
+                    ('snr', 6), ('epn', 7), ('freq', 8), ('path', 9), ('size_bits', 11), ('size_gb', 12),
+                    ('md5', 13)]
+
+    # ****************************************************************************************************
+
+    def __init__(self, chunk_size=1000, cache_dir=None, workers=None, sprites=False, sparklines=False,
+                 stats=False, merge_by='filename', sort_by=None, memory=256, library=None):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param chunk_size: the number of test vectors in each chunk of the JSON data feed.
+        :param cache_dir: an optional directory to cache sparklines in, so rebuilds only render changed profiles.
+        :param workers: the number of processes used to render split pages, by default one per CPU.
+        :param sprites: if True, profile thumbnails are packed into sprite atlases and lazy loaded.
+        :param sparklines: if True, profiles are embedded as inline SVG sparklines, instead of images.
+        :param stats: if True, a catalogue statistics section is added to the page.
+        :param merge_by: the column several database files are merged by, see CatalogueMerger.
+        :param sort_by: an optional column to sort the test vectors by, see CatalogueMerger.sort.
+        :param memory: the memory budget of the sort in MB, beyond which sorted runs are spilled to disk.
+        :param library: an optional profile library file to read profiles from, see ProfileLibrary.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.chunk_size = chunk_size
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.sprites = sprites
+
+        self.sparklines = sparklines
+
+        # The profile thumbnail atlases, when sprites are enabled and built.
+        self.atlas = None
+
+        # The profile sparkline renderer, when sparklines are enabled.
+        self.sparkline = None
+
+        self.stats = stats
+
+        # The catalogue statistics, when statistics are enabled.
+        self.statistics = None
+
+        self.merge_by = merge_by
+        self.sort_by = sort_by
+        self.memory = memory
+
+        # The catalogue merger, when several database files are read.
+        self.merger = None
+
+        # The index of the profile images, profile data and batch files available.
+        self.assets = None
+
+        self.library_path = library
+
+        # The profile library, when one is given and can be read.
+        self.library = None
+
+    # ****************************************************************************************************
+
+    def build(self, input_file, output_file, output_format, asc_dir, batch_dir):
+        """
+        Reads the test vector database file (or files), and builds the HTML page describing
+        the test vectors it contains.
+
+        The page is streamed to disk. Each table row is rendered and written as soon as
+        it is read from the database file, so memory use does not grow with the number
+        of test vectors. The page is written to a temporary file in the same directory
+        as the output file, which is only renamed into place once complete. So a failed
+        build never leaves a partially written page behind.
+
+        Parameters
+        ----------
+        :param input_file: the test vector database file to be parsed, or a list of database
+                           files, which are merged into a single catalogue (see readCatalogues).
+        :param output_file: the output path to record information to (i.e. index.html).
+        :param output_format: the output format, i.e. CSV or JSON.
+        :param asc_dir: path to the directory containing .asc files and their PNGs.
+        :param batch_dir: path to the directory containing text files describing batches.
+
+        Returns
+        ----------
+        :return: True if the page was built, else False.
+
+        """
+
+        # Several database files may be given, i.e. one per storage server.
+        if isinstance(input_file, basestring):
+            input_files = [input_file]
+        else:
+            input_files = list(input_file)
+
+        if len(input_files) > 0 and all([Common.file_exists(path) for path in input_files]):
+
+            for path in input_files:
+                print "\t\tReading: ", path
+
+            # Used to measure processing time.
+            start = datetime.datetime.now()
+
+            # Load any available batch information from the files in
+            # the batch directory.
+            batch_info = self.processBatchDirectory(batch_dir)
+
+            if self.library_path is not None:
+                if self.openLibrary():
+                    print "\t\tProfiles in the library: ", str(len(self.library.keys()))
+                else:
+                    print "\t\tReading profiles from the .asc directory instead"
+
+            # The thumbnails are packed as the rows reference them, then plotted once the page is written.
+            if self.sprites:
+                atlas = ThumbnailAtlas(asc_dir, library=self.library)
+                if atlas.open():
+                    self.atlas = atlas
+                else:
+                    print "\t\tUsing full size profile images instead of thumbnails"
+
+            if self.sparklines and not self.openSparklines():
+                print "\t\tUsing profile images instead of sparklines"
+
+            test_vectors = self.readCatalogues(input_files)
+
+            # The sparklines of the rows are drawn in batches, as the rows are read.
+            if self.sparkline is not None:
+                test_vectors = self.batchSparklines(test_vectors, asc_dir)
+
+            # The assets each row references are checked as the rows are read, against a
+            # single listing of the asc directory. Rows showing a sparkline or thumbnail do
+            # not reference the profile image.
+            substitutes = []
+            if self.sparkline is not None:
+                substitutes.append(lambda epn: self.sparklineFor(asc_dir, epn) is not None)
+            if self.atlas is not None:
+                substitutes.append(lambda epn: self.atlas.find(epn) is not None)
+
+            self.assets = AssetIndex(asc_dir, batch_info, self.library, substitutes)
+            test_vectors = self.assets.track(test_vectors)
+
+            # Statistics are gathered as the rows are read, so the catalogue is only read once.
+            if self.stats and self.openStatistics():
+                test_vectors = self.statistics.track(test_vectors)
+
+            if output_format == 2:
+                entriesProcessed = self.writeFeed(output_file, test_vectors, asc_dir, batch_info)
+            elif output_format == 3:
+                entriesProcessed = self.writeSplitPages(output_file, test_vectors, asc_dir, batch_info)
+            else:
+                referenced = set()
+                rows = self.renderRows(test_vectors, asc_dir, batch_info, referenced)
+                entriesProcessed = self.writePage(output_file, rows, batch_info, referenced=referenced)
+
+            if entriesProcessed is None:
+                return False
+            elif entriesProcessed == 0:
+                print '\t\tTest vector database file empty!'
+                return False
+
+            if self.atlas is not None and not self.atlas.save():
+                print '\t\tUnable to build the thumbnail atlases'
+                return False
+
+            missing = self.assets.writeReport(output_file)
+            if missing > 0:
+                print "\t\tMissing assets (see the missing asset report): ", str(missing)
+
+            if self.merger is not None:
+                print "\t\tTest vectors merged: ", str(self.merger.merged)
+                print "\t\tDuplicate test vectors removed: ", str(self.merger.duplicates)
+
+                if len(self.merger.sorters) > 0:
+                    spilled = sum([sorter.spilled for sorter in self.merger.sorters])
+                    print "\t\tSorted runs spilled to disk: ", str(spilled)
+
+            if self.sparkline is not None:
+                self.sparkline.save()
+                print "\t\tSparklines rendered: ", str(self.sparkline.misses)
+                print "\t\tSparklines from the cache: ", str(self.sparkline.hits)
+
+            # Finally get the time that the procedure finished.
+            end = datetime.datetime.now()
+
+            print "Completed file search."
+            print "Entries processed:", str(entriesProcessed)
+            print "Execution time: ", str(end - start)
+            print "Done parsing directory"
+
+            return True
+
+        else:
+            print "No valid directory supplied"
+            return False
+
+    # ****************************************************************************************************
+
+    def publish(self, output_file, level=9):
+        """
+        Prepares a built page for serving, i.e. minifies it (and any split pages), fingerprints
+        the assets it references, and writes precompressed siblings. See SitePublisher.
+
+        Parameters
+        ----------
+        :param output_file: the output path the page was written to (i.e. index.html).
+        :param level: the compression level, 1 (fastest) to 9 (smallest).
+
+        Returns
+        ----------
+        :return: True if the page was published, else False.
+
+        """
+
+        print "\t\tPublishing: ", output_file
+
+        return SitePublisher(level, self.workers).publish(output_file)
+
+    # ****************************************************************************************************
+
+    def readCatalogues(self, input_files):
+        """
+        Reads one or more test vector database files as a single catalogue. Several files
+        are combined by a streaming merge, sorted by the merge column, with duplicate test
+        vectors (i.e. the same file name and MD5 hash) removed. Each file is first checked,
+        and files not sorted by the merge column are sorted by an external merge sort, with
+        the memory budget shared between them. See CatalogueMerger.
+
+        If a sort column is set, the files may be in any order. They are instead sorted by
+        an external merge sort within the memory budget, then merged in the same way.
+
+        Parameters
+        ----------
+        :param input_files: a list of test vector database files.
+
+        Returns
+        ----------
+        :return: a generator of test vector parameter lists, see readTestVectors. A ValueError
+                 is raised if a file changes from sorted to unsorted while it is merged.
+
+        """
+        memory = self.memory * 1024 * 1024
+
+        if self.sort_by is not None:
+            self.merger = CatalogueMerger(self.sort_by)
+            return self.merger.sort([(path, self.readTestVectors(path)) for path in input_files], memory)
+
+        if len(input_files) == 1:
+            return self.readTestVectors(input_files[0])
+
+        self.merger = CatalogueMerger(self.merge_by)
+
+        unsorted = [path for path in input_files if not self.merger.isSorted(self.readTestVectors(path))]
+
+        catalogues = []
+        for path in input_files:
+            if path in unsorted:
+                print '\t\tSorting by ', self.merge_by, ' before merging: ', path
+                catalogues.append((path, self.merger.sortCatalogue(self.readTestVectors(path),
+                                                                   memory // len(unsorted))))
+            else:
+                catalogues.append((path, self.readTestVectors(path)))
+
+        return self.merger.merge(catalogues)
+
+    # ****************************************************************************************************
+
+    def readTestVectors(self, input_file):
+        """
+        Reads the test vector database file one line at a time, yielding the parameters
+        of each test vector. The parameters are returned as a list, with the items at the
+        following index positions:
+
+        0  = <Filename>
+        1  = <Batch>
+        2  = <Type>
+        3  = <Period (ms)>
+        4  = <DM>
+        5  = <Z>
+        6  = <S/N>
+        7  = <EPN Pulsar>
+        8  = <Frequency>
+        9  = <Path>
+        10 = <Parent Dir>
+        11 = <Size Bits>
+        12 = <Size GB>
+        13 = <MD5>
+
+        Parameters
+        ----------
+        :param input_file: the test vector database file to be parsed.
+
+        Returns
+        ----------
+        :return: a generator of test vector parameter lists. A ValueError is raised
+                 if a line does not have the expected structure.
+
+        """
+
+        with open(input_file) as f:
+            for test_vector in f:
+
+                # The final column is the MD5 hash, which never contains whitespace.
+                parameters = test_vector.rstrip('\r\n').split(',')
+
+                # Now we check there are the correct number of parameters...
+                if len(parameters) != 14:
+                    print '\t\tFile has incorrect number of parameters (length', len(parameters), ')'
+                    raise ValueError('Invalid test vector database entry: ' + test_vector)
+
+                yield parameters
+
+    # ****************************************************************************************************
+
+    def renderRows(self, test_vectors, asc_dir, batch_info, referenced=None):
+        """
+        Renders each test vector as a HTML table row.
+
+        Parameters
+        ----------
+        :param test_vectors: an iterable of test vector parameter lists, see readTestVectors.
+        :param asc_dir: path to the directory containing .asc files and their PNGs.
+        :param batch_info: a dictionary of batch information.
+        :param referenced: an optional set, to which the keys of the batches the rows link to are added.
+
+        Returns
+        ----------
+        :return: a generator of HTML table row strings.
+
+        """
+
+        for parameters in test_vectors:
+
+            if referenced is not None and batch_info is not None:
+                batch_key = 'Batch_' + parameters[1] + '.txt'
+                if batch_key in batch_info:
+                    referenced.add(batch_key)
+
+            yield self.createTableData(parameters, asc_dir, batch_info)
+
+    # ****************************************************************************************************
+
+    def openSparklines(self):
+        """
+        Opens the profile sparkline renderer, cached in the cache directory (if there is one).
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: True if sparklines can be rendered, else False if Numpy is unavailable.
+
+        """
+
+        # Numpy is only needed when sparklines are enabled.
+        try:
+            from ProfileSparkline import ProfileSparkline
+        except ImportError as e:
+            print "\t\tNumpy is required to render sparklines: ", e
+            return False
+
+        cache_path = None
+        if self.cache_dir is not None and Common.create_dir(self.cache_dir):
+            cache_path = os.path.join(self.cache_dir, 'sparklines.json')
+
+        self.sparkline = ProfileSparkline(cache_path=cache_path, library=self.library)
+
+        return True
+
+    # ****************************************************************************************************
+
+    def openLibrary(self):
+        """
+        Opens the profile library, which maps its data into memory.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: True if the library was opened, else False if it, or Numpy, is unavailable.
+
+        """
+
+        # Numpy is only needed when a library is used.
+        try:
+            from ProfileLibrary import ProfileLibrary
+        except ImportError as e:
+            print "\t\tNumpy is required to read a profile library: ", e
+            return False
+
+        try:
+            self.library = ProfileLibrary(self.library_path)
+        except (IOError, ValueError) as e:
+            print "\t\tUnable to read the profile library: ", e
+            return False
+
+        return True
+
+    # ****************************************************************************************************
+
+    def openStatistics(self):
+        """
+        Opens the catalogue statistics, which the test vectors are added to as they are read.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: True if statistics can be computed, else False if Numpy is unavailable.
+
+        """
+
+        # Numpy is only needed when statistics are enabled.
+        try:
+            from CatalogueStatistics import CatalogueStatistics
+        except ImportError as e:
+            print "\t\tNumpy is required to compute catalogue statistics: ", e
+            return False
+
+        self.statistics = CatalogueStatistics()
+
+        return True
+
+    # ****************************************************************************************************
+
+    def renderStatistics(self):
+        """
+        Renders the catalogue statistics section, once every test vector has been read.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: the HTML string, which is empty if statistics are not enabled.
+
+        """
+        if self.statistics is None:
+            return ''
+
+        return self.statistics.render()
+
+    # ****************************************************************************************************
+
+    def imageFor(self, asc_dir, epn):
+        """
+        Gets the image of a profile, or a placeholder image if it is missing from the asset index.
+
+        Parameters
+        ----------
+        :param asc_dir: path to the directory containing .asc files and their PNGs.
+        :param epn: the EPN profile name, i.e. <Pulsar>_<Freq>.
+
+        Returns
+        ----------
+        :return: the image path.
+
+        """
+        if self.assets is None:
+            return asc_dir + "/" + epn + '.png'
+
+        return self.assets.imageFor(epn)
+
+    # ****************************************************************************************************
+
+    def sparklineFor(self, asc_dir, epn):
+        """
+        Gets the sparkline of a profile, if sparklines are enabled.
+
+        Parameters
+        ----------
+        :param asc_dir: path to the directory containing .asc files.
+        :param epn: the EPN profile name, i.e. <Pulsar>_<Freq>.
+
+        Returns
+        ----------
+        :return: the sparkline's SVG path data, else None.
+
+        """
+
+        if self.sparkline is None:
+            return None
+
+        return self.sparkline.find(os.path.join(asc_dir, epn + '.asc'))
+
+    # ****************************************************************************************************
+
+    def batchSparklines(self, test_vectors, asc_dir):
+        """
+        Draws the sparklines of the test vectors' profiles BATCH_SIZE rows at a time, so the
+        profiles not already cached are drawn together (see ProfileSparkline.findAll), before
+        the rows are rendered.
+
+        Parameters
+        ----------
+        :param test_vectors: an iterable of test vector parameter lists, see readTestVectors.
+        :param asc_dir: path to the directory containing .asc files.
+
+        Returns
+        ----------
+        :return: a generator of the same test vector parameter lists.
+
+        """
+        rows = []
+
+        for parameters in test_vectors:
+            rows.append(parameters)
+
+            if len(rows) == self.sparkline.BATCH_SIZE:
+                self.sparkline.findAll([os.path.join(asc_dir, row[7] + '.asc') for row in rows])
+
+                for row in rows:
+                    yield row
+
+                rows = []
+
+        self.sparkline.findAll([os.path.join(asc_dir, row[7] + '.asc') for row in rows])
+
+        for row in rows:
+            yield row
+
+    # ****************************************************************************************************
+
+    def writePage(self, output_file, rows, batch_info, table_script=None, total=None, referenced=None,
+                  batch_file=None):
+        """
+        Writes the complete HTML page, i.e. the top HTML fragment, the table rows, then
+        the remaining fragments and the batch popup.
+
+        The top of the page reports the total number of test vectors, which is only known
+        once every row has been rendered. So the rows are first streamed to an anonymous
+        spool file, then the page is assembled by writing the top fragment (with the total
+        filled in), and copying the spooled rows after it. This avoids holding the page in
+        memory, and avoids a replace over the full document.
+
+        Parameters
+        ----------
+        :param output_file: the output path to write the page to (i.e. index.html).
+        :param rows: an iterable of HTML table row strings.
+        :param batch_info: a dictionary of batch information.
+        :param table_script: the script that makes the table interactive, by default TABLE_SCRIPT.
+        :param total: the total number of test vectors, if not the number of rows.
+        :param referenced: the keys of the batches the rows link to, by default every batch. Only
+                           these batches are written to the batch description file.
+        :param batch_file: the batch description file, if already written, see writeBatchFile.
+
+        Returns
+        ----------
+        :return: the number of rows written, else None if the page could not be built.
+
+        """
+
+        entriesProcessed = 0
+
+        spool = tempfile.TemporaryFile()
+
+        try:
+            for table_data in rows:
+                spool.write(table_data)
+                entriesProcessed += 1
+
+        except ValueError:
+            print '\t\tUnable to build HTML table - invalid test vector database file'
+            spool.close()
+            return None
+
+        if total is None:
+            total = entriesProcessed
+
+        # Written once the rows are rendered, when the batches they link to are known.
+        if batch_file is None:
+            batch_file = self.writeBatchFile(output_file, batch_info, referenced)
+
+        if table_script is None:
+            table_script = self.TABLE_SCRIPT
+
+            if self.atlas is not None:
+                table_script += self.LAZY_SCRIPT
+
+        # Now merge the HTML file components. This is a simple fudge, allowing
+        # the page to be updated at certain keyword locations.
+        top = Common.read_file_as_string('html_fragments/top.html').replace('@TOTAL@', str(total))
+        middle = Common.read_file_as_string('html_fragments/middle.html').replace('@TABLE_SCRIPT@', table_script)
+        middle = middle.replace('@STATISTICS@', self.renderStatistics())
+
+        # Add bottom of HTML file.
+        bottom = Common.read_file_as_string('html_fragments/bottom.html')
+
+        temp_path = self.tempPath(output_file)
+
+        with open(temp_path, 'w') as f:
+            f.write(top)
+
+            spool.seek(0)
+            shutil.copyfileobj(spool, f)
+            spool.close()
 
-    """
+            f.write(middle)
+            f.write(self.renderBatchPopup(batch_file))
+            f.write(bottom)
+
+        self.replaceFile(temp_path, output_file)
+
+        return entriesProcessed
 
     # ****************************************************************************************************
 
-    def build(self, input_file, output_file, output_format, asc_dir, batch_dir):
+    def writeFeed(self, output_file, test_vectors, asc_dir, batch_info):
         """
-        Reads the target directory, and records the files found which
-        have the specified file extension.
+        Writes the catalogue as a chunked JSON data feed, plus the lightweight page
+        that renders it. The feed is written to a directory next to the page, named
+        after it, e.g. index.html gets the feed directory index_data. It contains,
+
+        manifest.json   - describes the feed, i.e. the total number of test vectors,
+                          the chunk files and the columns in each row.
+        chunk_<n>.json  - a compact JSON array of up to chunk_size rows, where each
+                          row is an array of the FEED_COLUMNS values.
+        facet_*.json    - the facet indexes used to filter the feed, see FacetIndex.
+        search_<n>.json - the search index shards, see SearchIndex.
 
         Parameters
         ----------
-        :param input_file: the test vector database file to be parsed.
-        :param output_file: the output path to record information to (i.e. index.html).
-        :param output_format: the output format, i.e. CSV or JSON.
+        :param output_file: the output path to write the page to (i.e. index.html).
+        :param test_vectors: an iterable of test vector parameter lists, see readTestVectors.
         :param asc_dir: path to the directory containing .asc files and their PNGs.
-        :param batch_dir: path to the directory containing text files describing batches.
+        :param batch_info: a dictionary of batch information.
+
+        Returns
+        ----------
+        :return: the number of test vectors written, else None if the feed could not be built.
+
+        """
+
+        feed_name = os.path.splitext(os.path.basename(output_file))[0] + '_data'
+        feed_dir = os.path.join(os.path.dirname(os.path.abspath(output_file)), feed_name)
+
+        if not Common.create_dir(feed_dir):
+            print '\t\tUnable to create the data feed directory: ', feed_dir
+            return None
+
+        total = 0
+        chunks = []
+        chunk = []
+
+        # The facet and search indexes share the memory budget, beyond which they are spilled to disk.
+        memory = self.memory * 1024 * 1024
+        facet_index = FacetIndex(memory=memory // 2)
+        search_index = SearchIndex(memory=memory // 2)
+        sparklines = {}
+        referenced = set()
+
+        try:
+            for parameters in test_vectors:
+
+                chunk.append([parameters[index] for name, index in self.FEED_COLUMNS])
+                facet_index.add(total, parameters)
+                search_index.add(total, parameters)
+
+                batch_key = 'Batch_' + parameters[1] + '.txt'
+                if batch_info is not None and batch_key in batch_info:
+                    referenced.add(batch_key)
+
+                if self.sparkline is not None and parameters[7] not in sparklines:
+                    sparklines[parameters[7]] = self.sparklineFor(asc_dir, parameters[7])
+
+                # The feed reads the thumbnail coordinates from the atlas map, so the thumbnail only needs packing.
+                if self.atlas is not None:
+                    self.atlas.find(parameters[7])
+
+                total += 1
+
+                if len(chunk) == self.chunk_size:
+                    chunks.append(self.writeFeedChunk(feed_dir, len(chunks), chunk))
+                    chunk = []
+
+            if len(chunk) > 0:
+                chunks.append(self.writeFeedChunk(feed_dir, len(chunks), chunk))
+
+        except ValueError:
+            print '\t\tUnable to build data feed - invalid test vector database file'
+            return None
+
+        if total == 0:
+            return 0
+
+        facets, facet_files = facet_index.write(feed_dir, self.writeJson)
+        search, search_files = search_index.write(feed_dir, self.writeJson)
+
+        # Remove chunks and index files left over from a previous, larger, catalogue.
+        current = set(chunks + facet_files + search_files)
+        for file_name in os.listdir(feed_dir):
+            if file_name.startswith(('chunk_', 'facet_', 'search_')) and file_name not in current:
+                Common.delete_file(os.path.join(feed_dir, file_name))
+
+        # The batches with popups, so rows can link to them.
+        batches = sorted([key.replace('Batch_', '').replace('.txt', '') for key in referenced])
+
+        manifest = {'total': total,
+                    'chunk_size': self.chunk_size,
+                    'chunks': chunks,
+                    'columns': [name for name, index in self.FEED_COLUMNS],
+                    'asc_dir': asc_dir,
+                    'batches': batches,
+                    'facets': facets,
+                    'search': search}
+
+        if self.atlas is not None:
+            manifest['sprites'] = self.atlas.asc_dir + '/atlas/atlas.json'
+
+        # Profiles without an image show the placeholder image instead.
+        if self.assets is not None:
+            manifest['placeholder'] = AssetIndex.PLACEHOLDER
+            manifest['missing'] = self.assets.missingImages()
+
+        if self.sparkline is not None:
+            self.writeJson(os.path.join(feed_dir, 'sparklines.json'),
+                           {'points': self.sparkline.points, 'width': self.sparkline.width,
+                            'height': self.sparkline.height,
+                            'paths': dict([(epn, path) for epn, path in sparklines.iteritems() if path is not None])})
+            manifest['sparklines'] = 'sparklines.json'
+
+        # The manifest is written last, so the page never sees a partially written feed.
+        self.writeJson(os.path.join(feed_dir, 'manifest.json'), manifest)
+
+        table_script = self.FEED_SCRIPT.replace('@FEED_DIR@', feed_name)
+        self.writePage(output_file, [], batch_info, table_script, total, referenced)
+
+        print '\t\tData feed chunks written: ', len(chunks)
+
+        return total
+
+    # ****************************************************************************************************
+
+    def writeFeedChunk(self, feed_dir, number, rows):
+        """
+        Writes a single chunk of the JSON data feed.
+
+        Parameters
+        ----------
+        :param feed_dir: the data feed directory.
+        :param number: the chunk number.
+        :param rows: the rows in the chunk.
+
+        Returns
+        ----------
+        :return: the chunk file name.
+
+        """
+
+        file_name = 'chunk_' + str(number) + '.json'
+        self.writeJson(os.path.join(feed_dir, file_name), rows)
+
+        return file_name
+
+    # ****************************************************************************************************
+
+    def writeJson(self, path, data):
+        """
+        Writes data to a compact JSON file, via a temporary file renamed into place.
+
+        Parameters
+        ----------
+        :param path: the path of the JSON file.
+        :param data: the data to write.
 
         Returns
         ----------
@@ -146,125 +966,375 @@ class PageBuilder(object):
 
         """
 
-        # Counts the test vector entries read from the test vector
-        # database (CSV) file.
-        entriesProcessed = 0
+        temp_path = self.tempPath(path)
 
-        if Common.file_exists(input_file):
+        # json.dumps encodes in C, whereas json.dump always encodes in Python, and is
+        # many times slower for the large feed and index files.
+        with open(temp_path, 'w') as f:
+            f.write(json.dumps(data, separators=(',', ':')))
 
-            print "\t\tReading: ", input_file
+        self.replaceFile(temp_path, path)
 
-            # Used to measure processing time.
-            start = datetime.datetime.now()
+    # ****************************************************************************************************
 
-            # Load any available batch information from the files in
-            # the batch directory.
-            batch_info = self.processBatchDirectory(batch_dir)
+    def writeSplitPages(self, output_file, test_vectors, asc_dir, batch_info):
+        """
+        Writes one page per batch and one page per EPN pulsar, plus an index page (at the
+        output path) linking to them. The pages are written alongside the index page,
+        named <index>_batch_<Batch>.html and <index>_pulsar_<Pulsar>.html, so that the
+        relative paths to the page assets remain valid.
 
-            # read the input file
-            entries = Common.read_file(input_file)
+        The test vectors are read once. Each row is spooled to a partition file for each
+        page it appears on, while a hash of each page's inputs is computed. Only pages
+        whose inputs have changed since the last build (as recorded in <index>_pages.json)
+        are rendered, in parallel, by a pool of processes.
 
-            if entries is None:
-                print '\t\tTest vector database file empty!'
-                return False
+        Parameters
+        ----------
+        :param output_file: the output path to write the index page to (i.e. index.html).
+        :param test_vectors: an iterable of test vector parameter lists, see readTestVectors.
+        :param asc_dir: path to the directory containing .asc files and their PNGs.
+        :param batch_info: a dictionary of batch information.
+
+        Returns
+        ----------
+        :return: the number of test vectors written, else None if the pages could not be built.
+
+        """
+
+        stem = os.path.splitext(os.path.basename(output_file))[0]
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+
+        if batch_info is None:
+            batch_info = {}
+
+        # The HTML fragments are inputs to every page.
+        templates = hashlib.md5(asc_dir)
+        for fragment in ['top.html', 'middle.html', 'bottom.html']:
+            templates.update(Common.read_file_as_string('html_fragments/' + fragment) or '')
+        templates.update(self.BATCH_LINK + self.BATCH_POPUP)
+
+        # Maps each page file name to its [input hash, row count, batches referenced, link label].
+        pages = {}
+        total = 0
+
+        spool_dir = tempfile.mkdtemp(prefix=stem + '_pages_')
+        spool_files = {}
+
+        try:
+            try:
+                for parameters in test_vectors:
+
+                    total += 1
+                    line = ','.join(parameters) + '\n'
+
+                    # A row's sparkline changes with its profile's content, its thumbnail with its
+                    # atlas slot, and its image with whether the profile image exists, not its CSV fields.
+                    sparkline = self.sparklineFor(asc_dir, parameters[7]) or ''
+                    sparkline += self.imageFor(asc_dir, parameters[7])
+
+                    if self.atlas is not None:
+                        sparkline += str(self.atlas.find(parameters[7]))
+
+                    for page_name, label in self.splitPageNames(stem, parameters):
+
+                        if page_name not in pages:
+                            pages[page_name] = [templates.copy(), 0, set(), label]
+
+                        page = pages[page_name]
+                        page[0].update(line)
+                        page[0].update(sparkline)
+                        page[1] += 1
+                        page[2].add('Batch_' + parameters[1] + '.txt')
+
+                        self.spoolLine(spool_dir, spool_files, page_name, line)
+
+            except ValueError:
+                print '\t\tUnable to build pages - invalid test vector database file'
+                return None
+
+            for f in spool_files.values():
+                f.close()
+
+            if total == 0:
+                return 0
+
+            # Work out which pages have changed since the last build.
+            manifest_path = os.path.join(output_dir, stem + '_pages.json')
+            previous = {}
+            if Common.file_exists(manifest_path):
+                previous = json.loads(Common.read_file_as_string(manifest_path) or '{}')
+
+            manifest = {}
+            tasks = []
+
+            # All the pages share one batch description file, holding the batches any page links to.
+            referenced = set()
+            for page_hash, count, batches, label in pages.values():
+                referenced.update(batches)
+
+            batch_file = self.writeBatchFile(output_file, batch_info, referenced)
+
+            for page_name, (page_hash, count, batches, label) in pages.iteritems():
+
+                # Each page only links to the batches it references.
+                page_batches = dict([(key, batch_info[key]) for key in batches if key in batch_info])
+                for key in sorted(page_batches.keys()):
+                    page_hash.update(page_batches[key])
+
+                manifest[page_name] = page_hash.hexdigest()
+                page_path = os.path.join(output_dir, page_name)
+
+                if previous.get(page_name) != manifest[page_name] or not Common.file_exists(page_path):
+                    tasks.append((page_path, os.path.join(spool_dir, page_name + '.csv'), asc_dir, page_batches,
+                                  self.atlas is not None, self.sparkline is not None, self.cache_dir, batch_file,
+                                  self.library.library_path if self.library is not None else None))
+
+            print '\t\tPages found: ', str(len(pages))
+            print '\t\tPages changed: ', str(len(tasks))
+
+            # The pages are rendered using the sparklines computed, and the thumbnails packed, above.
+            if self.sparkline is not None:
+                self.sparkline.save()
+
+            if self.atlas is not None and not self.atlas.save():
+                print '\t\tUnable to build the thumbnail atlases'
+                return None
+
+            if len(tasks) > 0:
+                # Each process is given the profile images found, rather than listing the asc directory.
+                pool = multiprocessing.Pool(self.workers, initSplitWorker, (self.assets.images,))
+                try:
+                    results = pool.map(renderSplitPage, tasks)
+                finally:
+                    pool.close()
+                    pool.join()
+
+                if None in results:
+                    print '\t\tUnable to build one or more pages'
+                    return None
+
+        finally:
+            for f in spool_files.values():
+                f.close()
+            shutil.rmtree(spool_dir, True)
+
+        # Remove the pages of batches or pulsars no longer in the catalogue.
+        for page_name in previous:
+            if page_name not in manifest:
+                Common.delete_file(os.path.join(output_dir, page_name))
+
+        self.writeSplitIndex(output_file, pages, total)
+        self.writeJson(manifest_path, manifest)
+
+        return total
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def splitPageNames(stem, parameters):
+        """
+        Gets the names of the split pages a test vector appears on.
+
+        Parameters
+        ----------
+        :param stem: the index page file name, without its extension.
+        :param parameters: the test vector parameters, see readTestVectors.
+
+        Returns
+        ----------
+        :return: a list of (page file name, link label) tuples.
+
+        """
+
+        # The EPN profile name is <Pulsar>_<Freq>, or <Pulsar>_<Freq>_<Number>.
+        batch = parameters[1]
+        pulsar = parameters[7].split('_')[0]
+
+        return [(stem + '_batch_' + re.sub(r'[^\w+.-]', '_', batch) + '.html', 'Batch ' + batch),
+                (stem + '_pulsar_' + re.sub(r'[^\w+.-]', '_', pulsar) + '.html', pulsar)]
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def spoolLine(spool_dir, spool_files, page_name, line):
+        """
+        Appends a database line to the partition file of a split page. Open files are
+        kept for reuse, but closed once too many are open at once.
+
+        Parameters
+        ----------
+        :param spool_dir: the directory holding the partition files.
+        :param spool_files: a dictionary of the open partition files.
+        :param page_name: the split page file name.
+        :param line: the database line.
+
+        Returns
+        ----------
+        N/A
+
+        """
+
+        f = spool_files.get(page_name)
+
+        if f is None:
+            if len(spool_files) >= 256:
+                for open_file in spool_files.values():
+                    open_file.close()
+                spool_files.clear()
+
+            f = open(os.path.join(spool_dir, page_name + '.csv'), 'a')
+            spool_files[page_name] = f
+
+        f.write(line)
+
+    # ****************************************************************************************************
+
+    def writeSplitIndex(self, output_file, pages, total):
+        """
+        Writes the index page linking to the split pages.
+
+        Parameters
+        ----------
+        :param output_file: the output path to write the index page to (i.e. index.html).
+        :param pages: a dictionary mapping page file names to [hash, row count, batches, label].
+        :param total: the total number of test vectors.
+
+        Returns
+        ----------
+        N/A
+
+        """
+
+        batch_links = []
+        pulsar_links = []
+
+        for page_name in sorted(pages.keys()):
+
+            count, label = pages[page_name][1], pages[page_name][3]
+            link = '        <li><a href="' + page_name + '">' + label + '</a> (' + str(count) + ')</li>'
+
+            if '_batch_' in page_name:
+                batch_links.append(link)
             else:
-                # Now check there is at least 1 entry.
-                if len(entries) <= 0:
-                    print '\t\tTest vector database file empty!'
-                    return False
-                else:
-                    # There must be some data available. The next part attempts
-                    # to iterate over each line in the database file, and build
-                    # a HTML table <td></td> item from it. This information can
-                    # then be simply copied in to a HTML file.
-
-                    html = ""
-
-                    for test_vector in entries:
-
-                        # If we reach here, the file is in principle in the correct format.
-                        # Here are the index positions of the data items as they should appear
-                        # if the data is valid:
-                        #
-                        # 0  = <Filename>
-                        # 1  = <Batch>
-                        # 2  = <Type>
-                        # 3  = <Period (ms)>
-                        # 4  = <DM>
-                        # 5  = <Z>
-                        # 6  = <S/N>
-                        # 7  = <EPN Pulsar>
-                        # 8  = <Frequency>
-                        # 9  = <Path>
-                        # 10  = <Parent Dir>
-                        # 11  = <Size Bits>
-                        # 12 = <Size GB>
-                        # 13 = <MD5>
-
-                        parameters = test_vector.split(',')
-
-                        # Check the parameters are as we expect...
-                        if parameters is None:
-                            print '\t\tTest vector parameters are empty - is the file empty (empty rows)'
-                            return False
-                        else:
-                            # Now we check there are the correct number of parameters...
-                            if len(parameters) != 14:
-                                print '\t\tFile has incorrect number of parameters (length', len(parameters), ')'
-                                return False
-                            else:
-                                # If here, we should have the correct number of parameters....
-                                table_data = self.createTableData(parameters, asc_dir, batch_info)
+                pulsar_links.append(link)
+
+        html = Common.read_file_as_string('html_fragments/split_index.html')
+        html = html.replace('@TOTAL@', str(total))
+        html = html.replace('@STATISTICS@', self.renderStatistics())
+        html = html.replace('@BATCH_LINKS@', '\n'.join(batch_links))
+        html = html.replace('@PULSAR_LINKS@', '\n'.join(pulsar_links))
+
+        temp_path = self.tempPath(output_file)
 
-                                if table_data is not None:
-                                    html += table_data
-                                    entriesProcessed += 1
-                                else:
-                                    print '\t\tUnable to build HTML table item - some unknown error'
-                                    return False
+        with open(temp_path, 'w') as f:
+            f.write(html)
 
-                    # Now merge the HTML file components.
-                    top = Common.read_file_as_string('html_fragments/top.html')
-                    middle = Common.read_file_as_string('html_fragments/middle.html')
+        self.replaceFile(temp_path, output_file)
+
+    # ****************************************************************************************************
+
+    def writeBatchFile(self, output_file, batch_info, referenced=None):
+        """
+        Writes the descriptions of the batches a page links to, as a JSON object mapping
+        each batch number to the text of its batch file. The file is written next to the
+        page, named after it, e.g. index.html gets index_batches.json. The page fetches it
+        the first time a batch link is clicked.
 
-                    # Build Batch info
-                    popup_html = ''
-                    popup_script = '\n<script>\n\t$(document).ready(function () {\n'
-                    if batch_info is not None:
-                        if len(batch_info)>0:
-                            for key, value in batch_info.iteritems():
-                                popup_html += value[0]
-                                popup_script += value[1]
+        Parameters
+        ----------
+        :param output_file: the output path the page is written to (i.e. index.html).
+        :param batch_info: a dictionary of batch information.
+        :param referenced: the keys of the batches to write, by default every batch.
 
-                        # Close the script
-                        popup_script += '\t});\n</script>\n'
+        Returns
+        ----------
+        :return: the batch description file name, else None if there are no batches to describe.
 
+        """
 
-                    # Add bottom of HTML file.
-                    bottom = Common.read_file_as_string('html_fragments/bottom.html')
+        if batch_info is None:
+            return None
 
-                    INDEX_HTML = top + html + middle + popup_html + popup_script + bottom
+        if referenced is None:
+            referenced = batch_info.keys()
 
-                    # Delete output file in case it exists.
-                    Common.delete_file(output_file)
+        batches = dict([(key.replace('Batch_', '').replace('.txt', ''), batch_info[key])
+                        for key in referenced if key in batch_info])
 
-                    # This is a simple fudge, allowing the page to be updated
-                    # at certain keyword locations.
-                    INDEX_HTML = INDEX_HTML.replace('@TOTAL@', str(entriesProcessed))
+        if len(batches) == 0:
+            return None
 
-                    # Now build the output file
-                    Common.append_to_file(output_file, INDEX_HTML)
+        file_name = os.path.splitext(os.path.basename(output_file))[0] + '_batches.json'
+        self.writeJson(os.path.join(os.path.dirname(os.path.abspath(output_file)), file_name), batches)
 
-                    # Finally get the time that the procedure finished.
-                    end = datetime.datetime.now()
+        print '\t\tBatch descriptions written: ', str(len(batches))
 
-                    print "Completed file search."
-                    print "Entries processed:", str(entriesProcessed)
-                    print "Execution time: ", str(end - start)
-                    print "Done parsing directory"
+        return file_name
 
-        else:
-            print "No valid directory supplied"
+    # ****************************************************************************************************
+
+    def renderBatchPopup(self, batch_file):
+        """
+        Renders the popup that shows batch descriptions, and the script that fetches them.
+
+        Parameters
+        ----------
+        :param batch_file: the batch description file, see writeBatchFile.
+
+        Returns
+        ----------
+        :return: the HTML string, which is empty if there are no batch descriptions.
+
+        """
+
+        if batch_file is None:
+            return ''
+
+        return self.BATCH_POPUP.replace('@BATCH_FILE@', batch_file)
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def tempPath(output_file):
+        """
+        Gets a temporary path in the same directory as an output file, so that the
+        temporary file can be renamed over the output file atomically.
+
+        Parameters
+        ----------
+        :param output_file: the output file path.
+
+        Returns
+        ----------
+        :return: the temporary file path.
+
+        """
+        return output_file + '.' + str(os.getpid()) + '.tmp'
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def replaceFile(temp_path, output_file):
+        """
+        Renames a completed temporary file over the output file.
+
+        Parameters
+        ----------
+        :param temp_path: the completed temporary file.
+        :param output_file: the output file path.
+
+        Returns
+        ----------
+        N/A
+
+        """
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(output_file)
+
+        os.rename(temp_path, output_file)
 
     # ****************************************************************************************************
 
@@ -312,52 +1382,67 @@ class PageBuilder(object):
 
         Returns
         ----------
-        :return: N/A.
+        :return: the HTML table row as a string.
 
         """
 
-        img_path = asc_dir + "/" + parameters[7] + '.png'
-
-        print "\t\tBuilding HTML... "
+        img_path = self.imageFor(asc_dir, parameters[7])
 
-        html = "\t<tr>\n"
-        html += "\t\t<td>" + parameters[2] + "</td>\n" # Type
+        # The cells are collected in a list and joined once, rather than
+        # repeatedly concatenating strings.
+        html = ["\t<tr>\n",
+                "\t\t<td>", parameters[2], "</td>\n"]  # Type
 
         if batch_dic is not None:
 
             batch_key = 'Batch_' + parameters[1] + '.txt'
             if batch_dic.has_key(batch_key):
 
-                batch_popup = "'#batch_pop_" + parameters[1] + "'"
-                html += "\t\t<td><a href="
-                html += '"#" onclick="$(' + batch_popup + ').popup'
-                html += "('show');"
-                html += '">' + parameters[1] + '</a></td>\n'
+                html += ['\t\t<td><a href="#" onclick="', self.BATCH_LINK.replace('@BATCH@', parameters[1]),
+                         '">', parameters[1], '</a></td>\n']
             else:
-                print 'No batch key in batch dictionary: ', batch_key
-                html += "\t\t<td>" + parameters[1] + "</td>\n"  # Batch
+                # Missing batch files are listed in the missing asset report.
+                html += ["\t\t<td>", parameters[1], "</td>\n"]  # Batch
         else:
-            html += "\t\t<td>" + parameters[1] + "</td>\n" # Batch
+            html += ["\t\t<td>", parameters[1], "</td>\n"]  # Batch
 
-        html += "\t\t<td>" + parameters[3] + "</td>\n" # Period
-        html += "\t\t<td>" + parameters[4] + "</td>\n" # DM
-        html += "\t\t<td>" + parameters[5] + "</td>\n" # Z
-        html += "\t\t<td>" + parameters[6] + "</td>\n" # SNR
+        html += ["\t\t<td>", parameters[3], "</td>\n",  # Period
+                 "\t\t<td>", parameters[4], "</td>\n",  # DM
+                 "\t\t<td>", parameters[5], "</td>\n",  # Z
+                 "\t\t<td>", parameters[6], "</td>\n"]  # SNR
+
+        sparkline = self.sparklineFor(asc_dir, parameters[7])
 
         # This part puts an image in in the table cell. The image
         # shows the shape of the pulse profile.
-        html += '\t\t<td><span class="flagicon"><img alt=' + parameters[7] + ' src="'
-        html += img_path + '"  width="128" height="128" class="thumbborder" />&#160;</span>'
-        html += parameters[7] + '</td>\n'
+        if sparkline is not None:
+            html += ['\t\t<td><span class="flagicon">', self.sparkline.svg(sparkline, parameters[7]),
+                     '&#160;</span>', parameters[7], '</td>\n']
+        elif self.atlas is None:
+            html += ['\t\t<td><span class="flagicon"><img alt=', parameters[7], ' src="',
+                     img_path, '"  width="128" height="128" class="thumbborder" />&#160;</span>',
+                     parameters[7], '</td>\n']
+        else:
+            thumbnail = self.atlas.find(parameters[7])
 
-        html += "\t\t<td>" + parameters[8] + "</td>\n" # Frequency
-        html += "\t\t<td><a href='"+parameters[9]+"'>" + parameters[0]+"</a></td>\n"  # file name
-        html += "\t\t<td>" + parameters[12] + "</td>\n" # Size GB
-        html += "\t\t<td>" + parameters[13] + "</td>\n" # MD5 hash
-        html += "\t\t<td>" + parameters[11] + "</td>\n"  # Size bits
-        html += "\t</tr>\n"
+            # The atlas (or image) is only fetched once the row scrolls into view, see table/lazy.js.
+            if thumbnail is None:
+                html += ['\t\t<td><span class="flagicon"><img alt=', parameters[7], ' data-src="',
+                         img_path, '"  width="128" height="128" class="thumbborder" />&#160;</span>',
+                         parameters[7], '</td>\n']
+            else:
+                html += ['\t\t<td><span class="flagicon"><span class="sprite thumbborder" title="', parameters[7],
+                         '" data-sprite="', thumbnail[0], '" style="background-position:-', str(thumbnail[1]),
+                         'px -', str(thumbnail[2]), 'px"></span>&#160;</span>', parameters[7], '</td>\n']
+
+        html += ["\t\t<td>", parameters[8], "</td>\n",  # Frequency
+                 "\t\t<td><a href='", parameters[9], "'>", parameters[0], "</a></td>\n",  # file name
+                 "\t\t<td>", parameters[12], "</td>\n",  # Size GB
+                 "\t\t<td>", parameters[13], "</td>\n",  # MD5 hash
+                 "\t\t<td>", parameters[11], "</td>\n",  # Size bits
+                 "\t</tr>\n"]
 
-        return html
+        return ''.join(html)
 
     # ****************************************************************************************************
 
@@ -372,8 +1457,8 @@ class PageBuilder(object):
         Batch_<Batch Number>.txt
 
         This function processes this directory, and extracts useful information from the
-        batch files. It returns this information as html, ready to be inserted into the
-        complete test vector page.
+        batch files. It returns the text of each batch file, which is written to a batch
+        description file the page fetches when a batch link is clicked.
 
         Parameters
         ----------
@@ -416,11 +1501,8 @@ class PageBuilder(object):
                                 print '\t\tBatch file empty: ', file_name
                             else:
 
-                                # Else we can build the popups
-                                popup_html = self.buildBatchPopup(file_name, batch_file_text)
-                                popup_script = self.buildBatchPopupScript(file_name)
-
-                                batch_dic[file_name] = [popup_html, popup_script]
+                                # The popup content is fetched by the page on demand.
+                                batch_dic[file_name] = batch_file_text
 
         print '\t\tBatch files found: ', batch_file_count
 
@@ -428,112 +1510,80 @@ class PageBuilder(object):
 
     # ****************************************************************************************************
 
-    def buildBatchPopup(self, file_name, batch_file_text):
-        """
-        Builds the popup HTML for a batch.
 
-        Parameters
-        ----------
-        :param file_name: the batch file name.
-        :param batch_file_text: the text inside the batch file.
+# ******************************
+#
+# PROCESS POOL WORKER
+#
+# ******************************
 
-        Returns
-        ----------
-        :return: a HTML string if the batch file name is valid, else an empty string.
-
-        """
-        # Here is an example of the HTML structure that must be produced.
-        #
-        # <div id = "batch_pop_<Batch Number>" class ="well">
-        #    <h4> Batch_<Batch Number>.txt </h4>
-        # <pre class ="prettyprint">
-        # <code>
-        #    BATCH FILE TEXT HERE.
-        # </code>
-        # </pre>
-        # <button onclick = "$('#batch_pop_<Batch Number>').popup('hide');" class ="fade_close btn btn-default"> Close </button>
-        # </div>
-        #
-        # Where <Batch Number> is replaced by the correct batch number from the file name.
-
-        if file_name is None:
-            print '\t\tEmpty filename passed to buildBatchPopup'
-            return ''
+# The profile libraries opened by a worker process, keyed by path, so each is
+# only read once per process, however many pages the process renders.
+libraries = {}
 
-        # Get the batch number:
-        file_name_components = file_name.replace('.txt', '').split('_')
+# The names of the profile images available, set once per process by initSplitWorker.
+images = None
 
-        if file_name_components is None:
-            print '\t\tProblem generating popup HTML- batch file name format invalid'
-            return ''
-        else:
-            if len(file_name_components) == 2:
-
-                batch_number = str(file_name_components[1])
-
-                html = '\n<div id ="batch_pop_' + batch_number + '" class ="well">\n'
-                html += "\t\t<h4> " + file_name + " </h4>'\n"
-                html += '<pre class ="prettyprint">\n'
-                html += "<code>\n"
-                html += batch_file_text
-                html += "</code>\n"
-                html += "</pre>\n"
-                html += '<button onclick = "$('
-                html += "'#batch_pop_" + batch_number + "').popup('hide');"
-                html += '" class ="fade_close btn btn-default"> Close </button>\n'
-                html += "</div>\n"
-
-                return html
-            else:
-                print '\t\tProblem generating popup HTML - batch file name format invalid'
-                return ''
 
-    # ****************************************************************************************************
+def initSplitWorker(image_names):
+    """
+    Initialises a process rendering split pages, with the profile images found by the
+    asset index of the page build, see AssetIndex.
 
-    def buildBatchPopupScript(self, file_name):
-        """
-        Builds the popup HTML script for a batch.
+    Parameters
+    ----------
+    :param image_names: the set of EPN profile names that have a profile image.
 
-        Parameters
-        ----------
-        :param file_name: the batch file name.
+    Returns
+    ----------
+    N/A
 
-        Returns
-        ----------
-        :return: a HTML string if the batch file name is valid, else an empty string.
+    """
+    global images
 
-        """
+    images = image_names
 
-        # The script so look as follows:
-        #
-        # $('#batch_pop_1').popup({
-        #    transition: 'all 0.3s',
-        #    scrolllock: true
-        # });
 
-        if file_name is None:
-            print '\t\tEmpty filename passed to buildBatchPopupScript()'
-            return ''
+def renderSplitPage(task):
+    """
+    Renders a single split page. This is a module level function, so that it
+    can be passed to a multiprocessing pool.
 
-        # Get the batch number:
-        file_name_components = file_name.replace('.txt', '').split('_')
+    Parameters
+    ----------
+    :param task: a tuple of (page path, partition file path, asc directory, batch information,
+                 True if thumbnails come from the sprite atlases, True if profiles are shown as
+                 sparklines, the cache directory, the batch description file, the profile library
+                 file or None).
 
-        if file_name_components is None:
-            print '\t\tProblem generating popup HTML script - batch file name format invalid'
-            return ''
-        else:
-            if len(file_name_components) == 2:
+    Returns
+    ----------
+    :return: the number of rows written, else None if the page could not be built.
 
-                batch_number = str(file_name_components[1])
+    """
+    page_path, spool_path, asc_dir, batch_info, sprites, sparklines, cache_dir, batch_file, library = task
 
-                html = "\t\t$('#batch_pop_" + batch_number + "').popup({\n"
-                html +="\t\t\ttransition: 'all 0.3s',\n"
-                html += "\t\t\tscrolllock: true\n"
-                html += "\t\t});\n"
+    builder = PageBuilder(cache_dir=cache_dir, library=library)
 
-                return html
-            else:
-                print '\t\tProblem generating popup HTML script - batch file name format invalid'
-                return ''
+    # The library was read before the pages were rendered, so each process only maps it, once.
+    if library is not None:
+        if library not in libraries:
+            if not builder.openLibrary():
+                return None
+            libraries[library] = builder.library
 
-    # ****************************************************************************************************
+        builder.library = libraries[library]
+
+    builder.assets = AssetIndex(asc_dir, images=images)
+
+    # The atlases were built before the pages were rendered, so only the map is loaded.
+    if sprites:
+        builder.atlas = ThumbnailAtlas(asc_dir)
+        if not builder.atlas.load():
+            return None
+
+    if sparklines and not builder.openSparklines():
+        return None
+    rows = builder.renderRows(builder.readTestVectors(spool_path), asc_dir, batch_info)
+
+    return builder.writePage(page_path, rows, batch_info, batch_file=batch_file)
@@ -16,13 +16,50 @@
     | Required Command Line Arguments:                                       |
     |                                                                        |
     | --in (string) path to the test vector database input file to parse.    |
+    |               May be repeated, to combine the catalogues of several    |
+    |               storage servers into one site.                           |
     |                                                                        |
     | --out (string) path to the output file to create or append to.         |
     |                                                                        |
-    | -f (int) the output format (1=CSV, 2=JSON).                            |
+    | -f (int) the output format (1=HTML table, 2=JSON data feed, 3=one page |
+    |          per batch and per EPN pulsar).                                |
+    |                                                                        |
+    | --chunk (int) the number of test vectors per JSON data feed chunk.     |
+    |                                                                        |
+    | --cache-dir (string) directory to cache sparklines in, so rebuilds     |
+    |                      only render new or changed profiles.              |
+    |                                                                        |
+    | --workers (int) the number of processes rendering pages (-f 3).        |
+    |                                                                        |
+    | --sprites (flag) pack profile thumbnails into sprite atlases, loaded   |
+    |                  only as rows scroll into view.                        |
+    |                                                                        |
+    | --sparklines (flag) embed profiles as inline SVG sparklines.           |
+    |                                                                        |
+    | --merge-by (string) the column several --in files are merged by (i.e.  |
+    |                     filename, batch, dm, period). Files not sorted by  |
+    |                     it are sorted first, within --memory.              |
+    |                                                                        |
+    | --sort-by (string) sort the test vectors by a column (i.e. batch, dm,   |
+    |                    period, snr, size). Input files may then be in any  |
+    |                    order.                                              |
+    |                                                                        |
+    | --memory (int) the memory budget for sorting in MB. Larger catalogues  |
+    |                are sorted in runs spilled to temporary files.          |
+    |                                                                        |
+    | --stats (flag) add catalogue statistics (histograms, storage) to the   |
+    |                page.                                                   |
+    |                                                                        |
+    | --publish (flag) minify the page, fingerprint its assets, and write    |
+    |                  precompressed .gz (and .br) siblings.                 |
+    |                                                                        |
+    | --level (int) the compression level used by --publish (1-9).           |
     |                                                                        |
     | --asc (string) path to the directory containing .asc files.            |
     |                                                                        |
+    | --library (string) read profiles (for --sparklines and --sprites) from |
+    |                    a profile library, see ProfileLibraryApp.py.        |
+    |                                                                        |
     | --batch (string) path to the directory containing text files describing|
     |                  test vector processing batches. Batch files should be |
     |                  named like Batch_<Batch number>.txt.                  |
@@ -48,6 +85,7 @@ import datetime
 
 # For common operations.
 from PageBuilder import PageBuilder
+from CatalogueMerger import CatalogueMerger
 from Common import Common
 
 
@@ -102,16 +140,28 @@ class PageBuilderApp(object):
         parser = OptionParser()
 
         # REQUIRED ARGUMENTS
-        parser.add_option("--in", action="store", dest="input", help='Path to the input file to parse (required).', default=None)
+        parser.add_option("--in", action="append", dest="input", help='Path to an input file to parse, may be repeated (required).', default=None)
         parser.add_option("--out", action="store", dest="out", help='Path to the output file (required).',default=None)
         parser.add_option("--asc", action="store", dest="asc", help='Path to the .asc directory (required).', default=None)
         parser.add_option("--batch", action="store", dest="batch", help='Path to the batch directory (required).',default=None)
         parser.add_option("-f"   , type="int"    , dest="format", help='The file output format (optional).',default=1)
+        parser.add_option("--chunk", type="int", dest="chunk", help='Test vectors per JSON data feed chunk (optional).',default=1000)
+        parser.add_option("--cache-dir", action="store", dest="cache_dir", help='Path to the sparkline cache directory (optional).',default=None)
+        parser.add_option("--workers", type="int", dest="workers", help='Number of page rendering processes (optional).',default=None)
+        parser.add_option("--sprites", action="store_true", dest="sprites", help='Use profile thumbnail sprite atlases (optional).',default=False)
+        parser.add_option("--sparklines", action="store_true", dest="sparklines", help='Embed profiles as SVG sparklines (optional).',default=False)
+        parser.add_option("--merge-by", action="store", dest="merge_by", help='Column to merge several input files by (optional).',default='filename')
+        parser.add_option("--sort-by", action="store", dest="sort_by", help='Column to sort the test vectors by (optional).',default=None)
+        parser.add_option("--memory", type="int", dest="memory", help='Memory budget for sorting in MB (optional).',default=256)
+        parser.add_option("--stats", action="store_true", dest="stats", help='Add catalogue statistics to the page (optional).',default=False)
+        parser.add_option("--publish", action="store_true", dest="publish", help='Minify, fingerprint and precompress the output (optional).',default=False)
+        parser.add_option("--library", action="store", dest="library", help='Path to a profile library to read (optional).',default=None)
+        parser.add_option("--level", type="int", dest="level", help='Compression level for --publish, 1-9 (optional).',default=9)
 
         (args, options) = parser.parse_args()
 
         # Update variables with command line parameters.
-        input_file    = args.input
+        input_files   = args.input
         output_file   = args.out
         output_format = args.format
         asc_dir       = args.asc
@@ -133,12 +183,28 @@ class PageBuilderApp(object):
             print "No valid batch directory supplied, exiting."
             sys.exit()
 
-        # Check the directory is valid...
-        if input_file is None:
+        # Check the input files are valid...
+        if input_files is None:
             print "No valid input file supplied, exiting."
             sys.exit()
-        elif not Common.file_exists(input_file):
-            print "No valid input file supplied, exiting."
+
+        for input_file in input_files:
+            if not Common.file_exists(input_file):
+                print "No valid input file supplied (", input_file, "), exiting."
+                sys.exit()
+
+        if args.merge_by not in CatalogueMerger.MERGE_COLUMNS:
+            print "You must supply a valid merge column via the --merge-by flag, one of:"
+            print ", ".join(sorted(CatalogueMerger.MERGE_COLUMNS.keys()))
+            sys.exit()
+
+        if args.sort_by is not None and args.sort_by not in CatalogueMerger.MERGE_COLUMNS:
+            print "You must supply a valid sort column via the --sort-by flag, one of:"
+            print ", ".join(sorted(CatalogueMerger.MERGE_COLUMNS.keys()))
+            sys.exit()
+
+        if args.memory < 1:
+            print "The sort memory budget must be at least 1 MB, exiting."
             sys.exit()
 
         # Check the output file is valid...
@@ -149,20 +215,43 @@ class PageBuilderApp(object):
             print "No valid output file supplied, exiting."
             sys.exit()
 
-        if output_format < 1 or output_format > 2:
+        if output_format < 1 or output_format > 3:
             print "You must supply a valid output format via the -f flag."
-            print "1    -    CSV."
-            print "2    -    JSON (not implemented yet)."
+            print "1    -    HTML table."
+            print "2    -    JSON data feed, rendered with virtual scrolling."
+            print "3    -    One page per batch and per EPN pulsar, plus an index page."
+
+            sys.exit()
+
+        if args.chunk < 1:
+            print "The JSON data feed chunk size must be at least 1, exiting."
+            sys.exit()
+
+        if args.workers is not None and args.workers < 1:
+            print "The number of worker processes must be at least 1, exiting."
+            sys.exit()
+
+        if args.level < 1 or args.level > 9:
+            print "The compression level must be between 1 and 9, exiting."
+            sys.exit()
+
+        if args.library is not None and not Common.file_exists(args.library):
+            print "No valid profile library supplied, exiting."
+            sys.exit()
 
+        if args.cache_dir is not None and not Common.is_path_valid(args.cache_dir):
+            print "No valid cache directory supplied, exiting."
             sys.exit()
 
-        print "Processing: ", input_file
+        print "Processing: ", ", ".join(input_files)
 
         # Used to measure run time.
         start = datetime.datetime.now()
 
-        builder = PageBuilder()
-        builder.build(input_file, output_file, output_format, asc_dir, batch_dir)
+        builder = PageBuilder(args.chunk, args.cache_dir, args.workers, args.sprites, args.sparklines,
+                              args.stats, args.merge_by, args.sort_by, args.memory, args.library)
+        if builder.build(input_files, output_file, output_format, asc_dir, batch_dir) and args.publish:
+            builder.publish(output_file, args.level)
 
         # Finally get the time that the procedure finished.
         end = datetime.datetime.now()
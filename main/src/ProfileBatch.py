@@ -0,0 +1,226 @@
+"""
+**************************************************************************
+
+ ProfileBatch.py
+
+**************************************************************************
+ Description:
+
+ Processes many pulse profiles at once, as rows of a single Numpy array,
+ rather than one Python list at a time. The profiles vary in length (i.e.
+ 1023, 2047 or 3124 bins), so each row is padded to the length of the
+ longest profile, and the length of each profile kept alongside.
+
+ A batch can be,
+
+ 1. Centred, i.e. each profile rotated so its peak is in the centre bin
+    (as CreatePulseProfilePng.py has always plotted them). The peaks of
+    every profile are found by one argmax over the array, and the profiles
+    rotated by one gather of the array, with a different shift per row.
+
+ 2. Normalised, i.e. each profile scaled to the range 0 to 1.
+
+ 3. Downsampled to a common number of points, as a min/max envelope (as
+    drawn by ProfileSparkline.py).
+
+ Each operation works on the whole array, so its cost per profile falls as
+ the batch grows, up to the memory used by the padded array.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import numpy
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class ProfileBatch(object):
+    """
+    A batch of pulse profiles, held as the rows of a padded 2D array.
+    """
+
+    # ****************************************************************************************************
+
+    def __init__(self, profiles):
+        """
+        Default constructor, which copies the profiles into the padded array.
+
+        Parameters
+        ----------
+        :param profiles: a list of profiles, each a sequence of data points (i.e. a list or numpy array).
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.lengths = numpy.array([len(profile) for profile in profiles], dtype=numpy.intp)
+
+        width = int(self.lengths.max()) if len(profiles) > 0 else 0
+
+        # The profiles, one per row, padded with zeros.
+        self.data = numpy.zeros((len(profiles), width))
+
+        for row, profile in enumerate(profiles):
+            self.data[row, :len(profile)] = profile
+
+    # ****************************************************************************************************
+
+    def profile(self, row):
+        """
+        Gets a profile of the batch, without its padding.
+
+        Parameters
+        ----------
+        :param row: the index of the profile in the batch.
+
+        Returns
+        ----------
+        :return: the profile data points, as a numpy array (a view of the batch).
+
+        """
+        return self.data[row, :self.lengths[row]]
+
+    # ****************************************************************************************************
+
+    def mask(self):
+        """
+        Finds the data points of the array which belong to a profile, rather than padding.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: a boolean array the shape of the batch, True where there is profile data.
+
+        """
+        return numpy.arange(self.data.shape[1])[numpy.newaxis, :] < self.lengths[:, numpy.newaxis]
+
+    # ****************************************************************************************************
+
+    def centre(self):
+        """
+        Rotates each profile such that its maximum value is in its centre bin, i.e. bin
+        length / 2. Where a profile has several maximum values, the first is centred.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        N/A
+
+        """
+        if self.data.size == 0:
+            return
+
+        mask = self.mask()
+
+        # The peak of each profile, ignoring the padding.
+        peaks = numpy.argmax(numpy.where(mask, self.data, -numpy.inf), axis=1)
+        shifts = self.lengths // 2 - peaks
+
+        # Rotating a profile right by shift bins puts bin (i - shift) mod length in bin i.
+        lengths = numpy.maximum(self.lengths, 1)[:, numpy.newaxis]
+        columns = numpy.arange(self.data.shape[1])[numpy.newaxis, :]
+        sources = (columns - shifts[:, numpy.newaxis]) % lengths
+
+        rows = numpy.arange(len(self.data))[:, numpy.newaxis]
+        self.data = numpy.where(mask, self.data[rows, sources], 0.0)
+
+    # ****************************************************************************************************
+
+    def normalise(self):
+        """
+        Scales each profile to the range 0 to 1. Flat profiles are set to 0.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        N/A
+
+        """
+        if self.data.size == 0:
+            return
+
+        mask = self.mask()
+
+        lows = numpy.where(mask, self.data, numpy.inf).min(axis=1)
+        highs = numpy.where(mask, self.data, -numpy.inf).max(axis=1)
+
+        spans = highs - lows
+        spans[~(spans > 0)] = 1.0
+
+        self.data = numpy.where(mask, (self.data - lows[:, numpy.newaxis]) / spans[:, numpy.newaxis], 0.0)
+
+    # ****************************************************************************************************
+
+    def envelope(self, points):
+        """
+        Downsamples every profile to the same number of points, as a min/max envelope,
+        i.e. each profile is split into equal blocks, and the minimum and maximum of each
+        block kept, so narrow pulses survive downsampling. Profiles shorter than points
+        are first stretched (each bin repeated) so every block covers at least one bin,
+        then every profile is padded with its final value to a whole number of blocks.
+
+        Parameters
+        ----------
+        :param points: the number of points, i.e. blocks.
+
+        Returns
+        ----------
+        :return: a tuple of (the block minimums, the block maximums), each a numpy array
+                 with a row of points values per profile.
+
+        """
+        lengths = numpy.maximum(self.lengths, 1)[:, numpy.newaxis]
+
+        # The stretched length, and block size, of each profile.
+        repeats = -(-points // lengths)
+        stretched = lengths * repeats
+        blocks = -(-stretched // points)
+
+        # The stretched bins of every block, up to the largest block, with the bins past a
+        # block's end repeating its last bin (which does not change its minimum or maximum).
+        offsets = numpy.arange(int(blocks.max()) if len(self.data) > 0 else 1)
+        starts = numpy.arange(points)[numpy.newaxis, :] * blocks
+        bins = starts[:, :, numpy.newaxis] + numpy.minimum(offsets[numpy.newaxis, numpy.newaxis, :],
+                                                           blocks[:, :, numpy.newaxis] - 1)
+
+        # Padding repeats the final bin, and each stretched bin is a repeat of an original bin.
+        bins = numpy.minimum(bins, stretched[:, :, numpy.newaxis] - 1) // repeats[:, :, numpy.newaxis]
+
+        if self.data.size == 0:
+            empty = numpy.zeros((len(self.data), points))
+            return empty, empty.copy()
+
+        values = self.data[numpy.arange(len(self.data))[:, numpy.newaxis, numpy.newaxis], bins]
+
+        return values.min(axis=2), values.max(axis=2)
+
+    # ****************************************************************************************************
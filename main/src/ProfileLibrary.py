@@ -0,0 +1,333 @@
+"""
+**************************************************************************
+
+ ProfileLibrary.py
+
+**************************************************************************
+ Description:
+
+ Packs the pulse profiles of an .asc directory (thousands of small text
+ files, each holding one value per line) into a single binary profile
+ library, so they can be read without opening and parsing a text file per
+ profile.
+
+ The library file holds,
+
+ 1. A header, i.e. the magic string PROFLIB2, then the length of the index
+    in bytes (an unsigned 64 bit little endian integer).
+
+ 2. The index, as JSON, listing for each profile,
+
+    [key, pulsar name, frequency, offset, length, MD5 hash]
+
+    where the key is the .asc path relative to the .asc directory, without
+    the .asc extension (i.e. the EPN profile name J0006+1834_430), the
+    offset and length locate the profile in the data (in values, not
+    bytes), and the MD5 hash is that of the .asc file content.
+
+ 3. The data, i.e. every profile as a contiguous array of float64 values,
+    starting at the next multiple of 16 bytes after the index. The values
+    are held at the precision they are parsed at from the .asc text, so the
+    PNGs, sparklines and atlases drawn from a library are identical to those
+    drawn from the .asc files.
+
+ The data is opened with numpy.memmap, so opening a library only reads its
+ index, and each profile is a view of the mapped data, read from disk (or
+ the page cache) only when used.
+
+ Files that do not hold a valid profile (empty, or holding values that are
+ not numbers) are left out of the library, and listed as errors.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+import json
+import struct
+import shutil
+import hashlib
+import tempfile
+import numpy
+
+# For common operations
+from Common import Common
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class ProfileLibrary(object):
+    """
+    A read only, memory mapped library of pulse profiles. See build, to create one.
+    """
+
+    # Identifies a profile library file, and its format version.
+    MAGIC = 'PROFLIB2'
+
+    # The profile data type, i.e. little endian float64. Version 1 libraries held float32
+    # values, which changed some rendered pixels, so are no longer read.
+    DTYPE = numpy.dtype('<f8')
+
+    # The data starts at a multiple of this many bytes.
+    ALIGNMENT = 16
+
+    # The library file name used when none is given, in the .asc directory.
+    DEFAULT_NAME = 'profiles.lib'
+
+    # ****************************************************************************************************
+
+    def __init__(self, library_path):
+        """
+        Default constructor, which reads the index, and maps the data, of a library.
+        An IOError is raised if the library cannot be read, and a ValueError if it is
+        not a valid library.
+
+        Parameters
+        ----------
+        :param library_path: the path of the library file.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.library_path = library_path
+
+        with open(library_path, 'rb') as f:
+            header = f.read(len(self.MAGIC) + 8)
+
+            if len(header) < len(self.MAGIC) + 8 or not header.startswith(self.MAGIC):
+                raise ValueError('Not a profile library: ' + library_path)
+
+            index_length, = struct.unpack('<Q', header[len(self.MAGIC):])
+            index = json.loads(f.read(index_length))
+
+        # Maps each key to (offset, length, pulsar name, frequency, MD5 hash). JSON strings
+        # are read as unicode, so are encoded back to the byte strings file paths are.
+        self.index = {}
+        for entry in index['profiles']:
+            key, name, freq, offset, length, digest = [field.encode('utf-8') if isinstance(field, unicode)
+                                                       else field for field in entry]
+            self.index[key] = (offset, length, name, freq, digest)
+
+        total = sum([length for offset, length, name, freq, digest in self.index.itervalues()])
+
+        # A file of zero length cannot be mapped.
+        if total == 0:
+            self.data = numpy.zeros(0, dtype=self.DTYPE)
+        else:
+            self.data = numpy.memmap(library_path, dtype=self.DTYPE, mode='r',
+                                     offset=self.dataOffset(index_length), shape=(total,))
+
+    # ****************************************************************************************************
+
+    def has(self, key):
+        """
+        Checks whether a profile is in the library.
+
+        Parameters
+        ----------
+        :param key: the profile key, i.e. the EPN profile name J0006+1834_430.
+
+        Returns
+        ----------
+        :return: True if the profile is in the library, else False.
+
+        """
+        return key in self.index
+
+    # ****************************************************************************************************
+
+    def keys(self):
+        """
+        Gets the keys of the profiles in the library.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: a sorted list of keys, i.e. .asc paths relative to the .asc directory, without extension.
+
+        """
+        return sorted(self.index.keys())
+
+    # ****************************************************************************************************
+
+    def profile(self, key):
+        """
+        Gets a profile. A KeyError is raised if the profile is not in the library.
+
+        Parameters
+        ----------
+        :param key: the profile key, i.e. the EPN profile name J0006+1834_430.
+
+        Returns
+        ----------
+        :return: the profile data points, as a read only float64 numpy array (a view of the mapped data).
+
+        """
+        offset, length = self.index[key][:2]
+
+        return self.data[offset:offset + length]
+
+    # ****************************************************************************************************
+
+    def digest(self, key):
+        """
+        Gets the MD5 hash of the .asc file a profile was read from.
+
+        Parameters
+        ----------
+        :param key: the profile key.
+
+        Returns
+        ----------
+        :return: the MD5 hash as a hex string.
+
+        """
+        return self.index[key][4]
+
+    # ****************************************************************************************************
+
+    def select(self, name=None, freq=None):
+        """
+        Finds the profiles of a pulsar, and/or at a frequency.
+
+        Parameters
+        ----------
+        :param name: the pulsar name, i.e. J0006+1834, or None for any pulsar.
+        :param freq: the frequency in MHz as written in the file name, i.e. 430, or None for any frequency.
+
+        Returns
+        ----------
+        :return: a sorted list of profile keys.
+
+        """
+        return sorted([key for key, (offset, length, entry_name, entry_freq, digest) in self.index.iteritems()
+                       if (name is None or entry_name == name) and (freq is None or entry_freq == freq)])
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def dataOffset(index_length):
+        """
+        Gets the position of the data in a library file.
+
+        Parameters
+        ----------
+        :param index_length: the length of the index in bytes.
+
+        Returns
+        ----------
+        :return: the offset of the data in bytes, after the header and index, rounded up to ALIGNMENT.
+
+        """
+        end = len(ProfileLibrary.MAGIC) + 8 + index_length
+
+        return -(-end // ProfileLibrary.ALIGNMENT) * ProfileLibrary.ALIGNMENT
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def build(asc_dir, library_path):
+        """
+        Packs the profiles of an .asc directory (and its sub-directories) into a library
+        file. The file is written via a temporary file, so an existing library is only
+        replaced once the new library is complete.
+
+        Parameters
+        ----------
+        :param asc_dir: path to the directory containing .asc files.
+        :param library_path: the path of the library file to write.
+
+        Returns
+        ----------
+        :return: a tuple of (the number of profiles packed, a list of error messages).
+
+        """
+        paths = []
+        for root, subFolders, filenames in os.walk(asc_dir):
+            for file_name in filenames:
+                if file_name.endswith('.asc'):
+                    paths.append(os.path.join(root, file_name))
+
+        entries = []
+        errors = []
+        offset = 0
+
+        # The data is streamed to a temporary file, as its offsets must be known to
+        # write the index which precedes it.
+        data = tempfile.TemporaryFile()
+
+        try:
+            for path in sorted(paths):
+                key = os.path.relpath(path, asc_dir)[:-len('.asc')].replace(os.sep, '/')
+
+                with open(path, 'rb') as f:
+                    content = f.read()
+
+                try:
+                    values = numpy.array(content.split(), dtype=numpy.float64)
+                except ValueError:
+                    errors.append('Error converting numerical values to float in file: ' + path)
+                    continue
+
+                if len(values) < 1:
+                    errors.append('File empty: ' + path)
+                    continue
+
+                # The file name is <Pulsar>_<Freq>.asc, possibly followed by a version.
+                components = os.path.basename(key).split('_')
+                name = components[0]
+                freq = components[1] if len(components) > 1 else ''
+
+                data.write(values.astype(ProfileLibrary.DTYPE).tostring())
+                entries.append([key, name, freq, offset, len(values), hashlib.md5(content).hexdigest()])
+                offset += len(values)
+
+            index = json.dumps({'profiles': entries}, separators=(',', ':'))
+            padding = ProfileLibrary.dataOffset(len(index)) - len(ProfileLibrary.MAGIC) - 8 - len(index)
+
+            temp_path = library_path + '.' + str(os.getpid()) + '.tmp'
+
+            with open(temp_path, 'wb') as f:
+                f.write(ProfileLibrary.MAGIC)
+                f.write(struct.pack('<Q', len(index)))
+                f.write(index)
+                f.write('\0' * padding)
+
+                data.seek(0)
+                shutil.copyfileobj(data, f)
+
+        finally:
+            data.close()
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(library_path)
+
+        os.rename(temp_path, library_path)
+
+        return len(entries), errors
+
+    # ****************************************************************************************************
@@ -0,0 +1,153 @@
+"""
+    **************************************************************************
+    |                                                                        |
+    |                     ProfileLibraryApp.py 1.0                           |
+    |                                                                        |
+    **************************************************************************
+    | Description:                                                           |
+    |                                                                        |
+    | Packs the pulse profiles of a directory of .asc files into a single    |
+    | binary profile library, read by CreatePulseProfilePng.py and           |
+    | PageBuilderApp.py via --library. This code runs on python 2.4 or later.|
+    **************************************************************************
+    | Author: Rob Lyon                                                       |
+    | Email : robert.lyon@postgrad.manchester.ac.uk                          |
+    | web   : www.scienceguyrob.com                                          |
+    **************************************************************************
+    | Required Command Line Arguments:                                       |
+    |                                                                        |
+    | --dir (string) path to the directory containing .asc files.            |
+    |                                                                        |
+    **************************************************************************
+    | Optional Command Line Arguments:                                       |
+    |                                                                        |
+    | --out (string) path to the library file to write (default              |
+    |                profiles.lib in the .asc directory).                    |
+    |                                                                        |
+    **************************************************************************
+    | License:                                                               |
+    |                                                                        |
+    | Code made available under the GPLv3 (GNU General Public License), that |
+    | allows you to copy, modify and redistribute the code as you see fit    |
+    | (http://www.gnu.org/copyleft/gpl.html). Though a mention to the        |
+    | original author using the citation above in derivative works, would be |
+    | very much appreciated.                                                 |
+    **************************************************************************
+
+"""
+
+# Command Line processing Imports:
+from optparse import OptionParser
+
+# For general purposes
+import os
+import sys
+import datetime
+
+# For common operations.
+from ProfileLibrary import ProfileLibrary
+from Common import Common
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class ProfileLibraryApp(object):
+    """
+    Builds a profile library.
+
+    """
+
+    # ******************************
+    #
+    # MAIN METHOD AND ENTRY POINT.
+    #
+    # ******************************
+
+    def main(self, args=None):
+        """
+        Main entry point for the Application.
+
+        Parameters
+        ----------
+        :param args: command line arguments.
+
+        Returns
+        ----------
+        :return: N/A
+
+        Examples
+        --------
+        >>> python ProfileLibraryApp.py --dir data/ASC --out data/profiles.lib
+
+        """
+        # ****************************************
+        #         Execution information
+        # ****************************************
+
+        print(__doc__)
+
+        # ****************************************
+        #    Command line argument processing
+        # ****************************************
+
+        # Python 2.4 argument processing.
+        parser = OptionParser()
+
+        # REQUIRED ARGUMENTS
+        parser.add_option("--dir", action="store", dest="dir", help='Path to the .asc directory (required).', default=None)
+
+        # OPTIONAL ARGUMENTS
+        parser.add_option("--out", action="store", dest="out", help='Path to the library file (optional).', default=None)
+
+        (args, options) = parser.parse_args()
+
+        # Update variables with command line parameters.
+        directory    = args.dir
+        library_path = args.out
+
+        ############################################################
+        #              Check user supplied parameters              #
+        ############################################################
+
+        # Check the directory is valid...
+        if directory is None:
+            print "No valid .asc directory supplied, exiting."
+            sys.exit()
+        elif not Common.dir_exists(directory):
+            print "No valid .asc directory supplied, exiting."
+            sys.exit()
+
+        if library_path is None:
+            library_path = os.path.join(directory, ProfileLibrary.DEFAULT_NAME)
+        elif not Common.is_path_valid(library_path):
+            print "No valid library file supplied, exiting."
+            sys.exit()
+
+        print "\tPacking: ", directory
+
+        # Used to measure run time.
+        start = datetime.datetime.now()
+
+        count, errors = ProfileLibrary.build(directory, library_path)
+
+        # Finally get the time that the procedure finished.
+        end = datetime.datetime.now()
+
+        for error in errors:
+            print '\t', error
+
+        print "\tFinished packing"
+        print "\tProfiles packed: ", str(count)
+        print "\tErrors: ", str(len(errors))
+        print "\tLibrary: ", library_path, " (", str(os.path.getsize(library_path)), " bytes)"
+        print "\tExecution time: ", str(end - start)
+        print "Done."
+
+    # ****************************************************************************************************
+
+if __name__ == '__main__':
+    ProfileLibraryApp().main()
@@ -0,0 +1,388 @@
+"""
+**************************************************************************
+
+ ProfileRasteriser.py
+
+**************************************************************************
+ Description:
+
+ Draws pulse profile plots as PNG images without Matplotlib. A profile
+ plot is just a line and a title, so it is drawn straight into a Numpy
+ pixel buffer, and encoded as a PNG with zlib. This avoids the cost of
+ importing Matplotlib, and of its general purpose rendering pipeline.
+
+ The plots copy the layout of those drawn with Matplotlib by
+ CreatePulseProfilePng.py, i.e. a 300 x 300 pixel image (3 inches at 100
+ dpi), with the axes placed as Matplotlib's default subplot, the y-axis
+ scaled to the data plus a 5% margin, and the line drawn 1.5 points wide
+ in Matplotlib's default line colour.
+
+ The line is anti-aliased. The polyline is split into half pixel wide
+ columns, and the highest and lowest points of the line in each column
+ found (including where it crosses the column edges). Each pixel column is
+ then covered by the line from the highest to the lowest point over the
+ line width around it, widened by half the line width above and below.
+ The fraction of each pixel covered gives its opacity, so the line edges
+ are smooth. Every step works on whole Numpy arrays, so profiles of
+ thousands of bins are drawn in about a millisecond.
+
+ The title is drawn with a small built in bitmap font, which covers the
+ characters of profile titles, i.e. J0000+0000 @ 1400 MHz, plus the rest of
+ the letters. A title with any other character is an error, rather than
+ being drawn with the character missing.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import zlib
+import struct
+import numpy
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class ProfileRasteriser(object):
+    """
+    Draws pulse profile plots into a Numpy pixel buffer, and encodes them as PNG images.
+    """
+
+    # The axes position as fractions of the image (left, bottom, right, top), as Matplotlib's default subplot.
+    AXES = (0.125, 0.11, 0.9, 0.88)
+
+    # The fraction of the data range added above and below the data, as Matplotlib's default y-margin.
+    MARGIN = 0.05
+
+    # Matplotlib's default line colour, and the background and title colours, as RGB.
+    LINE_COLOUR = (31, 119, 180)
+    BACKGROUND = (255, 255, 255)
+    TEXT_COLOUR = (0, 0, 0)
+
+    # The image is drawn with a palette of 256 colours, i.e. one byte per pixel. The first
+    # LEVELS + 1 colours blend the line colour over the background, by the fraction of the
+    # pixel the line covers (0 to LEVELS), and the last colour is the title colour.
+    LEVELS = 254
+    TEXT = 255
+
+    # The zlib compression level. Higher levels save little on images this simple, for much more time.
+    COMPRESSION = 3
+
+    # The gap between the top of the axes and the title baseline, in points (as Matplotlib).
+    TITLE_PAD = 6.0
+
+    # A 5 x 7 pixel font, covering the characters of profile titles (i.e. J0000+0000 @ 1400 MHz,
+    # or J1748-2446A @ 1410 MHz), plus the rest of the letters, and '_'. Lower case descenders
+    # are raised to fit in the 7 rows. Drawing a character without a glyph raises a ValueError.
+    GLYPHS = {
+        ' ': ['     ', '     ', '     ', '     ', '     ', '     ', '     '],
+        '0': [' ### ', '#   #', '#  ##', '# # #', '##  #', '#   #', ' ### '],
+        '1': ['  #  ', ' ##  ', '  #  ', '  #  ', '  #  ', '  #  ', ' ### '],
+        '2': [' ### ', '#   #', '    #', '   # ', '  #  ', ' #   ', '#####'],
+        '3': ['#####', '   # ', '  #  ', '   # ', '    #', '#   #', ' ### '],
+        '4': ['   # ', '  ## ', ' # # ', '#  # ', '#####', '   # ', '   # '],
+        '5': ['#####', '#    ', '#### ', '    #', '    #', '#   #', ' ### '],
+        '6': ['  ## ', ' #   ', '#    ', '#### ', '#   #', '#   #', ' ### '],
+        '7': ['#####', '    #', '   # ', '  #  ', ' #   ', ' #   ', ' #   '],
+        '8': [' ### ', '#   #', '#   #', ' ### ', '#   #', '#   #', ' ### '],
+        '9': [' ### ', '#   #', '#   #', ' ####', '    #', '   # ', ' ##  '],
+        'A': [' ### ', '#   #', '#   #', '#####', '#   #', '#   #', '#   #'],
+        'B': ['#### ', '#   #', '#   #', '#### ', '#   #', '#   #', '#### '],
+        'C': [' ### ', '#   #', '#    ', '#    ', '#    ', '#   #', ' ### '],
+        'D': ['#### ', '#   #', '#   #', '#   #', '#   #', '#   #', '#### '],
+        'E': ['#####', '#    ', '#    ', '#### ', '#    ', '#    ', '#####'],
+        'F': ['#####', '#    ', '#    ', '#### ', '#    ', '#    ', '#    '],
+        'G': [' ### ', '#   #', '#    ', '# ###', '#   #', '#   #', ' ####'],
+        'H': ['#   #', '#   #', '#   #', '#####', '#   #', '#   #', '#   #'],
+        'I': [' ### ', '  #  ', '  #  ', '  #  ', '  #  ', '  #  ', ' ### '],
+        'J': ['  ###', '   # ', '   # ', '   # ', '   # ', '#  # ', ' ##  '],
+        'K': ['#   #', '#  # ', '# #  ', '##   ', '# #  ', '#  # ', '#   #'],
+        'L': ['#    ', '#    ', '#    ', '#    ', '#    ', '#    ', '#####'],
+        'M': ['#   #', '## ##', '# # #', '# # #', '#   #', '#   #', '#   #'],
+        'N': ['#   #', '#   #', '##  #', '# # #', '#  ##', '#   #', '#   #'],
+        'O': [' ### ', '#   #', '#   #', '#   #', '#   #', '#   #', ' ### '],
+        'P': ['#### ', '#   #', '#   #', '#### ', '#    ', '#    ', '#    '],
+        'Q': [' ### ', '#   #', '#   #', '#   #', '# # #', '#  # ', ' ## #'],
+        'R': ['#### ', '#   #', '#   #', '#### ', '# #  ', '#  # ', '#   #'],
+        'S': [' ####', '#    ', '#    ', ' ### ', '    #', '    #', '#### '],
+        'T': ['#####', '  #  ', '  #  ', '  #  ', '  #  ', '  #  ', '  #  '],
+        'U': ['#   #', '#   #', '#   #', '#   #', '#   #', '#   #', ' ### '],
+        'V': ['#   #', '#   #', '#   #', '#   #', '#   #', ' # # ', '  #  '],
+        'W': ['#   #', '#   #', '#   #', '# # #', '# # #', '# # #', ' # # '],
+        'X': ['#   #', '#   #', ' # # ', '  #  ', ' # # ', '#   #', '#   #'],
+        'Y': ['#   #', '#   #', ' # # ', '  #  ', '  #  ', '  #  ', '  #  '],
+        'Z': ['#####', '    #', '   # ', '  #  ', ' #   ', '#    ', '#####'],
+        'a': ['     ', '     ', ' ### ', '    #', ' ####', '#   #', ' ####'],
+        'b': ['#    ', '#    ', '# ## ', '##  #', '#   #', '#   #', '#### '],
+        'c': ['     ', '     ', ' ### ', '#    ', '#    ', '#   #', ' ### '],
+        'd': ['    #', '    #', ' ## #', '#  ##', '#   #', '#   #', ' ####'],
+        'e': ['     ', '     ', ' ### ', '#   #', '#####', '#    ', ' ### '],
+        'f': ['  ## ', ' #  #', ' #   ', '###  ', ' #   ', ' #   ', ' #   '],
+        'g': ['     ', ' ####', '#   #', '#   #', ' ####', '    #', ' ### '],
+        'h': ['#    ', '#    ', '# ## ', '##  #', '#   #', '#   #', '#   #'],
+        'i': ['  #  ', '     ', ' ##  ', '  #  ', '  #  ', '  #  ', ' ### '],
+        'j': ['   # ', '     ', '  ## ', '   # ', '   # ', '#  # ', ' ##  '],
+        'k': ['#    ', '#    ', '#  # ', '# #  ', '##   ', '# #  ', '#  # '],
+        'l': [' ##  ', '  #  ', '  #  ', '  #  ', '  #  ', '  #  ', ' ### '],
+        'm': ['     ', '     ', '## # ', '# # #', '# # #', '#   #', '#   #'],
+        'n': ['     ', '     ', '# ## ', '##  #', '#   #', '#   #', '#   #'],
+        'o': ['     ', '     ', ' ### ', '#   #', '#   #', '#   #', ' ### '],
+        'p': ['     ', '     ', '#### ', '#   #', '#### ', '#    ', '#    '],
+        'q': ['     ', '     ', ' ## #', '#  ##', ' ####', '    #', '    #'],
+        'r': ['     ', '     ', '# ## ', '##  #', '#    ', '#    ', '#    '],
+        's': ['     ', '     ', ' ### ', '#    ', ' ### ', '    #', '#### '],
+        't': [' #   ', ' #   ', '###  ', ' #   ', ' #   ', ' #  #', '  ## '],
+        'u': ['     ', '     ', '#   #', '#   #', '#   #', '#  ##', ' ## #'],
+        'v': ['     ', '     ', '#   #', '#   #', '#   #', ' # # ', '  #  '],
+        'w': ['     ', '     ', '#   #', '#   #', '# # #', '# # #', ' # # '],
+        'x': ['     ', '     ', '#   #', ' # # ', '  #  ', ' # # ', '#   #'],
+        'y': ['     ', '     ', '#   #', '#   #', ' ####', '    #', ' ### '],
+        'z': ['     ', '     ', '#####', '   # ', '  #  ', ' #   ', '#####'],
+        '_': ['     ', '     ', '     ', '     ', '     ', '     ', '#####'],
+        '+': ['     ', '  #  ', '  #  ', '#####', '  #  ', '  #  ', '     '],
+        '-': ['     ', '     ', '     ', '#####', '     ', '     ', '     '],
+        '.': ['     ', '     ', '     ', '     ', '     ', ' ##  ', ' ##  '],
+        '@': [' ### ', '#   #', '# ###', '# # #', '# ###', '#    ', ' ####']}
+
+    # ****************************************************************************************************
+
+    def __init__(self, width=300, height=300, dpi=100.0, line_width=1.5, font_scale=2):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param width: the image width in pixels.
+        :param height: the image height in pixels.
+        :param dpi: the pixels per inch, used to convert point sizes to pixels.
+        :param line_width: the line width in points.
+        :param font_scale: the number of pixels drawn for each pixel of the bitmap font.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.line_width = line_width * dpi / 72.0
+        self.font_scale = font_scale
+
+        # The axes box in pixels, with rows counted down from the top of the image.
+        left, bottom, right, top = self.AXES
+        self.left = left * width
+        self.right = right * width
+        self.top = (1.0 - top) * height
+        self.bottom = (1.0 - bottom) * height
+
+        # The palette, as a PNG PLTE chunk body.
+        palette = [tuple([int(round(b + (c - b) * level / float(self.LEVELS)))
+                          for b, c in zip(self.BACKGROUND, self.LINE_COLOUR)])
+                   for level in range(self.LEVELS + 1)]
+        palette.append(self.TEXT_COLOUR)
+        self.palette = ''.join([struct.pack('BBB', *colour) for colour in palette])
+
+        # The bitmap font, as boolean arrays.
+        self.glyphs = dict([(c, numpy.array([[p == '#' for p in row] for row in rows]))
+                            for c, rows in self.GLYPHS.iteritems()])
+
+    # ****************************************************************************************************
+
+    def render(self, data, title):
+        """
+        Draws a profile plot, and encodes it as a PNG image.
+
+        Parameters
+        ----------
+        :param data: the (centred) profile data points.
+        :param title: the plot title.
+
+        Returns
+        ----------
+        :return: the PNG image as a byte string.
+
+        """
+        coverage = self.rasterise(numpy.asarray(data, dtype=numpy.float64))
+
+        # Each pixel is the palette index of its blend of the line colour over the background.
+        pixels = (coverage * self.LEVELS + 0.5).astype(numpy.uint8)
+
+        self.drawText(pixels, title, (self.left + self.right) / 2.0,
+                      int(round(self.top - self.TITLE_PAD * self.dpi / 72.0)))
+
+        return self.encode(pixels, self.palette)
+
+    # ****************************************************************************************************
+
+    def rasterise(self, data):
+        """
+        Draws the profile line as an anti-aliased coverage mask.
+
+        Parameters
+        ----------
+        :param data: the profile data points, as a numpy array.
+
+        Returns
+        ----------
+        :return: a height x width array of the fraction of each pixel covered by the line (0 to 1).
+
+        """
+        coverage = numpy.zeros((self.height, self.width))
+
+        # As Matplotlib, a single point draws no line.
+        if len(data) < 2:
+            return coverage
+
+        # As Matplotlib: the x-axis runs from 0 to the number of points, the y-axis
+        # covers the data with a margin, and a flat profile is centred.
+        low, high = data.min(), data.max()
+        if high == low:
+            low, high = low - 1.0, high + 1.0
+        margin = (high - low) * self.MARGIN
+        low, high = low - margin, high + margin
+
+        xs = self.left + numpy.arange(len(data)) * (self.right - self.left) / len(data)
+        ys = self.bottom - (data - low) * (self.bottom - self.top) / (high - low)
+
+        # Half pixel wide columns spanning the line, numbered from the left of the image,
+        # i.e. half column k spans x = k / 2 to (k + 1) / 2.
+        first = int(numpy.floor(xs[0] * 2))
+        edges = numpy.arange(first, int(numpy.ceil(xs[-1] * 2)) + 1) / 2.0
+        edge_ys = numpy.interp(edges, xs, ys)
+
+        # The highest and lowest points of the line in each half column: its ends at the
+        # column edges, and any data points within the column. Rows count down, so the
+        # highest point has the lowest row.
+        lows = numpy.minimum(edge_ys[:-1], edge_ys[1:])
+        highs = numpy.maximum(edge_ys[:-1], edge_ys[1:])
+
+        column = numpy.clip(numpy.searchsorted(edges, xs, 'right') - 1, 0, len(lows) - 1)
+        starts = numpy.flatnonzero(numpy.r_[True, column[1:] != column[:-1]])
+        lows[column[starts]] = numpy.minimum(lows[column[starts]], numpy.minimum.reduceat(ys, starts))
+        highs[column[starts]] = numpy.maximum(highs[column[starts]], numpy.maximum.reduceat(ys, starts))
+
+        # Each pixel column is covered by the line within (about) half the line width either
+        # side of its centre, so steep segments are as wide as flat ones are tall. The half
+        # columns beyond the line are padded, so windows at the line ends see no line there.
+        reach = max(1, int(round(self.line_width / 2.0)))
+        pad = 2 * reach
+        lows = numpy.r_[[numpy.inf] * pad, lows, [numpy.inf] * pad]
+        highs = numpy.r_[[-numpy.inf] * pad, highs, [-numpy.inf] * pad]
+
+        pixel_columns = numpy.arange(first // 2 - reach, int(numpy.ceil(edges[-1])) + reach)
+
+        # Pixel column c is centred at x = c + 0.5, so its window is half columns 2c + 1 - pad to 2c + pad.
+        window = numpy.arange(1 - pad, pad + 1)
+        indices = 2 * pixel_columns[:, numpy.newaxis] + window[numpy.newaxis, :] - first + pad
+        indices = numpy.clip(indices, 0, len(lows) - 1)
+
+        tops = lows[indices].min(axis=1) - self.line_width / 2.0
+        bottoms = highs[indices].max(axis=1) + self.line_width / 2.0
+
+        # Clip to the axes, and the image.
+        tops = numpy.maximum(tops, self.top)
+        bottoms = numpy.minimum(bottoms, self.bottom)
+        keep = (pixel_columns >= int(self.left)) & (pixel_columns < min(int(numpy.ceil(self.right)), self.width))
+        keep &= numpy.isfinite(tops) & numpy.isfinite(bottoms)
+
+        pixel_columns, tops, bottoms = pixel_columns[keep], tops[keep], bottoms[keep]
+
+        # The fraction of each pixel row of the axes, within each column, between the top and bottom of the line.
+        first_row, last_row = int(self.top), min(int(numpy.ceil(self.bottom)), self.height)
+        rows = numpy.arange(first_row, last_row)[:, numpy.newaxis]
+        covered = numpy.minimum(rows + 1, bottoms[numpy.newaxis, :]) - numpy.maximum(rows, tops[numpy.newaxis, :])
+        coverage[first_row:last_row, pixel_columns] = numpy.clip(covered, 0.0, 1.0)
+
+        return coverage
+
+    # ****************************************************************************************************
+
+    def drawText(self, pixels, text, centre, baseline):
+        """
+        Draws text in the title colour with the bitmap font. A ValueError is raised if a
+        character has no glyph, before any of the text is drawn.
+
+        Parameters
+        ----------
+        :param pixels: the height x width buffer of palette indices.
+        :param text: the text.
+        :param centre: the x coordinate to centre the text on.
+        :param baseline: the row the bottom of the text sits on.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        scale = self.font_scale
+        advance = 5 * scale + (scale + 1) // 2
+        x = int(round(centre - (len(text) * advance - scale) / 2.0))
+        y = baseline - 7 * scale
+
+        missing = [c for c in text if c not in self.glyphs]
+        if len(missing) > 0:
+            raise ValueError('No glyph for ' + repr(missing[0]) + ' in title: ' + text)
+
+        for c in text:
+            mask = self.glyphs[c].repeat(scale, axis=0).repeat(scale, axis=1)
+
+            # Only the part of the glyph inside the image is drawn.
+            top, left = max(y, 0), max(x, 0)
+            bottom, right = min(y + mask.shape[0], self.height), min(x + mask.shape[1], self.width)
+
+            if bottom > top and right > left:
+                region = pixels[top:bottom, left:right]
+                region[mask[top - y:bottom - y, left - x:right - x]] = self.TEXT
+
+            x += advance
+
+    # ****************************************************************************************************
+
+    def encode(self, pixels, palette):
+        """
+        Encodes a pixel buffer as a PNG image (8 bit palette colour, no filtering, zlib compressed).
+
+        Parameters
+        ----------
+        :param pixels: the height x width array of uint8 palette indices.
+        :param palette: the palette, as a byte string of RGB triples.
+
+        Returns
+        ----------
+        :return: the PNG image as a byte string.
+
+        """
+        height, width = pixels.shape
+
+        # Each row of image data starts with its filter type, here 0 (none).
+        rows = numpy.zeros((height, width + 1), dtype=numpy.uint8)
+        rows[:, 1:] = pixels
+
+        def chunk(kind, data):
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+        return ''.join(['\x89PNG\r\n\x1a\n',
+                        chunk('IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0)),
+                        chunk('PLTE', palette),
+                        chunk('IDAT', zlib.compress(rows.tostring(), self.COMPRESSION)),
+                        chunk('IEND', '')])
+
+    # ****************************************************************************************************
@@ -0,0 +1,331 @@
+"""
+**************************************************************************
+
+ ProfileSparkline.py
+
+**************************************************************************
+ Description:
+
+ Renders pulse profiles (.asc files) as tiny inline SVG sparklines, for
+ the test vector table. A sparkline is a few hundred bytes of markup, so
+ it can be embedded directly in the page, instead of the page fetching a
+ PNG for every row.
+
+ Each profile is centred on its peak (as in CreatePulseProfilePng.py),
+ scaled to 0-1, then downsampled to a fixed number of points using a
+ min/max envelope, i.e. the profile is split into equal blocks, and the
+ minimum and maximum of each block kept (see ProfileBatch.py). So narrow
+ pulses survive downsampling. The envelope is drawn as a single filled SVG
+ path, on an integer grid. The profiles not already cached are read, and
+ drawn, together in batches of up to BATCH_SIZE (see findAll).
+
+ Sparklines are cached by a hash of the profile content, and the render
+ settings. If a cache path is supplied, the cache persists between builds
+ in a JSON file, so a rebuild only reads and hashes the .asc files.
+
+ If a profile library is supplied (see ProfileLibrary.py), profiles in it
+ are read from the library instead, using the content hashes it records.
+ So a rebuild reads no .asc files at all.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+import json
+import hashlib
+import numpy
+
+# For common operations
+from Common import Common
+
+# For centring and downsampling profiles.
+from ProfileBatch import ProfileBatch
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class ProfileSparkline(object):
+    """
+    Renders, and caches, the SVG sparklines of pulse profiles.
+    """
+
+    # The number of profiles read, and drawn, together (see ProfileBatch).
+    BATCH_SIZE = 256
+
+    # ****************************************************************************************************
+
+    def __init__(self, points=64, width=128, height=32, cache_path=None, library=None):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param points: the number of points each profile is downsampled to.
+        :param width: the displayed width of a sparkline in pixels.
+        :param height: the displayed height of a sparkline in pixels, also the
+                       number of distinct heights on the integer grid.
+        :param cache_path: an optional JSON file to persist sparklines in between builds.
+        :param library: an optional profile library to read profiles from, see ProfileLibrary.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.points = points
+        self.width = width
+        self.height = height
+        self.cache_path = cache_path
+        self.library = library
+
+        # The render settings, hashed with the profile content.
+        self.settings = '%d,%d' % (points, height)
+
+        # Maps content hashes to SVG paths, from the previous build, and used in this build.
+        self.cache = {}
+        self.used = {}
+
+        # Maps .asc paths to their SVG paths, so each file is read once per build.
+        self.profiles = {}
+
+        # Counts cache use, for summary output.
+        self.hits = 0
+        self.misses = 0
+
+        if cache_path is not None and Common.file_exists(cache_path):
+            try:
+                self.cache = json.loads(Common.read_file_as_string(cache_path) or '{}')
+            except ValueError:
+                print '\t\tIgnoring invalid sparkline cache: ', cache_path
+
+    # ****************************************************************************************************
+
+    def find(self, asc_path):
+        """
+        Gets the SVG path of a profile's sparkline, rendering it if it is not cached.
+
+        Parameters
+        ----------
+        :param asc_path: the path of the .asc file.
+
+        Returns
+        ----------
+        :return: the SVG path data, else None if the profile is missing or invalid.
+
+        """
+        if asc_path not in self.profiles:
+            self.findAll([asc_path])
+
+        return self.profiles[asc_path]
+
+    # ****************************************************************************************************
+
+    def findAll(self, asc_paths):
+        """
+        Gets the SVG paths of several profiles' sparklines. The profiles not already cached
+        are read first, then drawn together as a batch, see paths.
+
+        Parameters
+        ----------
+        :param asc_paths: the paths of the .asc files.
+
+        Returns
+        ----------
+        :return: a list of the SVG path data of each file, with None for missing or invalid profiles.
+
+        """
+        # The .asc path and data of each profile to draw, the content hash of each .asc path
+        # waiting on them, and the SVG path drawn for each content hash.
+        misses = []
+        keys = {}
+        drawn = {}
+
+        for asc_path in asc_paths:
+
+            if asc_path in self.profiles or asc_path in keys:
+                continue
+
+            path = None
+
+            # Profiles are named by their .asc file, i.e. the EPN profile name, in the library.
+            epn = os.path.basename(asc_path)[:-len('.asc')]
+
+            try:
+                if self.library is not None and self.library.has(epn):
+                    content = self.library.digest(epn)
+                    read = lambda: self.library.profile(epn).astype(numpy.float64)
+                else:
+                    with open(asc_path, 'rb') as f:
+                        content = f.read()
+                    read = lambda: numpy.array(content.split(), dtype=numpy.float64)
+
+                key = hashlib.md5(self.settings + '\n' + content).hexdigest()
+
+                if key in self.used or key in self.cache:
+                    self.hits += 1
+                    path = self.used.get(key) or self.cache[key]
+                    self.used[key] = path
+                else:
+                    # Profiles with the same content as one already waiting are not read again.
+                    if key not in drawn:
+                        misses.append((asc_path, read()))
+                        drawn[key] = None
+
+                    keys[asc_path] = key
+                    continue
+
+            except IOError:
+                pass  # No profile, so the page falls back to the profile image.
+            except ValueError:
+                print '\t\tError converting numerical values to float in file: ', asc_path
+
+            self.profiles[asc_path] = path
+
+        for (asc_path, data), path in zip(misses, self.paths([data for asc_path, data in misses])):
+            drawn[keys[asc_path]] = path
+
+        self.misses += len(misses)
+        self.hits += len(keys) - len(misses)
+
+        for asc_path, key in keys.iteritems():
+            self.profiles[asc_path] = drawn[key]
+
+            if drawn[key] is not None:
+                self.used[key] = drawn[key]
+
+        return [self.profiles[asc_path] for asc_path in asc_paths]
+
+    # ****************************************************************************************************
+
+    def path(self, data):
+        """
+        Downsamples a profile to a min/max envelope, and draws it as an SVG path.
+
+        Parameters
+        ----------
+        :param data: the profile data points, as a numpy array.
+
+        Returns
+        ----------
+        :return: the SVG path data, else None if there are no data points.
+
+        """
+        return self.paths([data])[0]
+
+    # ****************************************************************************************************
+
+    def paths(self, profiles):
+        """
+        Downsamples several profiles to min/max envelopes, and draws each as an SVG path.
+        The profiles are centred, scaled and downsampled together, see ProfileBatch.
+
+        Parameters
+        ----------
+        :param profiles: a list of the profiles' data points, as numpy arrays.
+
+        Returns
+        ----------
+        :return: a list of the SVG path data of each profile, with None for those without data points.
+
+        """
+        results = [None] * len(profiles)
+
+        # The index in profiles of each profile with data points.
+        numbers = [number for number, data in enumerate(profiles) if len(data) > 0]
+
+        # Centre the data such that the maximum value is in the centre bin, then scale it to 0-1.
+        batch = ProfileBatch([profiles[number] for number in numbers])
+        batch.centre()
+        batch.normalise()
+
+        lows, highs = batch.envelope(self.points)
+
+        # SVG y coordinates increase downwards.
+        tops = numpy.rint(self.height * (1.0 - highs)).astype(int)
+        bottoms = numpy.rint(self.height * (1.0 - lows)).astype(int)
+
+        # Along the top of the envelope, then back along the bottom. The coordinates
+        # following the first are implicitly joined by lines.
+        xs = numpy.arange(self.points)
+        outlines = numpy.empty((len(numbers), 2 * self.points, 2), dtype=int)
+        outlines[:, :, 0] = numpy.concatenate([xs, xs[::-1]])
+        outlines[:, :, 1] = numpy.concatenate([tops, bottoms[:, ::-1]], axis=1)
+
+        template = 'M' + ' '.join(['%d %d'] * (2 * self.points)) + 'Z'
+
+        for row, number in enumerate(numbers):
+            results[number] = template % tuple(outlines[row].ravel().tolist())
+
+        return results
+
+    # ****************************************************************************************************
+
+    def svg(self, path, title):
+        """
+        Wraps a sparkline's SVG path as inline SVG markup.
+
+        Parameters
+        ----------
+        :param path: the SVG path data, see find.
+        :param title: the title of the sparkline, i.e. the EPN profile name.
+
+        Returns
+        ----------
+        :return: the SVG markup.
+
+        """
+        return ('<svg class="sparkline" width="%d" height="%d" viewBox="0 -1 %d %d" preserveAspectRatio="none">'
+                '<title>%s</title><path d="%s" fill="#00a290" stroke="#00a290" stroke-width="1" '
+                'vector-effect="non-scaling-stroke"/></svg>') % (self.width, self.height, self.points - 1,
+                                                                 self.height + 2, title, path)
+
+    # ****************************************************************************************************
+
+    def save(self):
+        """
+        Writes the sparklines used in this build to the cache file, via a temporary file.
+        Sparklines of profiles that are no longer used are not carried over.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        N/A
+
+        """
+        if self.cache_path is None:
+            return
+
+        temp_path = self.cache_path + '.' + str(os.getpid()) + '.tmp'
+
+        with open(temp_path, 'w') as f:
+            json.dump(self.used, f, separators=(',', ':'))
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(self.cache_path)
+
+        os.rename(temp_path, self.cache_path)
+
+    # ****************************************************************************************************
@@ -0,0 +1,270 @@
+"""
+**************************************************************************
+
+ SearchIndex.py
+
+**************************************************************************
+ Description:
+
+ Builds a prefix search index over the test vector catalogue at page build
+ time, so that the page can find test vectors by filename, EPN profile
+ (i.e. pulsar name) or MD5 hash, without scanning every row in the browser.
+
+ Every row contributes the following search keys, all lower case,
+
+ - the filename, e.g. fakepulsar_5_3078.189_850.2_+49.4_10_j0749-4247_436.fil
+ - the EPN profile, e.g. j0749-4247_436, which also matches the pulsar name.
+ - the EPN profile without its J/B prefix, e.g. 0749-4247_436.
+ - the MD5 hash.
+
+ The filename and MD5 keys are (nearly) unique to each row, so each of
+ their (key, row ID) pairs is added to an external merge sort (see
+ ExternalSorter.py), and spilled to disk once the memory budget is used,
+ rather than held in memory for the whole catalogue. The EPN profile keys
+ are shared by many rows, so their row IDs are held in memory, as compact
+ arrays of integers. The keys from both are merged in sorted order, and
+ split into shards of about
+ shard_bytes of JSON each, so a shard stays small however many row IDs its
+ keys match. Each shard is described in the data feed manifest by the
+ shortest prefix of its first key that sorts after the previous shard. So
+ a lookup only downloads the shards whose prefix range overlaps the query,
+ then binary searches within them.
+
+ Row IDs are the positions of the test vectors in the JSON data feed.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+import heapq
+import itertools
+from array import array
+
+# For sorting the search keys within a memory budget
+from ExternalSorter import ExternalSorter
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class SearchIndex(object):
+    """
+    Collects the search keys of each test vector as the catalogue is streamed,
+    then writes out the sharded search index files.
+    """
+
+    # ****************************************************************************************************
+
+    def __init__(self, shard_bytes=128 * 1024, memory=64 * 1024 * 1024):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param shard_bytes: the approximate size of each search index shard, in bytes of JSON.
+        :param memory: the memory budget for the filename and MD5 keys, in bytes, beyond which
+                       they are spilled to disk.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.shard_bytes = shard_bytes
+
+        # Sorts the (filename or MD5 key, row ID) pairs. As row IDs are added in ascending
+        # order, and the sort is stable, the row IDs of each key stay in ascending order.
+        self.postings = ExternalSorter(lambda row: row[0], memory)
+
+        # The row IDs matching each EPN profile key, in ascending order.
+        self.profiles = {}
+
+    # ****************************************************************************************************
+
+    def add(self, row_id, parameters):
+        """
+        Adds a test vector to the index.
+
+        Parameters
+        ----------
+        :param row_id: the row ID of the test vector.
+        :param parameters: the test vector parameters, see PageBuilder.readTestVectors.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        epn = parameters[7].lower()
+        profile_keys = set([epn])
+
+        # So users can search for 1909+1102, as well as J1909+1102.
+        if epn[:1] in ('j', 'b'):
+            profile_keys.add(epn[1:])
+
+        row_key = str(row_id)
+
+        for key in set([parameters[0].lower(), parameters[13].lower()]):
+            if key != '' and key not in profile_keys:
+                self.postings.add((key, row_key))
+
+        for key in profile_keys:
+            if key != '':
+                rows = self.profiles.get(key)
+
+                if rows is None:
+                    rows = self.profiles[key] = array('l')
+
+                rows.append(row_id)
+
+    # ****************************************************************************************************
+
+    def write(self, feed_dir, write_json):
+        """
+        Writes the search index shards to the data feed directory. Each shard is a file
+        search_<n>.json, holding the sorted keys in the shard and the row IDs each matches.
+
+        Parameters
+        ----------
+        :param feed_dir: the data feed directory.
+        :param write_json: the function used to write a JSON file, i.e. PageBuilder.writeJson.
+
+        Returns
+        ----------
+        :return: a description of the shards, for the data feed manifest, and the list of
+                 file names written.
+
+        """
+        bounds = []
+        files = []
+        previous = ''
+
+        # The keys and row IDs of the shard being filled, and its estimated JSON size.
+        keys = []
+        ids = []
+        size = 0
+
+        try:
+            for key, matches in itertools.groupby(self.keys(), lambda match: match[0]):
+
+                # A key both shared by profiles and unique to a row matches the rows of both.
+                matches = list(matches)
+                rows = matches[0][1] if len(matches) == 1 else sorted(itertools.chain(*[
+                    match[1] for match in matches]))
+
+                keys.append(key)
+                ids.append(rows)
+
+                # The key and its row IDs, with their quotes, brackets and commas.
+                size += len(key) + 5 + sum([len(str(row_id)) + 1 for row_id in rows])
+
+                if size >= self.shard_bytes:
+                    previous = self.writeShard(feed_dir, write_json, keys, ids, bounds, files, previous)
+                    keys = []
+                    ids = []
+                    size = 0
+
+            if len(keys) > 0:
+                self.writeShard(feed_dir, write_json, keys, ids, bounds, files, previous)
+
+        finally:
+            self.postings.close()
+
+        return {'bounds': bounds, 'files': files}, files
+
+    # ****************************************************************************************************
+
+    def keys(self):
+        """
+        Gets every search key, and the row IDs it matches, in key order. A key may be
+        returned twice, once from the EPN profile keys, and once from the other keys.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: a generator of (key, list of row IDs) tuples.
+
+        """
+        postings = ((key, [int(row[1]) for row in rows])
+                    for key, rows in itertools.groupby(self.postings.rows(), lambda row: row[0]))
+
+        profiles = ((key, self.profiles[key].tolist()) for key in sorted(self.profiles))
+
+        return heapq.merge(postings, profiles)
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def writeShard(feed_dir, write_json, keys, ids, bounds, files, previous):
+        """
+        Writes a search index shard, and adds it to the shard descriptions.
+
+        Parameters
+        ----------
+        :param feed_dir: the data feed directory.
+        :param write_json: the function used to write a JSON file, i.e. PageBuilder.writeJson.
+        :param keys: the sorted keys in the shard.
+        :param ids: the list of row IDs each key matches.
+        :param bounds: the list of shard bounds, to which the shard's bound is added.
+        :param files: the list of shard file names, to which the shard's file name is added.
+        :param previous: the last key in the previous shard, else '' for the first shard.
+
+        Returns
+        ----------
+        :return: the last key in the shard.
+
+        """
+        file_name = 'search_' + str(len(files)) + '.json'
+
+        write_json(os.path.join(feed_dir, file_name), {'keys': keys, 'ids': ids})
+
+        bounds.append(SearchIndex.shortestPrefix(keys[0], previous))
+        files.append(file_name)
+
+        return keys[-1]
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def shortestPrefix(key, previous):
+        """
+        Finds the shortest prefix of a key that still sorts after the previous key.
+
+        Parameters
+        ----------
+        :param key: the first key in a shard.
+        :param previous: the last key in the previous shard, which sorts before key.
+
+        Returns
+        ----------
+        :return: the prefix.
+
+        """
+        for length in range(1, len(key) + 1):
+            if key[:length] > previous:
+                return key[:length]
+
+        return key
+
+    # ****************************************************************************************************
@@ -0,0 +1,362 @@
+"""
+**************************************************************************
+
+ SitePublisher.py
+
+**************************************************************************
+ Description:
+
+ Prepares the pages written by PageBuilder.py for serving, i.e.
+
+ 1. Minifies the HTML. Indentation, blank lines and comments are removed
+    line by line, so pages of any size are minified without being held in
+    memory. The content of <pre> and <textarea> elements is left alone.
+
+ 2. Fingerprints the JavaScript and CSS files the pages reference, and the
+    batch description file they fetch (i.e. index_batches.json). Each file
+    is copied to a name including a hash of its content, e.g.
+
+        vendor/jquery-2.1.3.min.js -> vendor/jquery-2.1.3.min.1a2b3c4d.js
+
+    and the pages are updated to reference the copy. So the assets can be
+    served with far future cache headers, as a changed file gets a new name.
+    Copies of earlier versions are kept, as unchanged split pages (and
+    pages already in browser caches) may still reference them.
+
+ 3. Writes precompressed siblings of the pages, assets and data feed files,
+    i.e. index.html.gz and index.html.br, for servers that can serve them
+    directly (e.g. nginx gzip_static). The files are compressed in parallel
+    by a pool of processes. The .br files are only written if the brotli
+    module is installed. Siblings newer than their source are not rewritten.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+import re
+import gzip
+import shutil
+import hashlib
+import multiprocessing
+
+# For common operations
+from Common import Common
+
+# Brotli is optional, without it only .gz siblings are written.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class SitePublisher(object):
+    """
+    Minifies, fingerprints and precompresses the generated site.
+    """
+
+    # Local JavaScript and CSS references in the pages, i.e. src='...' or href="...".
+    ASSET_PATTERN = re.compile(r'''(src|href)=(['"])(?![a-z]+:|/|#)([^'"]+\.(?:js|css))\2''')
+
+    # The batch description file a page fetches, i.e. TestVectorBatches.init('index_batches.json').
+    BATCH_PATTERN = re.compile(r'''(TestVectorBatches\.init\()(['"])(?![a-z]+:|/)([^'"]+\.json)\2''')
+
+    # An asset name that is already fingerprinted, i.e. <name>.<8 hex digits>.<js|css|json>.
+    FINGERPRINTED = re.compile(r'\.[0-9a-f]{8}\.(js|css|json)$')
+
+    # Single line HTML comments.
+    COMMENT_PATTERN = re.compile(r'<!--.*?-->')
+
+    # ****************************************************************************************************
+
+    def __init__(self, level=9, workers=None):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param level: the compression level, 1 (fastest) to 9 (smallest).
+        :param workers: the number of compression processes, by default one per CPU.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.level = level
+        self.workers = workers
+
+        # Maps asset paths to their fingerprinted paths.
+        self.assets = {}
+
+    # ****************************************************************************************************
+
+    def publish(self, output_file):
+        """
+        Publishes the page at the output path, plus any split pages and data feed files
+        written alongside it.
+
+        Parameters
+        ----------
+        :param output_file: the page written by PageBuilder (i.e. index.html).
+
+        Returns
+        ----------
+        :return: True if the site was published, else False.
+
+        """
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        stem = os.path.splitext(os.path.basename(output_file))[0]
+
+        # The split pages (output format 3) and the data feed (output format 2).
+        pages = [os.path.abspath(output_file)]
+        data = []
+
+        for file_name in sorted(os.listdir(output_dir)):
+            if file_name.startswith(stem + '_') and file_name.endswith('.html'):
+                pages.append(os.path.join(output_dir, file_name))
+
+        feed_dir = os.path.join(output_dir, stem + '_data')
+        if Common.dir_exists(feed_dir):
+            data = [os.path.join(feed_dir, name) for name in sorted(os.listdir(feed_dir)) if name.endswith('.json')]
+
+        minified = 0
+        for page in pages:
+            if self.minifyPage(page, output_dir):
+                minified += 1
+
+        files = pages + sorted(set(os.path.join(output_dir, path) for path in self.assets.values())) + data
+
+        tasks = [(path, kind, self.level) for path in files for kind in self.compressors()]
+        pool = multiprocessing.Pool(self.workers)
+        try:
+            results = pool.map(compressFile, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+        if None in results:
+            print '\t\tUnable to compress one or more files'
+            return False
+
+        print '\t\tPages minified: ', str(minified), ' of ', str(len(pages))
+        print '\t\tAssets fingerprinted: ', str(len(self.assets))
+        print '\t\tFiles compressed: ', str(sum(results)), ' (', ', '.join(self.compressors()), ')'
+
+        return True
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def compressors():
+        """
+        Gets the kinds of precompressed sibling that can be written.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: a list of file extensions, i.e. ['gz', 'br'].
+
+        """
+        if brotli is None:
+            return ['gz']
+
+        return ['gz', 'br']
+
+    # ****************************************************************************************************
+
+    def minifyPage(self, page, output_dir):
+        """
+        Minifies a page, and points its asset references at the fingerprinted assets.
+        The page is only replaced if it changed, so republishing leaves it untouched.
+
+        Parameters
+        ----------
+        :param page: the path of the page.
+        :param output_dir: the directory asset references are relative to.
+
+        Returns
+        ----------
+        :return: True if the page changed, else False.
+
+        """
+        temp_path = page + '.' + str(os.getpid()) + '.tmp'
+        changed = False
+        preformatted = False
+
+        with open(page) as source:
+            with open(temp_path, 'w') as f:
+                for line in source:
+
+                    if preformatted:
+                        minified = line
+                    else:
+                        minified = self.COMMENT_PATTERN.sub('', line).strip()
+                        minified = self.ASSET_PATTERN.sub(lambda m: self.rewriteAsset(m, output_dir), minified)
+                        minified = self.BATCH_PATTERN.sub(lambda m: self.rewriteAsset(m, output_dir, ''), minified)
+
+                        if minified != '':
+                            minified += '\n'
+
+                    # Text inside <pre> (i.e. the batch popups) is written as is.
+                    lower = line.lower()
+                    if '<pre' in lower or '<textarea' in lower:
+                        preformatted = True
+                    if '</pre>' in lower or '</textarea>' in lower:
+                        preformatted = False
+
+                    changed = changed or minified != line
+                    f.write(minified)
+
+        if not changed:
+            Common.delete_file(temp_path)
+            return False
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(page)
+
+        os.rename(temp_path, page)
+
+        return True
+
+    # ****************************************************************************************************
+
+    def rewriteAsset(self, match, output_dir, separator='='):
+        """
+        Replaces an asset reference with a reference to its fingerprinted copy.
+
+        Parameters
+        ----------
+        :param match: the ASSET_PATTERN or BATCH_PATTERN match.
+        :param output_dir: the directory asset references are relative to.
+        :param separator: the text between the first group of the match and the quoted path.
+
+        Returns
+        ----------
+        :return: the updated reference.
+
+        """
+        attribute, quote, path = match.group(1), match.group(2), match.group(3)
+
+        return attribute + separator + quote + self.fingerprint(path, output_dir) + quote
+
+    # ****************************************************************************************************
+
+    def fingerprint(self, path, output_dir):
+        """
+        Copies an asset to a name including a hash of its content.
+
+        Parameters
+        ----------
+        :param path: the asset path, relative to the output directory.
+        :param output_dir: the output directory.
+
+        Returns
+        ----------
+        :return: the fingerprinted path, else the original path if the asset does not exist.
+
+        """
+        if path in self.assets:
+            return self.assets[path]
+
+        full_path = os.path.join(output_dir, path)
+
+        if self.FINGERPRINTED.search(path) or not Common.file_exists(full_path):
+            return path
+
+        with open(full_path, 'rb') as f:
+            digest = hashlib.md5(f.read()).hexdigest()[:8]
+
+        base, extension = os.path.splitext(path)
+        fingerprinted = base + '.' + digest + extension
+        fingerprinted_path = os.path.join(output_dir, fingerprinted)
+
+        if not Common.file_exists(fingerprinted_path):
+            shutil.copyfile(full_path, fingerprinted_path)
+
+        self.assets[path] = fingerprinted
+
+        return fingerprinted
+
+    # ****************************************************************************************************
+
+
+# ******************************
+#
+# PROCESS POOL WORKER
+#
+# ******************************
+
+def compressFile(task):
+    """
+    Writes a precompressed sibling of a file. This is a module level function, so that
+    it can be passed to a multiprocessing pool.
+
+    Parameters
+    ----------
+    :param task: a tuple of (file path, 'gz' or 'br', compression level 1-9).
+
+    Returns
+    ----------
+    :return: 1 if the sibling was written, 0 if it was already up to date, else None on error.
+
+    """
+    path, kind, level = task
+    sibling = path + '.' + kind
+
+    if Common.file_exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(path):
+        return 0
+
+    temp_path = sibling + '.' + str(os.getpid()) + '.tmp'
+
+    try:
+        with open(path, 'rb') as source:
+            with open(temp_path, 'wb') as f:
+
+                if kind == 'gz':
+                    # A fixed timestamp, so unchanged files compress identically.
+                    compressed = gzip.GzipFile(os.path.basename(path), 'wb', level, f, 0)
+                    shutil.copyfileobj(source, compressed)
+                    compressed.close()
+                else:
+                    # Brotli levels run from 0 to 11, so 9 maps to 11.
+                    compressor = brotli.Compressor(quality=min(11, level + level // 9 * 2))
+                    for block in iter(lambda: source.read(1 << 20), ''):
+                        f.write(compressor.process(block))
+                    f.write(compressor.finish())
+
+    except (IOError, OSError) as e:
+        print '\t\tUnable to compress: ', path, e
+        Common.delete_file(temp_path)
+        return None
+
+    if Common.is_windows():
+        Common.delete_file(sibling)
+
+    os.rename(temp_path, sibling)
+
+    return 1
@@ -0,0 +1,403 @@
+"""
+**************************************************************************
+
+ TestVectorCorpusGenerator.py
+
+**************************************************************************
+ Description:
+
+ Generates a synthetic corpus of SKA test vector files, so that the
+ directory parser and page builder can be exercised at scale (100k+
+ vectors) without access to the real test vector archive. The files
+ created follow the naming convention of the real test vectors, i.e.
+
+ <Type>_<Batch>_<Period>_<DM>_<Z>_<S/N>_<EPN Pulsar Name>_<Freq MHz>.fil
+
+ Where the EPN Pulsar Name and Freq components are taken from the real
+ EPN profile names found in an .asc directory (e.g. data/ASC). Each file
+ begins with a valid SIGPROC filterbank header, and is then padded out to
+ a configurable size. The padding can be sparse (i.e. the file occupies
+ almost no disk space), or real zero valued data. A Batch_<N>.txt file is
+ also written for each batch generated.
+
+ These files are not proper test vectors, and should not be processed in
+ practice. They are simply used for testing and benchmarking.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+import random
+import struct
+import datetime
+
+# For common operations
+from Common import Common
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestVectorCorpusGenerator(object):
+    """
+    Creates a directory of synthetic test vector files, plus the batch files
+    that describe them. The output directory is structured as follows:
+
+    <output_dir>/vectors/Batch_<N>/<Test vector files>.fil
+    <output_dir>/batches/Batch_<N>.txt
+
+    So it can be passed directly to TestVectorDirectoryParserApp.py (--dir)
+    and PageBuilderApp.py (--batch).
+    """
+
+    # The test vector types that appear in real test vector names.
+    VECTOR_TYPES = ['FakePulsar', 'RealPulsar']
+
+    # Size of the block used when writing non-sparse padding.
+    BLOCK_SIZE = 1024 * 1024
+
+    # ****************************************************************************************************
+
+    def __init__(self, seed=1):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param seed: the seed for the random number generator, so that a corpus is reproducible.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    # ****************************************************************************************************
+
+    def generate(self, output_dir, asc_dir, vector_count, batch_count, file_size, sparse):
+        """
+        Generates the synthetic corpus.
+
+        Parameters
+        ----------
+        :param output_dir: the directory to write the vectors and batch files to.
+        :param asc_dir: path to the directory containing .asc files, used to obtain real EPN profile names.
+        :param vector_count: the number of test vectors to create.
+        :param batch_count: the number of batches to spread the test vectors across.
+        :param file_size: the size of each test vector in bytes (the header is always written in full).
+        :param sparse: if True the padding is written as a sparse hole, else as real zero bytes.
+
+        Returns
+        ----------
+        :return: the number of test vectors created.
+
+        """
+
+        profiles = self.getProfileNames(asc_dir)
+
+        if len(profiles) == 0:
+            print "\t\tNo .asc profiles found in: ", asc_dir
+            return 0
+
+        print "\t\tEPN profiles available: ", str(len(profiles))
+
+        vector_dir = os.path.join(output_dir, 'vectors')
+        batch_dir = os.path.join(output_dir, 'batches')
+
+        Common.create_dir(vector_dir)
+        Common.create_dir(batch_dir)
+
+        start = datetime.datetime.now()  # Used to measure processing time.
+
+        # Write out the batch files first, as the header of each vector
+        # depends on the parameters of the batch it belongs to.
+        batches = {}
+        for batch in range(1, batch_count + 1):
+            batches[batch] = self.createBatchParameters(batch)
+            self.writeBatchFile(batch_dir, batch, batches[batch])
+            Common.create_dir(os.path.join(vector_dir, 'Batch_' + str(batch)))
+
+        # File names must be unique, so keep track of those created.
+        names_seen = set()
+        vectors_created = 0
+
+        while vectors_created < vector_count:
+
+            # Spread the vectors evenly across the batches.
+            batch = (vectors_created % batch_count) + 1
+            profile = self.rng.choice(profiles)
+            file_name = self.createVectorName(batch, profile)
+
+            if file_name in names_seen:
+                continue
+
+            names_seen.add(file_name)
+
+            full_file_path = os.path.join(vector_dir, 'Batch_' + str(batch), file_name)
+            self.writeVector(full_file_path, profile, batches[batch], file_size, sparse)
+
+            vectors_created += 1
+
+            if vectors_created % 10000 == 0:
+                print "\t\tVectors created: ", str(vectors_created)
+
+        end = datetime.datetime.now()
+
+        print "\t\tTotal test vectors created: ", str(vectors_created)
+        print "\t\tTotal batches created: ", str(batch_count)
+        print "\t\tExecution time: ", str(end - start)
+
+        return vectors_created
+
+    # ****************************************************************************************************
+
+    def getProfileNames(self, asc_dir):
+        """
+        Gets the names of the EPN profiles in the .asc directory. For example
+        the file J0006+1834_430.asc yields the profile name J0006+1834_430.
+        Names with more than three '_' separated parts (i.e. J0942-5552_1382_1_2)
+        are skipped, as TestVectorDirectoryParser reads the EPN pulsar name and
+        frequency from fixed positions in the vector name, and so misreads them.
+
+        Parameters
+        ----------
+        :param asc_dir: path to the directory containing .asc files.
+
+        Returns
+        ----------
+        :return: a sorted list of profile names, empty if none are found.
+
+        """
+
+        if asc_dir is None or not Common.dir_exists(asc_dir):
+            return []
+
+        profiles = []
+        for file_name in os.listdir(asc_dir):
+            if file_name.endswith('.asc') and 1 < len(file_name.split('_')) <= 3:
+                profiles.append(file_name.replace('.asc', ''))
+
+        # Sort so that the corpus depends only on the seed, not on directory order.
+        profiles.sort()
+
+        return profiles
+
+    # ****************************************************************************************************
+
+    def createVectorName(self, batch, profile):
+        """
+        Creates a realistic test vector file name of the form,
+
+        <Type>_<Batch>_<Period>_<DM>_<Z>_<S/N>_<EPN Pulsar Name>_<Freq MHz>.fil
+
+        Parameters
+        ----------
+        :param batch: the batch number the vector belongs to.
+        :param profile: the EPN profile name, e.g. J0006+1834_430 or J0108-1431_436_1.
+
+        Returns
+        ----------
+        :return: the test vector file name.
+
+        """
+
+        vector_type = self.rng.choice(self.VECTOR_TYPES)
+
+        # Periods are log-uniform between 1 ms (MSPs) and 10 s.
+        period = 10 ** self.rng.uniform(0.0, 4.0)
+        dm = self.rng.uniform(0.0, 2000.0)
+        snr = self.rng.choice([5, 8, 10, 15, 20, 30, 50, 100])
+
+        # Most vectors are unaccelerated, the remainder have a signed
+        # acceleration recorded as, for example, +1.1 or -2.2.
+        if self.rng.random() < 0.5:
+            z = '0.0'
+        else:
+            z = '%+.1f' % self.rng.uniform(-50.0, 50.0)
+
+        components = [vector_type, str(batch), '%.3f' % period, '%.1f' % dm, z, str(snr), profile]
+
+        return '_'.join(components) + '.fil'
+
+    # ****************************************************************************************************
+
+    def createBatchParameters(self, batch):
+        """
+        Creates the observational parameters used for a batch.
+
+        Parameters
+        ----------
+        :param batch: the batch number.
+
+        Returns
+        ----------
+        :return: a list of (name, value) pairs, in the order they appear in a batch file.
+
+        """
+
+        fc = self.rng.choice([700, 1400])
+        bandwidth = self.rng.choice([200, 300, 400])
+        nchan = self.rng.choice([256, 512, 1024, 4096])
+
+        return [('Tobs', self.rng.choice([300, 600, 900])),
+                ('Tsamp', self.rng.choice([32, 64, 128])),
+                ('Fc', fc),
+                ('Fh', fc + bandwidth / 2),
+                ('Fch1', fc + bandwidth / 2),
+                ('deltav', round(float(bandwidth) / nchan, 6)),
+                ('B', bandwidth),
+                ('Nchan', nchan),
+                ('Nbit', 8),
+                ('Seed', self.seed * 100000 + batch)]
+
+    # ****************************************************************************************************
+
+    def writeBatchFile(self, batch_dir, batch, parameters):
+        """
+        Writes a Batch_<N>.txt file describing the batch, in the same
+        format as the example batch file in data/batches.
+
+        Parameters
+        ----------
+        :param batch_dir: the directory to write the batch file to.
+        :param batch: the batch number.
+        :param parameters: the batch parameters, as returned by createBatchParameters.
+
+        Returns
+        ----------
+        N/A
+
+        """
+
+        path = os.path.join(batch_dir, 'Batch_' + str(batch) + '.txt')
+
+        text = "Description:\n\nThis is a synthetic batch, generated for scaling tests only.\n\n"
+        text += '\n'.join([name + ': ' + str(value) for name, value in parameters])
+
+        Common.delete_file(path)
+        Common.append_to_file(path, text)
+
+    # ****************************************************************************************************
+
+    def writeVector(self, path, profile, batch_parameters, file_size, sparse):
+        """
+        Writes a single synthetic test vector, i.e. a SIGPROC header followed
+        by padding up to the requested file size.
+
+        Parameters
+        ----------
+        :param path: the full path of the vector to create.
+        :param profile: the EPN profile name, used as the source name.
+        :param batch_parameters: the batch parameters, as returned by createBatchParameters.
+        :param file_size: the size of the vector in bytes.
+        :param sparse: if True the padding is written as a sparse hole, else as real zero bytes.
+
+        Returns
+        ----------
+        N/A
+
+        """
+
+        header = self.createSigprocHeader(profile.split('_')[0], dict(batch_parameters))
+
+        with open(path, 'wb') as f:
+            f.write(header)
+
+            remaining = file_size - len(header)
+
+            if remaining > 0:
+                if sparse:
+                    # Extending the file via truncate leaves a hole, so no
+                    # data blocks are allocated on file systems that support it.
+                    f.truncate(file_size)
+                else:
+                    block = b'\x00' * self.BLOCK_SIZE
+                    while remaining > 0:
+                        f.write(block[:min(remaining, self.BLOCK_SIZE)])
+                        remaining -= self.BLOCK_SIZE
+
+    # ****************************************************************************************************
+
+    def createSigprocHeader(self, source_name, batch_parameters):
+        """
+        Creates a SIGPROC filterbank header. Each keyword is written as a
+        length prefixed string, followed by its binary value.
+
+        Parameters
+        ----------
+        :param source_name: the name of the source observed.
+        :param batch_parameters: a dictionary of the batch parameters.
+
+        Returns
+        ----------
+        :return: the header as a byte string.
+
+        """
+
+        nchan = batch_parameters['Nchan']
+
+        header = self.sigprocString('HEADER_START')
+        header += self.sigprocString('source_name') + self.sigprocString(source_name)
+        header += self.sigprocString('machine_id') + struct.pack('<i', 10)
+        header += self.sigprocString('telescope_id') + struct.pack('<i', 4)
+        header += self.sigprocString('data_type') + struct.pack('<i', 1)
+        header += self.sigprocString('fch1') + struct.pack('<d', float(batch_parameters['Fch1']))
+        header += self.sigprocString('foff') + struct.pack('<d', -float(batch_parameters['B']) / nchan)
+        header += self.sigprocString('nchans') + struct.pack('<i', nchan)
+        header += self.sigprocString('nbits') + struct.pack('<i', batch_parameters['Nbit'])
+        header += self.sigprocString('tstart') + struct.pack('<d', 50000.0)
+        header += self.sigprocString('tsamp') + struct.pack('<d', batch_parameters['Tsamp'] * 1e-6)
+        header += self.sigprocString('nifs') + struct.pack('<i', 1)
+        header += self.sigprocString('HEADER_END')
+
+        return header
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def sigprocString(value):
+        """
+        Encodes a string the way SIGPROC expects, i.e. a 32 bit length followed by the characters.
+
+        Parameters
+        ----------
+        :param value: the string to encode.
+
+        Returns
+        ----------
+        :return: the encoded byte string.
+
+        """
+        return struct.pack('<i', len(value)) + value.encode('ascii')
+
+    # ****************************************************************************************************
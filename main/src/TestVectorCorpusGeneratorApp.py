@@ -0,0 +1,179 @@
+"""
+    **************************************************************************
+    |                                                                        |
+    |                 TestVectorCorpusGeneratorApp.py 1.0                    |
+    |                                                                        |
+    **************************************************************************
+    | Description:                                                           |
+    |                                                                        |
+    | Generates a synthetic corpus of test vector files and batch files, for |
+    | scaling tests of the directory parser and page builder. This code runs |
+    | on python 2.4 or later.                                                |
+    **************************************************************************
+    | Author: Rob Lyon                                                       |
+    | Email : robert.lyon@postgrad.manchester.ac.uk                          |
+    | web   : www.scienceguyrob.com                                          |
+    **************************************************************************
+    | Required Command Line Arguments:                                       |
+    |                                                                        |
+    | --out (string) path to the directory to write the corpus to.           |
+    |                                                                        |
+    | --asc (string) path to the directory containing .asc files.            |
+    |                                                                        |
+    **************************************************************************
+    | Optional Command Line Arguments:                                       |
+    |                                                                        |
+    | -n (int) the number of test vectors to create (default 1000).          |
+    |                                                                        |
+    | -b (int) the number of batches to create (default 10).                 |
+    |                                                                        |
+    | --size (int) the size of each test vector in bytes (default 4096).     |
+    |                                                                        |
+    | --sparse write the vector padding as sparse holes.                     |
+    |                                                                        |
+    | --seed (int) the random seed, so a corpus is reproducible (default 1). |
+    |                                                                        |
+    **************************************************************************
+    | License:                                                               |
+    |                                                                        |
+    | Code made available under the GPLv3 (GNU General Public License), that |
+    | allows you to copy, modify and redistribute the code as you see fit    |
+    | (http://www.gnu.org/copyleft/gpl.html). Though a mention to the        |
+    | original author using the citation above in derivative works, would be |
+    | very much appreciated.                                                 |
+    **************************************************************************
+
+"""
+
+# Command Line processing Imports:
+from optparse import OptionParser
+
+# For general purposes
+import sys
+import datetime
+
+# For common operations.
+from TestVectorCorpusGenerator import TestVectorCorpusGenerator
+from Common import Common
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestVectorCorpusGeneratorApp(object):
+    """
+    Generates a synthetic test vector corpus.
+
+    """
+
+    # ******************************
+    #
+    # MAIN METHOD AND ENTRY POINT.
+    #
+    # ******************************
+
+    def main(self, args=None):
+        """
+        Main entry point for the Application.
+
+        Parameters
+        ----------
+        :param args: command line arguments.
+
+        Returns
+        ----------
+        :return: N/A
+
+        Examples
+        --------
+        >>> python TestVectorCorpusGeneratorApp.py --out corpus --asc data/ASC -n 100000 -b 50 --sparse
+
+        """
+        # ****************************************
+        #         Execution information
+        # ****************************************
+
+        print(__doc__)
+
+        # ****************************************
+        #    Command line argument processing
+        # ****************************************
+
+        # Python 2.4 argument processing.
+        parser = OptionParser()
+
+        # REQUIRED ARGUMENTS
+        parser.add_option("--out", action="store", dest="out", help='Path to the output directory (required).', default=None)
+        parser.add_option("--asc", action="store", dest="asc", help='Path to the .asc directory (required).', default=None)
+
+        # OPTIONAL ARGUMENTS
+        parser.add_option("-n", type="int", dest="count", help='Number of test vectors to create (optional).', default=1000)
+        parser.add_option("-b", type="int", dest="batches", help='Number of batches to create (optional).', default=10)
+        parser.add_option("--size", type="int", dest="size", help='Size of each test vector in bytes (optional).', default=4096)
+        parser.add_option("--sparse", action="store_true", dest="sparse", help='Write sparse test vectors (optional).', default=False)
+        parser.add_option("--seed", type="int", dest="seed", help='Random seed (optional).', default=1)
+
+        (args, options) = parser.parse_args()
+
+        # Update variables with command line parameters.
+        output_dir = args.out
+        asc_dir    = args.asc
+
+        ############################################################
+        #              Check user supplied parameters              #
+        ############################################################
+
+        # Check the output directory is valid...
+        if output_dir is None:
+            print "No valid output directory supplied, exiting."
+            sys.exit()
+        elif not Common.is_path_valid(output_dir):
+            print "No valid output directory supplied, exiting."
+            sys.exit()
+
+        # Check the directory is valid...
+        if asc_dir is None:
+            print "No valid .asc directory supplied, exiting."
+            sys.exit()
+        elif not Common.dir_exists(asc_dir):
+            print "No valid .asc directory supplied, exiting."
+            sys.exit()
+
+        if args.count < 1 or args.batches < 1:
+            print "The number of test vectors and batches must be at least 1, exiting."
+            sys.exit()
+
+        if args.size < 0:
+            print "The test vector size cannot be negative, exiting."
+            sys.exit()
+
+        ############################################################
+        #                 Start generating the corpus              #
+        ############################################################
+
+        print "\tGenerating: ", output_dir
+
+        # Used to measure run time.
+        start = datetime.datetime.now()
+
+        generator = TestVectorCorpusGenerator(args.seed)
+        generator.generate(output_dir, asc_dir, args.count, args.batches, args.size, args.sparse)
+
+        # Finally get the time that the procedure finished.
+        end = datetime.datetime.now()
+
+        ############################################################
+        #                    Summarise outcome                     #
+        ############################################################
+
+        print "\tFinished generating"
+        print "\tExecution time: ", str(end - start)
+        print "Done."
+
+    # ****************************************************************************************************
+
+if __name__ == '__main__':
+    TestVectorCorpusGeneratorApp().main()
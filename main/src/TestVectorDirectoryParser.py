@@ -56,12 +56,16 @@
 
 # For general purposes
 import os
+import random
 import datetime
+import threading
+import Queue
 import hashlib
 import DataConversions
 
 # For common operations
 from Common import Common
+from HashCache import HashCache
 
 
 # ******************************
@@ -75,18 +79,70 @@ class TestVectorDirectoryParser(object):
     Parses a directory containing one or more test vector files, of the specified
     file type. When a file is found, its details are recorded to a CSV or JSON
     string, and written to an output file.
+
+    Checksum Sidecars
+    ------------------
+    The test vector generation pipeline can write out the MD5 hash of each vector
+    as it is created. If so, there is no need to read the vector again to hash it
+    here. Two sidecar formats are recognised,
+
+    <Test vector>.fil.md5                  - a file holding the hash of a single vector.
+    MD5SUMS (in the vector's directory)    - an md5sum format manifest for the whole directory.
+
+    A sidecar is only trusted if it was modified no earlier than the vector it
+    describes. A fraction of sidecar hashes (the verification rate) is checked
+    by recomputing the hash, so that a faulty pipeline does not go unnoticed.
     """
 
+    # The names of the md5sum format manifest files searched for in each directory.
+    MANIFEST_NAMES = ['MD5SUMS', 'md5sums.txt', 'checksums.md5']
+
     # ****************************************************************************************************
 
-    def parse(self, directory, fileExtensions, output_file, output_format):
+    def __init__(self, use_sidecars=True, verify_rate=0.0, hash_cache=None, per_device_workers=1):
         """
-        Reads the target directory, and records the files found which
-        have the specified file extension.
+        Default constructor.
 
         Parameters
         ----------
-        :param directory: the directory containing the files to be parsed.
+        :param use_sidecars: if True, trust checksum sidecars written by the pipeline where available.
+        :param verify_rate: the fraction [0,1] of sidecar hashes to verify by recomputing the hash.
+        :param hash_cache: an optional HashCache, consulted before any file is hashed.
+        :param per_device_workers: the number of files hashed concurrently on each storage device.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.use_sidecars = use_sidecars
+        self.verify_rate = verify_rate
+        self.hash_cache = hash_cache
+        self.per_device_workers = per_device_workers
+
+        # Guards the state shared by the hashing threads (caches and counters).
+        self.lock = threading.Lock()
+
+        # Caches the parsed manifest for each directory, so each is read once.
+        self.manifests = {}
+
+        # Counts how the hashes were obtained, for the summary output.
+        self.sidecar_hits = 0
+        self.sidecar_failures = 0
+        self.hashes_computed = 0
+
+    # ****************************************************************************************************
+
+    def parse(self, directories, fileExtensions, output_file, output_format):
+        """
+        Reads the target directories, and records the files found which
+        have the specified file extension. The directories may be spread
+        across several storage devices, in which case the new files on each
+        device are hashed at the same time (see hash_by_device).
+
+        Parameters
+        ----------
+        :param directories: the directory, or list of directories, containing the files to be parsed.
         :param fileExtensions: a list containing the file extensions to look for.
         :param output_file: the output path to record information to.
         :param output_format: the output format, i.e. CSV or JSON.
@@ -147,9 +203,15 @@ class TestVectorDirectoryParser(object):
         #    Now check for new test vectors
         # ****************************************
 
-        if Common.dir_exists(directory):
+        if isinstance(directories, basestring):
+            directories = [directories]
 
-            print "\t\tSearching: " + directory
+        directories = [directory for directory in directories if Common.dir_exists(directory)]
+
+        if len(directories) > 0:
+
+            for directory in directories:
+                print "\t\tSearching: " + directory
 
             # Count of the 'new' test vectors, i.e., not seen before.
             newtestVectorsFound = 0
@@ -168,56 +230,113 @@ class TestVectorDirectoryParser(object):
 
             start = datetime.datetime.now()  # Used to measure processing time.
 
-            # For each type of file this program recognises
-            for filetype in fileExtensions:
+            # Counts the vectors moved or renamed since they were recorded.
+            testVectorsMoved = 0
+
+            # Records the catalogue rows to update once the search is complete. Moved
+            # vectors have their path and parent columns updated, and the rows of
+            # renamed vectors are replaced by rows under their new names.
+            updated_vectors = {}
+            removed_vectors = set()
+
+            # Find all the test vectors up front. Knowing every vector present means
+            # catalogue rows whose files have disappeared, can be matched to new files
+            # that are really the same vector after a move or rename.
+            found_vectors = []
+            for directory in directories:
+                found_vectors.extend(self.findTestVectors(directory, fileExtensions))
+
+            identities = self.load_identity_index(output_file)
+            disappeared = self.findDisappearedVectors(test_vectors, found_vectors, identities)
+
+            # The vectors to record, as (parent, file name, full path, MD5, previous name) lists.
+            new_vectors = []
+
+            for root, file_name in found_vectors:
+
+                # Increment test vector count
+                testVectorCount += 1
+
+                # Gets full path to the file.
+                full_file_path = os.path.join(root, file_name)
+
+                # Check if the test vector has already been seen.
+                if test_vectors.has_key(file_name):
 
-                # Loop through the specified directory
-                for root, subFolders, filenames in os.walk(directory):
+                    print "\t\tTest vector already seen: ", file_name
 
-                    # If the file type matches one of those this program recognises
+                    # Check the file hasn't changed. To do this, compare the file
+                    # size in bits, the the number of bits we previously recorded
+                    # in the test vector database file.
+                    current_size_bits = int(Common.file_size_bits(full_file_path))
 
-                    for file_name in filenames:
+                    test_vector_parameters = test_vectors[file_name]
+                    previous_size_bits = test_vector_parameters[10]# Index 11-1 has the number of bits
 
-                        if file_name.endswith(filetype):
+                    # Update stats
+                    totalTestVectorSizeGB += DataConversions.convertBitToByte(current_size_bits, 'GB')
 
-                            # Increment test vector count
-                            testVectorCount += 1
+                    if int(current_size_bits) != int(previous_size_bits):
+                        testVectorsThatHaveChanged += 1
+                        print "\t\tTest vector has changed: ", file_name
 
-                            # Gets full path to the file.
-                            full_file_path = os.path.join(root, file_name)
+                        # Keep details of the vector/s that have changed unexpectedly.
+                        changed_vectors[file_name] = test_vector_parameters
 
-                            # Check if the test vector has already been seen.
-                            if test_vectors.has_key(file_name):
+                    # The vector may have moved, e.g. if its batch directory was moved.
+                    elif test_vector_parameters[8] != full_file_path and not os.path.isfile(test_vector_parameters[8]):
+                        testVectorsMoved += 1
+                        print "\t\tTest vector has moved: ", file_name
 
-                                print "\t\tTest vector already seen: ", file_name
+                        test_vector_parameters[8] = full_file_path
+                        test_vector_parameters[9] = root
+                        updated_vectors[file_name] = test_vector_parameters
 
-                                # Check the file hasn't changed. To do this, compare the file
-                                # size in bits, the the number of bits we previously recorded
-                                # in the test vector database file.
-                                current_size_bits = int(Common.file_size_bits(full_file_path))
+                    self.updateIdentity(identities, file_name, full_file_path)
+                else:
+
+                    identity = self.updateIdentity(identities, file_name, full_file_path)
+
+                    # Check if this is a vector already recorded under another name or path.
+                    previous_name = self.findMovedVector(identity, disappeared)
+
+                    if previous_name is not None:
+                        print "\t\tTest vector renamed from: ", previous_name, " to: ", file_name
+
+                        # Carry the digest over from the previous catalogue row.
+                        md5_value = test_vectors[previous_name][12].strip()
+                    else:
+                        md5_value = None
 
-                                test_vector_parameters = test_vectors[file_name]
-                                previous_size_bits = test_vector_parameters[10]# Index 11-1 has the number of bits
+                    new_vectors.append([root, file_name, full_file_path, md5_value, previous_name])
 
-                                # Update stats
-                                totalTestVectorSizeGB += DataConversions.convertBitToByte(current_size_bits, 'GB')
+            # Hash the new vectors, streaming from every device at once.
+            hashes = self.hash_by_device([vector[2] for vector in new_vectors if vector[3] is None])
 
-                                if int(current_size_bits) != int(previous_size_bits):
-                                    testVectorsThatHaveChanged += 1
-                                    print "\t\tTest vector has changed: ", file_name
+            for root, file_name, full_file_path, md5_value, previous_name in new_vectors:
 
-                                    # Keep details of the vector/s that have changed unexpectedly.
-                                    changed_vectors[file_name] = test_vector_parameters
-                            else:
+                if md5_value is None:
+                    md5_value = hashes.get(full_file_path)
 
-                                outcome, size_in_gb = self.record(full_file_path, root, file_name, output_file, output_format)
+                outcome, size_in_gb = self.record(full_file_path, root, file_name, output_file, output_format, md5_value)
 
-                                totalTestVectorSizeGB += size_in_gb
+                totalTestVectorSizeGB += size_in_gb
 
-                                if outcome:
+                if outcome:
 
-                                    newtestVectorsFound += 1
-                                    totalNewVectorSizeGB += size_in_gb
+                    if previous_name is not None:
+                        testVectorsMoved += 1
+                        removed_vectors.add(previous_name)
+                        del identities[previous_name]
+                    else:
+                        newtestVectorsFound += 1
+                        totalNewVectorSizeGB += size_in_gb
+
+            # Apply the changes to the catalogue rows of moved and renamed vectors.
+            if len(updated_vectors) > 0 or len(removed_vectors) > 0:
+                self.rewriteDatabase(output_file, updated_vectors, removed_vectors)
+
+            self.save_identity_index(output_file, identities)
 
             # Finally get the time that the procedure finished.
             end = datetime.datetime.now()
@@ -228,6 +347,15 @@ class TestVectorDirectoryParser(object):
             print "\t\tNew test vectors found: ", str(newtestVectorsFound)
             print "\t\tTotal new test vector size (GB): ", str(totalNewVectorSizeGB)
             print "\t\tTest vectors unexpectedly different: ", str(testVectorsThatHaveChanged)
+            print "\t\tTest vectors moved or renamed: ", str(testVectorsMoved)
+            print "\t\tHashes read from checksum sidecars: ", str(self.sidecar_hits)
+            print "\t\tHashes computed: ", str(self.hashes_computed)
+            print "\t\tSidecar hashes failing verification: ", str(self.sidecar_failures)
+
+            # Persist any newly computed hashes for use by later runs.
+            if self.hash_cache is not None:
+                print "\t\tHash cache hits: ", str(self.hash_cache.hits)
+                self.hash_cache.save()
 
             # Print out those vectors that have changed.
             if testVectorsThatHaveChanged > 0:
@@ -242,7 +370,7 @@ class TestVectorDirectoryParser(object):
 
     # ****************************************************************************************************
 
-    def record(self, full_file_path, parent, file_name, output_path, output_format):
+    def record(self, full_file_path, parent, file_name, output_path, output_format, md5_value=None):
         """
         Records the file found in the parsed directory. This function is only
         used during testing.
@@ -254,6 +382,7 @@ class TestVectorDirectoryParser(object):
         :param file_name: the full path to the file found.
         :param output_path: the output path to record information to.
         :param output_format: the output format, i.e. CSV or JSON.
+        :param md5_value: the MD5 hash of the file if already known, else None.
 
         Returns
         ----------
@@ -320,9 +449,9 @@ class TestVectorDirectoryParser(object):
                         EPN += '_' + str(Freq) + '_' + str(ProfileNumber)
 
                     if output_format == 1:
-                        return self.WriteAsCSV(Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path)
+                        return self.WriteAsCSV(Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path, md5_value)
                     elif output_format == 2:
-                        return self.WriteAsJSON(Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path)
+                        return self.WriteAsJSON(Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path, md5_value)
                 else:
                     print "\t\tUnknown filename format processed in record function: ", full_file_path
             else:
@@ -334,7 +463,7 @@ class TestVectorDirectoryParser(object):
 
     # ****************************************************************************************************
 
-    def WriteAsCSV(self, Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path):
+    def WriteAsCSV(self, Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path, md5_value=None):
         """
         Writes data to a file in the following CSV format:
 
@@ -356,6 +485,7 @@ class TestVectorDirectoryParser(object):
         :param parent: the full path to the file found.
         :param file_name: the full path to the file found.
         :param output_file: the output path to record information to.
+        :param md5_value: the MD5 hash of the file if already known, else None.
 
         Returns
         ----------
@@ -392,8 +522,9 @@ class TestVectorDirectoryParser(object):
 
                     size_in_gb = DataConversions.convertBitToByte(size_in_bits, 'GB')
 
-                    # Now compute MD5 hash...
-                    md5_value = self.generate_file_md5(full_file_path)
+                    # Now obtain the MD5 hash, unless carried over from a previous record...
+                    if md5_value is None:
+                        md5_value = self.get_file_md5(full_file_path)
 
                     output = file_name + ',' + str(Batch) +',' + Type + ',' + Period + ',' + str(DM) + ',' + str(Z)+','
                     output += str(SNR) + ',' + EPN + ',' + str(Freq) + ',' + full_file_path + ',' + parent + ','
@@ -415,7 +546,7 @@ class TestVectorDirectoryParser(object):
 
     # ****************************************************************************************************
 
-    def WriteAsJSON(self, Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path):
+    def WriteAsJSON(self, Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path, md5_value=None):
         """
         Writes data to the JSON format.
 
@@ -433,6 +564,7 @@ class TestVectorDirectoryParser(object):
         :param parent: the full path to the file found.
         :param file_name: the full path to the file found.
         :param output_file: the output path to record information to.
+        :param md5_value: the MD5 hash of the file if already known, else None.
 
         Returns
         ----------
@@ -443,7 +575,7 @@ class TestVectorDirectoryParser(object):
         print "\t\tRecording file: ", full_file_path
 
         # Not implemented the JSON yet.
-        return self.WriteAsCSV(Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path)
+        return self.WriteAsCSV(Type, Batch, Period, DM, Z, SNR, EPN, Freq, full_file_path, parent, file_name, output_path, md5_value)
 
     # ****************************************************************************************************
 
@@ -524,6 +656,18 @@ class TestVectorDirectoryParser(object):
         ----------
         :return: an MD5 hash of the file.
         """
+
+        # A cached hash avoids reading the file at all.
+        cache_key = None
+        if self.hash_cache is not None:
+            cache_key = self.hash_cache.key(path)
+
+            with self.lock:
+                md5_value = self.hash_cache.get(cache_key)
+
+            if md5_value is not None:
+                return md5_value
+
         m = hashlib.md5()
         with open(path, "rb") as f:
             while True:
@@ -532,6 +676,567 @@ class TestVectorDirectoryParser(object):
                     break
                 m.update(buf)
 
+        md5_value = m.hexdigest()
+
+        with self.lock:
+            self.hashes_computed += 1
+
+            if self.hash_cache is not None:
+                self.hash_cache.put(cache_key, md5_value)
+
+        return md5_value
+
+    # ****************************************************************************************************
+
+    def get_file_md5(self, path):
+        """
+        Gets the MD5 hash of the file at the specified path. The hash is taken from a
+        checksum sidecar if a valid one exists, else it is computed via generate_file_md5.
+
+        Parameters
+        ----------
+        :param path: the full path to the file to get the hash for.
+
+        Returns
+        ----------
+        :return: an MD5 hash of the file.
+
+        """
+
+        md5_value = None
+
+        if self.use_sidecars:
+            md5_value = self.find_sidecar_md5(path)
+
+        if md5_value is None:
+            return self.generate_file_md5(path)
+
+        with self.lock:
+            self.sidecar_hits += 1
+
+        # Spot check the sidecar hashes at the configured rate.
+        if self.verify_rate > 0 and random.random() < self.verify_rate:
+
+            computed = self.generate_file_md5(path)
+
+            if computed != md5_value:
+                with self.lock:
+                    self.sidecar_failures += 1
+                print "\t\tChecksum sidecar does not match file contents: ", path
+                return computed
+
+        return md5_value
+
+    # ****************************************************************************************************
+
+    def find_sidecar_md5(self, path):
+        """
+        Looks for a checksum sidecar describing the file at the specified path. First
+        a <path>.md5 file is checked for, then an md5sum manifest in the same directory.
+        Only the manifest cache is read and updated under the lock, so hashing threads
+        do not wait on each other's stat calls and sidecar reads.
+
+        Parameters
+        ----------
+        :param path: the full path to the file to find the hash for.
+
+        Returns
+        ----------
+        :return: the MD5 hash recorded for the file, else None if there is no valid sidecar.
+
+        """
+
+        try:
+            vector_mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        file_name = os.path.basename(path)
+
+        # Look for a sidecar describing only this file.
+        sidecar = path + '.md5'
+        if os.path.isfile(sidecar) and os.path.getmtime(sidecar) >= vector_mtime:
+
+            entries = self.read_md5_manifest(sidecar)
+
+            # A single file sidecar may omit the file name.
+            if file_name in entries:
+                return entries[file_name]
+            elif None in entries:
+                return entries[None]
+
+        # Else look for a manifest describing the whole directory.
+        directory = os.path.dirname(path)
+
+        with self.lock:
+            manifest = self.manifests.get(directory)
+
+        if manifest is None:
+            # Two threads may both load a manifest not yet cached, the first to finish is kept.
+            loaded = self.load_directory_manifest(directory)
+
+            with self.lock:
+                manifest = self.manifests.setdefault(directory, loaded)
+
+        manifest_mtime, entries = manifest
+
+        if file_name in entries and manifest_mtime >= vector_mtime:
+            return entries[file_name]
+
+        return None
+
+    # ****************************************************************************************************
+
+    def load_directory_manifest(self, directory):
+        """
+        Loads the md5sum manifest in a directory, if there is one.
+
+        Parameters
+        ----------
+        :param directory: the directory to search for a manifest.
+
+        Returns
+        ----------
+        :return: a tuple of the manifest modification time and a dictionary mapping file names to hashes.
+
+        """
+
+        for manifest_name in self.MANIFEST_NAMES:
+
+            manifest = os.path.join(directory, manifest_name)
+
+            if os.path.isfile(manifest):
+                return os.path.getmtime(manifest), self.read_md5_manifest(manifest)
+
+        return 0, {}
+
+    # ****************************************************************************************************
+
+    def read_md5_manifest(self, path):
+        """
+        Reads a file in the md5sum output format, i.e. lines of the form,
+
+        <MD5 hash>  <File name>
+        <MD5 hash> *<File name>
+
+        A line holding only a hash is stored against the key None.
+
+        Parameters
+        ----------
+        :param path: the full path to the manifest file.
+
+        Returns
+        ----------
+        :return: a dictionary mapping file names (without directories) to hashes.
+
+        """
+
+        entries = {}
+        lines = Common.read_file(path)
+
+        if lines is None:
+            return entries
+
+        for line in lines:
+
+            components = line.strip().split(None, 1)
+
+            if len(components) == 0 or len(components[0]) != 32:
+                continue
+
+            md5_value = components[0].lower()
+
+            if len(components) == 1:
+                entries[None] = md5_value
+            else:
+                name = components[1].lstrip('*')
+                entries[os.path.basename(name)] = md5_value
+
+        return entries
+
+    # ****************************************************************************************************
+
+    def findTestVectors(self, directory, fileExtensions):
+        """
+        Finds the test vectors in the target directory.
+
+        Parameters
+        ----------
+        :param directory: the directory containing the files to be parsed.
+        :param fileExtensions: a list containing the file extensions to look for.
+
+        Returns
+        ----------
+        :return: a list of (parent directory, file name) tuples, one for each test vector found.
+
+        """
+
+        found_vectors = []
+
+        # For each type of file this program recognises
+        for filetype in fileExtensions:
+
+            # Loop through the specified directory
+            for root, subFolders, filenames in os.walk(directory):
+
+                # If the file type matches one of those this program recognises
+                for file_name in filenames:
+
+                    if file_name.endswith(filetype):
+                        found_vectors.append((root, file_name))
+
+        return found_vectors
+
+    # ****************************************************************************************************
+
+    def findDisappearedVectors(self, test_vectors, found_vectors, identities):
+        """
+        Finds the catalogue rows whose files no longer exist at their recorded path, and
+        were not found under their recorded name. These are the candidates for vectors that
+        have been moved or renamed. Only rows with a recorded identity can be matched.
+
+        Parameters
+        ----------
+        :param test_vectors: the dictionary of test vectors read from the database file.
+        :param found_vectors: the list of (parent directory, file name) tuples found.
+        :param identities: the dictionary of file identities, see load_identity_index.
+
+        Returns
+        ----------
+        :return: a tuple of two dictionaries, mapping (device, inode, size, mtime_ns) and
+                 (size, fingerprint) respectively to the names of the disappeared vectors, plus
+                 the set of names already claimed by a moved vector (initially empty).
+
+        """
+
+        found_names = set([file_name for root, file_name in found_vectors])
+
+        by_inode = {}
+        by_fingerprint = {}
+
+        for file_name, test_vector_parameters in test_vectors.iteritems():
+
+            if file_name in found_names or file_name not in identities:
+                continue
+
+            if os.path.isfile(test_vector_parameters[8]):
+                continue
+
+            identity = identities[file_name]
+            by_inode[tuple(identity[:4])] = file_name
+
+            if identity[4]:
+                by_fingerprint[(identity[2], identity[4])] = file_name
+
+        print "\t\tRecorded test vectors no longer found: ", str(len(by_inode))
+
+        return by_inode, by_fingerprint, set()
+
+    # ****************************************************************************************************
+
+    def findMovedVector(self, identity, disappeared):
+        """
+        Checks if a newly found file is a disappeared vector that has been moved or renamed.
+        A file matches if it has the same device, inode, size and modification time (i.e.
+        it was renamed in place), or else the same size and quick fingerprint (i.e. it was
+        copied or moved across devices).
+
+        Parameters
+        ----------
+        :param identity: the identity of the newly found file, see updateIdentity.
+        :param disappeared: the tuple of dictionaries returned by findDisappearedVectors.
+
+        Returns
+        ----------
+        :return: the name the vector was previously recorded under, else None.
+
+        """
+
+        if identity is None:
+            return None
+
+        by_inode, by_fingerprint, claimed = disappeared
+
+        previous_name = by_inode.get(tuple(identity[:4]))
+
+        if (previous_name is None or previous_name in claimed) and identity[4]:
+            previous_name = by_fingerprint.get((identity[2], identity[4]))
+
+        # A disappeared vector can only be claimed once.
+        if previous_name is None or previous_name in claimed:
+            return None
+
+        claimed.add(previous_name)
+
+        return previous_name
+
+    # ****************************************************************************************************
+
+    def updateIdentity(self, identities, file_name, path):
+        """
+        Records the identity of a test vector, i.e. its device, inode, size, modification
+        time and quick fingerprint. The fingerprint is only recomputed if the file has
+        changed since its identity was last recorded.
+
+        Parameters
+        ----------
+        :param identities: the dictionary of file identities to update.
+        :param file_name: the test vector file name.
+        :param path: the full path to the test vector.
+
+        Returns
+        ----------
+        :return: the identity as a list [device, inode, size, mtime_ns, fingerprint], else None if the file cannot be read.
+
+        """
+
+        key = HashCache.key(path)
+
+        if key is None:
+            return None
+
+        previous = identities.get(file_name)
+
+        if previous is not None and tuple(previous[:4]) == key and previous[4]:
+            return previous
+
+        identity = list(key) + [self.quick_fingerprint(path, key[2])]
+        identities[file_name] = identity
+
+        return identity
+
+    # ****************************************************************************************************
+
+    def quick_fingerprint(self, path, size, sample_size=65536):
+        """
+        Computes a quick fingerprint of a file, by hashing its size, and the data at its
+        start and end. This is far cheaper than hashing a whole test vector, but is enough
+        to recognise the same vector after it has been moved.
+
+        Parameters
+        ----------
+        :param path: the full path to the file.
+        :param size: the size of the file in bytes.
+        :param sample_size: the number of bytes read from the start and end of the file.
+
+        Returns
+        ----------
+        :return: the fingerprint as a hex string, else an empty string if the file cannot be read.
+
+        """
+
+        m = hashlib.md5(str(size))
+
+        try:
+            with open(path, "rb") as f:
+                m.update(f.read(sample_size))
+
+                if size > sample_size * 2:
+                    f.seek(-sample_size, os.SEEK_END)
+                    m.update(f.read(sample_size))
+        except IOError:
+            return ''
+
         return m.hexdigest()
 
     # ****************************************************************************************************
+
+    def rewriteDatabase(self, output_file, updated_vectors, removed_vectors):
+        """
+        Rewrites the test vector database file, updating the path and parent columns of
+        moved vectors in place, and dropping the rows of vectors recorded under a new name.
+        The new file is written alongside the old, then renamed into place.
+
+        Parameters
+        ----------
+        :param output_file: the test vector database file.
+        :param updated_vectors: a dictionary mapping file names to their updated parameters.
+        :param removed_vectors: the set of file names whose rows should be dropped.
+
+        Returns
+        ----------
+        N/A
+
+        """
+
+        lines = Common.read_file(output_file)
+
+        if lines is None:
+            return
+
+        temp_path = output_file + '.tmp'
+        Common.delete_file(temp_path)
+
+        with open(temp_path, 'w') as f:
+            for line in lines:
+
+                file_name = line.split(',', 1)[0]
+
+                if file_name in removed_vectors:
+                    continue
+                elif file_name in updated_vectors:
+                    line = ','.join([file_name] + updated_vectors[file_name])
+
+                f.write(line)
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(output_file)
+
+        os.rename(temp_path, output_file)
+
+    # ****************************************************************************************************
+
+    def load_identity_index(self, output_file):
+        """
+        Loads the identity index stored alongside a test vector database file. The index
+        is kept separate from the database, so that the database format is unchanged. It
+        is a CSV file of the following format:
+
+        <Filename>,<Device>,<Inode>,<Size Bytes>,<Mtime ns>,<Fingerprint>
+
+        Parameters
+        ----------
+        :param output_file: the test vector database file.
+
+        Returns
+        ----------
+        :return: a dictionary mapping file names to identities, see updateIdentity.
+
+        """
+
+        identities = {}
+        lines = Common.read_file(output_file + '.ids')
+
+        if lines is None:
+            return identities
+
+        for line in lines:
+
+            components = line.strip().split(',')
+
+            if len(components) != 6:
+                continue
+
+            try:
+                identities[components[0]] = [int(components[1]), int(components[2]), int(components[3]),
+                                             int(components[4]), components[5]]
+            except ValueError:
+                print "\t\tIgnoring corrupt identity index entry: ", line.strip()
+
+        return identities
+
+    # ****************************************************************************************************
+
+    def save_identity_index(self, output_file, identities):
+        """
+        Writes the identity index stored alongside a test vector database file.
+
+        Parameters
+        ----------
+        :param output_file: the test vector database file.
+        :param identities: a dictionary mapping file names to identities, see updateIdentity.
+
+        Returns
+        ----------
+        N/A
+
+        """
+
+        index_file = output_file + '.ids'
+        temp_path = index_file + '.tmp'
+
+        with open(temp_path, 'w') as f:
+            for file_name, identity in identities.iteritems():
+                f.write('%s,%d,%d,%d,%d,%s\n' % (file_name, identity[0], identity[1], identity[2], identity[3],
+                                                 identity[4]))
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(index_file)
+
+        os.rename(temp_path, index_file)
+
+    # ****************************************************************************************************
+
+    def hash_by_device(self, paths):
+        """
+        Computes the MD5 hashes of many files, scheduling the work by storage device. The
+        files are grouped by device (st_dev), and each device is given its own small set of
+        worker threads (per_device_workers). So every device streams data at the same time,
+        while no single device is asked to serve more concurrent reads than it can handle
+        sequentially. Within a device, files are read in inode order, which approximates
+        their order on disk.
+
+        Parameters
+        ----------
+        :param paths: the full paths of the files to hash.
+
+        Returns
+        ----------
+        :return: a dictionary mapping each path to its MD5 hash. Files that could not be
+                 hashed are omitted.
+
+        """
+
+        devices = {}
+
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            devices.setdefault(stat.st_dev, []).append((stat.st_ino, path))
+
+        hashes = {}
+        threads = []
+
+        for device, files in devices.iteritems():
+
+            print "\t\tFiles to hash on device ", str(device), ": ", str(len(files))
+
+            work = Queue.Queue()
+            for inode, path in sorted(files):
+                work.put(path)
+
+            for i in range(max(1, min(self.per_device_workers, len(files)))):
+                thread = threading.Thread(target=self.hash_worker, args=(work, hashes))
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        return hashes
+
+    # ****************************************************************************************************
+
+    def hash_worker(self, work, hashes):
+        """
+        Hashes files taken from a queue until the queue is empty. Used by hash_by_device.
+
+        Parameters
+        ----------
+        :param work: the queue of paths to hash, all on the same device.
+        :param hashes: the dictionary to store each path's hash in.
+
+        Returns
+        ----------
+        N/A
+
+        """
+
+        while True:
+            try:
+                path = work.get_nowait()
+            except Queue.Empty:
+                return
+
+            try:
+                hashes[path] = self.get_file_md5(path)
+            except (IOError, OSError):
+                print "\t\tError computing MD5 for: ", path
+
+    # ****************************************************************************************************
@@ -15,7 +15,8 @@
     **************************************************************************
     | Required Command Line Arguments:                                       |
     |                                                                        |
-    | --dir (string) path to the directory to parse.                         |
+    | --dir (string) path to the directory to parse. May be repeated, to     |
+    |                parse directories on several devices at once.           |
     |                                                                        |
     | --out (string) path to the output file to create or append to.         |
     |                                                                        |
@@ -25,6 +26,17 @@
     |                                                                        |
     | -v the verbose logging flag.                                           |
     |                                                                        |
+    | --no-sidecars ignore checksum sidecars, always compute MD5 hashes.     |
+    |                                                                        |
+    | --verify-rate (float) fraction of sidecar hashes to verify [0,1].      |
+    |                                                                        |
+    | --cache-dir (string) directory holding a persistent hash cache, shared |
+    |                      by all database files that use it.                |
+    |                                                                        |
+    | --cache-size (int) maximum number of hashes kept in the cache.         |
+    |                                                                        |
+    | --per-device (int) number of files hashed at once on each device.      |
+    |                                                                        |
     **************************************************************************
     | License:                                                               |
     |                                                                        |
@@ -45,6 +57,7 @@ import os, sys, datetime
 
 # For common operations.
 from TestVectorDirectoryParser import TestVectorDirectoryParser
+from HashCache import HashCache
 from Common import Common
 
 
@@ -97,16 +110,21 @@ class TestVectorDirectoryParserApp(object):
         parser = OptionParser()
 
         # REQUIRED ARGUMENTS
-        parser.add_option("--dir", action="store", dest="dir", help='Path to the directory to parse (required).', default=None)
+        parser.add_option("--dir", action="append", dest="dir", help='Path to a directory to parse, may be repeated (required).', default=None)
         parser.add_option("--out", action="store", dest="out", help='Path to the output file (required).',default=None)
         parser.add_option("--ext", action="store", dest="ext", help='File extension to look for (required).',default='.fil')
         parser.add_option("-f"   , type="int"    , dest="format", help='The file output format (optional).',default=1)
         parser.add_option("-v", action="store_true", dest="verbose", help='Verbose debugging flag (optional).',default=False)
+        parser.add_option("--no-sidecars", action="store_false", dest="sidecars", help='Ignore checksum sidecars (optional).',default=True)
+        parser.add_option("--verify-rate", type="float", dest="verify_rate", help='Fraction of sidecar hashes to verify (optional).',default=0.0)
+        parser.add_option("--cache-dir", action="store", dest="cache_dir", help='Path to the hash cache directory (optional).',default=None)
+        parser.add_option("--cache-size", type="int", dest="cache_size", help='Maximum hash cache entries (optional).',default=1000000)
+        parser.add_option("--per-device", type="int", dest="per_device", help='Files hashed at once per device (optional).',default=1)
 
         (args, options) = parser.parse_args()
 
         # Update variables with command line parameters.
-        directory     = args.dir
+        directories   = args.dir
         output_file   = args.out
         output_format = args.format
         verbose = args.verbose
@@ -115,14 +133,16 @@ class TestVectorDirectoryParserApp(object):
         #              Check user supplied parameters              #
         ############################################################
 
-        # Check the directory is valid...
-        if directory is None:
-            print "No valid directory supplied, exiting."
-            sys.exit()
-        elif not Common.dir_exists(directory):
+        # Check the directories are valid...
+        if directories is None:
             print "No valid directory supplied, exiting."
             sys.exit()
 
+        for directory in directories:
+            if not Common.dir_exists(directory):
+                print "No valid directory supplied (", directory, "), exiting."
+                sys.exit()
+
         # Check the output file is valid...
         if output_file is None:
             print "No valid output file supplied, exiting."
@@ -145,17 +165,36 @@ class TestVectorDirectoryParserApp(object):
 
             sys.exit()
 
+        if args.per_device < 1:
+            print "At least one file must be hashed at a time per device, exiting."
+            sys.exit()
+
+        if args.verify_rate < 0 or args.verify_rate > 1:
+            print "The sidecar verification rate must be in the range [0,1], exiting."
+            sys.exit()
+
+        hash_cache = None
+        if args.cache_dir is not None:
+            if not Common.is_path_valid(args.cache_dir):
+                print "No valid hash cache directory supplied, exiting."
+                sys.exit()
+            elif args.cache_size < 1:
+                print "The hash cache size must be at least 1, exiting."
+                sys.exit()
+
+            hash_cache = HashCache(args.cache_dir, args.cache_size)
+
         ############################################################
         #               Start parsing the directory                #
         ############################################################
 
-        print "\tSearching: ", directory
+        print "\tSearching: ", ', '.join(directories)
 
         # Used to measure feature generation time.
         start = datetime.datetime.now()
 
-        parser = TestVectorDirectoryParser()
-        parser.parse(directory, extension, output_file, output_format)
+        parser = TestVectorDirectoryParser(args.sidecars, args.verify_rate, hash_cache, args.per_device)
+        parser.parse(directories, extension, output_file, output_format)
 
         # Finally get the time that the procedure finished.
         end = datetime.datetime.now()
@@ -0,0 +1,574 @@
+"""
+**************************************************************************
+
+ ThumbnailAtlas.py
+
+**************************************************************************
+ Description:
+
+ Packs a thumbnail of each pulse profile (.asc file) the table rows show
+ into sprite atlases, so the test vector page fetches a handful of small
+ atlas images, rather than one full size profile PNG per table row.
+
+ The thumbnails are plotted directly from the .asc data using Matplotlib,
+ tile_size pixels square, in a grid of columns x columns tiles per atlas.
+ The atlases are kept small (512 x 512 pixels by default), so the rows
+ shown on screen only fetch the few atlases holding their thumbnails.
+
+ The profiles are packed as the page is built. Each row looks up its
+ thumbnail (see find) as it is read from the catalogue, so only profiles
+ the rows reference are packed, in the order the rows first reference
+ them, without reading the catalogue again. Once every row is read, the
+ atlases are plotted (see save).
+
+ Each profile is given a fixed slot, i.e. a position in a particular
+ atlas, the first time it is packed. So the rows of a page usually share
+ an atlas. Profiles added later are packed into slots after the last one
+ used, so the slots of existing profiles never move, and only the atlases
+ holding new or changed profiles are replotted. The slots of profiles
+ deleted, or no longer referenced, are left empty. The atlases are written
+ to <asc_dir>/atlas, with a JSON coordinate map, atlas.json, in the format,
+
+ {"tile": 128, "columns": 4,
+  "atlases": [{"file": "atlas_0.png", "signature": "<md5>"}, ...],
+  "profiles": {"J0006+1834_430": [<atlas>, <x>, <y>], ...},
+  "unplotted": {"J0000+0000_1400": <slot>, ...}}
+
+ where profiles lists the profiles plotted, and unplotted the slots of
+ the profiles without valid data. The signature of an atlas covers the
+ slots, names, sizes and modification times of the .asc files packed
+ into it.
+
+ If a profile library is supplied (see ProfileLibrary.py), the profiles in
+ it are plotted from the library instead, and their content hashes, as
+ recorded in the library, are used in the signature.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+# For general purposes
+import os
+import json
+import hashlib
+
+# For common operations
+from Common import Common
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class ThumbnailAtlas(object):
+    """
+    Builds, and looks up thumbnails in, the profile sprite atlases.
+    """
+
+    # ****************************************************************************************************
+
+    def __init__(self, asc_dir, tile_size=128, columns=4, library=None):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        :param asc_dir: path to the directory containing .asc files.
+        :param tile_size: the width and height of each thumbnail in pixels.
+        :param columns: the number of thumbnails in each row, and column, of an atlas.
+        :param library: an optional profile library to read profiles from, see ProfileLibrary.
+
+        Returns
+        ----------
+        N/A
+
+        """
+        self.asc_dir = asc_dir
+        self.atlas_dir = os.path.join(asc_dir, 'atlas')
+        self.map_path = os.path.join(self.atlas_dir, 'atlas.json')
+        self.tile_size = tile_size
+        self.columns = columns
+        self.library = library
+
+        # The coordinate map, as written to atlas.json.
+        self.atlas_map = None
+
+        # While packing, the slots of the profiles the rows have referenced, see open.
+        self.placed = None
+
+    # ****************************************************************************************************
+
+    def open(self):
+        """
+        Prepares to pack the thumbnails of the profiles the table rows reference, reading
+        the coordinate map of the previous build, so each profile keeps its slot.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: True if thumbnails can be packed, else False.
+
+        """
+        if not Common.dir_exists(self.asc_dir):
+            print '\t\tNo valid .asc directory, thumbnails not built: ', self.asc_dir
+            return False
+
+        if not Common.create_dir(self.atlas_dir):
+            print '\t\tUnable to create the atlas directory: ', self.atlas_dir
+            return False
+
+        # Checked now, as the rows reference the atlases before they are plotted.
+        try:
+            import matplotlib
+            import numpy
+        except ImportError as e:
+            print '\t\tMatplotlib and Numpy are required to plot thumbnails: ', e
+            return False
+
+        self.names = set([name[:-len('.asc')] for name in os.listdir(self.asc_dir) if name.endswith('.asc')])
+
+        # Only library profiles directly in the asc directory are packed, as those in the directory are.
+        if self.library is not None:
+            self.names.update([key for key in self.library.keys() if '/' not in key])
+
+        self.previous = {}
+        if Common.file_exists(self.map_path):
+            self.previous = json.loads(Common.read_file_as_string(self.map_path) or '{}')
+
+        # The slots are only kept while the atlas layout is the same.
+        self.previous_atlases = self.previous.get('atlases', [])
+        self.previous_slots = {}
+        if self.previous.get('tile') == self.tile_size and self.previous.get('columns') == self.columns:
+            self.previous_slots = self.slots(self.previous)
+        else:
+            self.previous_atlases = []
+            self.previous['profiles'] = {}
+
+        # New profiles are packed after the last slot used, so no slot is ever given to two profiles.
+        self.next_slot = max(self.previous_slots.values()) + 1 if len(self.previous_slots) > 0 else 0
+
+        self.placed = {}
+        self.invalid = set()
+        self.atlas_map = None
+
+        return True
+
+    # ****************************************************************************************************
+
+    def place(self, epn):
+        """
+        Packs the thumbnail of a profile a row references, unless it is already packed, keeping
+        the slot it had in the previous build, else giving it the next free slot.
+
+        A profile plotted in the previous build is assumed to still be valid, so only new
+        profiles, and those previously without valid data, are read. If a plotted profile's
+        data has since become invalid, its slot is left empty once its atlas is replotted.
+
+        Parameters
+        ----------
+        :param epn: the EPN profile name, i.e. <Pulsar>_<Freq>.
+
+        Returns
+        ----------
+        :return: a tuple of (atlas URL, x, y), else None if the profile has no thumbnail.
+
+        """
+        if epn not in self.placed:
+
+            if epn not in self.names:
+                return None
+
+            slot = self.previous_slots.get(epn)
+            if slot is None:
+                slot = self.next_slot
+                self.next_slot += 1
+
+            if epn not in self.previous['profiles'] and self.profileData(epn) is None:
+                self.invalid.add(epn)
+
+            self.placed[epn] = slot
+
+        if epn in self.invalid:
+            return None
+
+        per_atlas = self.columns * self.columns
+        number, index = self.placed[epn] / per_atlas, self.placed[epn] % per_atlas
+
+        return (self.asc_dir + '/atlas/atlas_' + str(number) + '.png', (index % self.columns) * self.tile_size,
+                (index / self.columns) * self.tile_size)
+
+    # ****************************************************************************************************
+
+    def save(self):
+        """
+        Plots the atlases holding the profiles packed since open, replotting only the atlases
+        whose profiles have changed since the last build, and writes the coordinate map.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: True if the atlases are up to date, else False.
+
+        """
+        # Already saved, i.e. before the split pages were rendered.
+        if self.placed is None:
+            return self.atlas_map is not None
+
+        slots = self.placed
+        previous = self.previous
+        previous_atlases = self.previous_atlases
+
+        per_atlas = self.columns * self.columns
+        atlas_count = (max(slots.values()) / per_atlas) + 1 if len(slots) > 0 else 0
+
+        # The names in each slot of each atlas, with None for empty slots.
+        layout = [[None] * per_atlas for number in range(atlas_count)]
+        for name, slot in slots.iteritems():
+            layout[slot / per_atlas][slot % per_atlas] = name
+
+        atlases = []
+        profiles = {}
+        unplotted = {}
+        replotted = 0
+
+        for number, atlas_names in enumerate(layout):
+
+            # The atlas only needs rows up to its last used slot.
+            while len(atlas_names) > 0 and atlas_names[-1] is None:
+                atlas_names.pop()
+
+            file_name = 'atlas_' + str(number) + '.png'
+            signature = self.signature(atlas_names)
+
+            atlas_path = os.path.join(self.atlas_dir, file_name)
+            unchanged = number < len(previous_atlases) and previous_atlases[number]['signature'] == signature
+
+            if len(atlas_names) == 0:
+                # Every profile in the atlas has been deleted, or is no longer referenced.
+                Common.delete_file(atlas_path)
+                plotted = set()
+            elif unchanged and Common.file_exists(atlas_path):
+                plotted = [name for name in atlas_names if name in previous['profiles']]
+            else:
+                plotted = self.plotAtlas(atlas_path, atlas_names)
+                replotted += 1
+
+                if plotted is None:
+                    return False
+
+            for index, name in enumerate(atlas_names):
+                if name in plotted:
+                    profiles[name] = [number, (index % self.columns) * self.tile_size,
+                                      (index / self.columns) * self.tile_size]
+                elif name is not None:
+                    unplotted[name] = slots[name]
+
+            atlases.append({'file': file_name, 'signature': signature})
+
+        # Remove atlases left over from a previous layout.
+        for atlas in previous_atlases[len(atlases):]:
+            Common.delete_file(os.path.join(self.atlas_dir, atlas['file']))
+
+        self.atlas_map = {'tile': self.tile_size, 'columns': self.columns, 'atlases': atlases,
+                          'profiles': profiles, 'unplotted': unplotted}
+
+        temp_path = self.map_path + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.atlas_map, f, separators=(',', ':'))
+
+        # Windows will not rename over an existing file.
+        if Common.is_windows():
+            Common.delete_file(self.map_path)
+
+        os.rename(temp_path, self.map_path)
+
+        self.placed = None
+
+        print '\t\tThumbnail atlases: ', str(len(atlases)), ' (replotted ', str(replotted), ')'
+
+        return True
+
+    # ****************************************************************************************************
+
+    def slots(self, atlas_map):
+        """
+        Finds the slot of every profile in a coordinate map, i.e. its position counted
+        across the atlases, from its atlas and coordinates.
+
+        Parameters
+        ----------
+        :param atlas_map: a coordinate map, as written to atlas.json.
+
+        Returns
+        ----------
+        :return: a dictionary of profile names to slots.
+
+        """
+        per_atlas = self.columns * self.columns
+
+        slots = dict(atlas_map.get('unplotted', {}))
+
+        for name, (number, x, y) in atlas_map.get('profiles', {}).iteritems():
+            slots[name] = number * per_atlas + (y / self.tile_size) * self.columns + x / self.tile_size
+
+        return slots
+
+    # ****************************************************************************************************
+
+    def signature(self, names):
+        """
+        Computes the signature of an atlas, from the .asc files packed into it.
+
+        Parameters
+        ----------
+        :param names: the names of the profiles in each slot of the atlas, None for empty slots.
+
+        Returns
+        ----------
+        :return: the signature as a hex string.
+
+        """
+        m = hashlib.md5(str(self.tile_size) + ',' + str(self.columns))
+
+        for index, name in enumerate(names):
+            if name is None:
+                continue
+            elif self.library is not None and self.library.has(name):
+                m.update('\n%d,%s,%s' % (index, name, self.library.digest(name)))
+            else:
+                st = os.stat(os.path.join(self.asc_dir, name + '.asc'))
+                m.update('\n%d,%s,%d,%d' % (index, name, st.st_size, int(st.st_mtime)))
+
+        return m.hexdigest()
+
+    # ****************************************************************************************************
+
+    def plotAtlas(self, atlas_path, names):
+        """
+        Plots the thumbnails of a set of profiles into a single atlas PNG. Every thumbnail
+        is drawn by a single line collection spanning the atlas, scaled as it would be in
+        its own axes, as adding an axes per thumbnail is far slower.
+
+        Parameters
+        ----------
+        :param atlas_path: the path of the atlas PNG to write.
+        :param names: the names of the profiles in each slot of the atlas, None for empty slots.
+
+        Returns
+        ----------
+        :return: the set of profile names plotted (those with valid .asc data),
+                 else None if the atlas could not be written.
+
+        """
+        # Matplotlib is only needed when atlases are (re)built.
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+            from matplotlib.collections import LineCollection
+
+            import numpy
+            from ProfileBatch import ProfileBatch
+        except ImportError as e:
+            print '\t\tMatplotlib and Numpy are required to plot thumbnails: ', e
+            return None
+
+        dpi = 100.0
+        tile = float(self.tile_size)
+        rows = (len(names) + self.columns - 1) / self.columns
+        width, height = self.columns * tile, rows * tile
+
+        # Keeps the lines of neighbouring thumbnails apart.
+        margin = 4.0
+        span = tile - 2 * margin
+
+        # The position in the atlas, and the data, of each valid profile.
+        indices = []
+        profiles = []
+
+        for index, name in enumerate(names):
+
+            if name is None:
+                continue
+
+            data = self.profileData(name)
+
+            if data is not None:
+                indices.append(index)
+                profiles.append(data)
+
+        # The profiles of the atlas are centred together.
+        batch = ProfileBatch(profiles)
+        batch.centre()
+
+        lines = []
+        plotted = set()
+
+        for row, index in enumerate(indices):
+
+            data = batch.profile(row)
+
+            x = (index % self.columns) * tile + margin
+            y = (index / self.columns) * tile + margin
+
+            # As Matplotlib autoscales an axes, the data fills the tile height, less a 5% margin.
+            low, high = data.min(), data.max()
+            padding = (high - low) * 0.05 if high > low else 0.5
+
+            xs = x + numpy.arange(len(data)) * (span / len(data))
+            ys = y + span * (high + padding - data) / (high - low + 2 * padding)
+
+            lines.append(numpy.column_stack((xs, ys)))
+            plotted.add(names[index])
+
+        fig = plt.figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+
+        # A single axes covering the atlas, in pixels from its top left corner.
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.add_collection(LineCollection(lines, linewidths=1, colors='C0'))
+        ax.set_xlim([0, width])
+        ax.set_ylim([height, 0])
+        ax.axis('off')
+
+        temp_path = atlas_path + '.' + str(os.getpid()) + '.tmp'
+
+        try:
+            fig.savefig(temp_path, dpi=dpi, format='png')
+        except IOError as e:
+            print '\t\tUnable to write the thumbnail atlas: ', atlas_path, e
+            return None
+        finally:
+            # Must close to prevent memory issues.
+            plt.close(fig)
+
+        if Common.is_windows():
+            Common.delete_file(atlas_path)
+
+        os.rename(temp_path, atlas_path)
+
+        return plotted
+
+    # ****************************************************************************************************
+
+    def profileData(self, name):
+        """
+        Reads the data points of a profile, from the library if it holds the profile,
+        else from its .asc file.
+
+        Parameters
+        ----------
+        :param name: the profile name.
+
+        Returns
+        ----------
+        :return: the data points, else None if the profile is empty or invalid.
+
+        """
+        if self.library is not None and self.library.has(name):
+            return self.library.profile(name)
+
+        return self.readProfile(os.path.join(self.asc_dir, name + '.asc'))
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def readProfile(asc_path):
+        """
+        Reads the data points of a pulse profile, one per line of a .asc file.
+
+        Parameters
+        ----------
+        :param asc_path: the path of the .asc file.
+
+        Returns
+        ----------
+        :return: the data points as a list of floats, else None if the file is empty or invalid.
+
+        """
+        data_str = Common.read_file(asc_path)
+
+        if data_str is None:
+            return None
+
+        try:
+            data = [float(s) for s in data_str if s.strip() != '']
+        except ValueError:
+            print '\t\tError converting numerical values to float in file: ', asc_path
+            return None
+
+        if len(data) < 1:
+            return None
+
+        return data
+
+    # ****************************************************************************************************
+
+    def load(self):
+        """
+        Loads the coordinate map written by a previous build, without checking the
+        atlases are up to date. Used by processes rendering pages in parallel.
+
+        Parameters
+        ----------
+        N/A
+
+        Returns
+        ----------
+        :return: True if the map was loaded, else False.
+
+        """
+        if not Common.file_exists(self.map_path):
+            return False
+
+        self.atlas_map = json.loads(Common.read_file_as_string(self.map_path))
+
+        return True
+
+    # ****************************************************************************************************
+
+    def find(self, epn):
+        """
+        Finds the thumbnail of a profile. While packing (see open), the profile is packed
+        if it is not already.
+
+        Parameters
+        ----------
+        :param epn: the EPN profile name, i.e. <Pulsar>_<Freq>.
+
+        Returns
+        ----------
+        :return: a tuple of (atlas URL, x, y), else None if the profile has no thumbnail.
+
+        """
+        if self.placed is not None:
+            return self.place(epn)
+
+        if self.atlas_map is None or epn not in self.atlas_map['profiles']:
+            return None
+
+        number, x, y = self.atlas_map['profiles'][epn]
+
+        return self.asc_dir + '/atlas/' + self.atlas_map['atlases'][number]['file'], x, y
+
+    # ****************************************************************************************************
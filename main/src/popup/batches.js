@@ -0,0 +1,65 @@
+/*
+ * batches.js
+ *
+ * Shows the batch descriptions linked to from the SKA test vector table written
+ * by PageBuilder.py. Rather than inlining a hidden popup for every batch, the
+ * page carries a single popup, and the batch descriptions are written to a JSON
+ * file alongside the page, in the format,
+ *
+ *   {"<batch number>": "<text of Batch_<batch number>.txt>", ...}
+ *
+ * The file is only fetched the first time a batch link is clicked, and the
+ * popup is filled with the description of the batch clicked.
+ *
+ * Author: Rob Lyon
+ * Email : robert.lyon@manchester.ac.uk
+ * web   : www.scienceguyrob.com
+ *
+ * License: GPLv3 (http://www.gnu.org/copyleft/gpl.html).
+ */
+
+var TestVectorBatches = (function ($) {
+
+    var url = null;
+    var batches = null;     // The promise of the batch descriptions, once requested.
+    var popup = null;
+
+    function init(batch_url) {
+        url = batch_url;
+    }
+
+    function show(batch) {
+        if (url === null) {
+            return false;
+        }
+
+        if (batches === null) {
+            batches = $.getJSON(url).fail(function () {
+                batches = null;     // Retry on the next click.
+            });
+        }
+
+        batches.done(function (descriptions) {
+            if (!descriptions.hasOwnProperty(batch)) {
+                return;
+            }
+
+            if (popup === null) {
+                popup = $('#batch_pop');
+                popup.popup({
+                    transition: 'all 0.3s',
+                    scrolllock: true
+                });
+            }
+
+            popup.find('h4').text('Batch_' + batch + '.txt');
+            popup.find('code').text(descriptions[batch]);
+            popup.popup('show');
+        });
+
+        return false;
+    }
+
+    return {init: init, show: show};
+
+})(jQuery);
@@ -0,0 +1,462 @@
+/*
+ * feed.js
+ *
+ * Renders the SKA test vector catalogue from the chunked JSON data feed
+ * written by PageBuilder.py (output format 2), instead of from table rows
+ * embedded in the page. Only the rows visible in the scrolling viewport
+ * are ever added to the DOM, and each chunk of the catalogue is only
+ * fetched once a visible row needs it. So the time taken to load the page
+ * does not grow with the size of the catalogue.
+ *
+ * The feed directory contains,
+ *
+ *   manifest.json  - {"total": N, "chunk_size": C, "chunks": [...], "columns": [...],
+ *                     "asc_dir": "...", "batches": [...], "facets": {...}, "search": {...},
+ *                     "placeholder": "...", "missing": [...]}
+ *   chunk_<n>.json - an array of up to C rows, each an array of column values.
+ *   facet_*.json   - the facet indexes written by FacetIndex.py.
+ *   search_<n>.json - the search index shards written by SearchIndex.py.
+ *
+ * If the manifest names a thumbnail atlas map ("sprites", see ThumbnailAtlas.py),
+ * profiles are shown as tiles of the sprite atlases rather than full size PNGs.
+ * As only visible rows are rendered, an atlas is only fetched once a row on
+ * screen needs it. If it names a sparkline file ("sparklines"), profiles are
+ * instead drawn as inline SVG sparklines (see ProfileSparkline.py).
+ *
+ * Filters are answered from the facet indexes, never by scanning the rows.
+ * A range filter fetches only the numeric facet buckets overlapping the
+ * range, and a value filter fetches only the categorical facet shard
+ * holding the value. The matching row IDs are intersected, then shown via
+ * setView. A search for a filename, pulsar or MD5 prefix fetches only the
+ * search shards covering the prefix.
+ *
+ * Author: Rob Lyon
+ * Email : robert.lyon@manchester.ac.uk
+ * web   : www.scienceguyrob.com
+ *
+ * License: GPLv3 (http://www.gnu.org/copyleft/gpl.html).
+ */
+
+var TestVectorFeed = (function ($) {
+
+    // The fixed height of a rendered row in pixels. Fixed heights mean the
+    // position of any row can be computed without rendering those above it.
+    var ROW_HEIGHT = 146;
+
+    // Extra rows rendered above and below the viewport, to hide fetch latency.
+    var OVERSCAN = 10;
+
+    // The tallest the table is made, in pixels. Browsers cap the height of an element
+    // (IE at about 1.5M px, Firefox at about 17.9M px), so beyond this the table is
+    // shorter than its rows, and the scroll position is scaled to a row index.
+    var MAX_HEIGHT = 1000000;
+
+    // The filters shown above the table, by facet name.
+    var RANGE_FILTERS = {period: 'Period (ms)', dm: 'DM', snr: 'S/N'};
+    var VALUE_FILTERS = {batch: 'Batch', type: 'Type', pulsar: 'EPN Pulsar'};
+
+    // The shortest search accepted, as shorter prefixes match too much of the catalogue.
+    var MIN_SEARCH = 3;
+
+    // The index of the first value >= target, or > target when after is true.
+    function bisect(values, target, after) {
+        var lo = 0, hi = values.length;
+
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+
+            if (values[mid] < target || (after && values[mid] === target)) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+
+        return lo;
+    }
+
+    // The row IDs present in every one of the given lists, in catalogue order.
+    function intersect(lists, total) {
+        var counts = new Uint8Array(total);
+        var ids = [];
+
+        for (var i = 0; i < lists.length; i++) {
+            for (var j = 0; j < lists[i].length; j++) {
+                counts[lists[i][j]]++;
+            }
+        }
+
+        for (var id = 0; id < total; id++) {
+            if (counts[id] === lists.length) {
+                ids.push(id);
+            }
+        }
+
+        return ids;
+    }
+
+    function escapeHtml(value) {
+        return String(value).replace(/&/g, '&amp;').replace(/</g, '&lt;')
+            .replace(/>/g, '&gt;').replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+    }
+
+    function TestVectorFeed(table, feedDir) {
+        this.table = $(table);
+        this.feedDir = feedDir;
+        this.manifest = null;
+        this.chunks = {};
+        this.pending = {};
+        this.facets = {};
+        this.sprites = null;
+        this.sparklines = null;
+
+        // The row IDs currently shown, in display order. null shows every row.
+        this.view = null;
+    }
+
+    TestVectorFeed.prototype.start = function () {
+        var self = this;
+
+        $.getJSON(this.feedDir + '/manifest.json', function (manifest) {
+            self.manifest = manifest;
+            self.columns = {};
+            $.each(manifest.columns, function (i, name) { self.columns[name] = i; });
+
+            self.batches = {};
+            $.each(manifest.batches, function (i, batch) { self.batches[batch] = true; });
+
+            // Profiles without an image, which show the placeholder image instead.
+            self.missing = {};
+            $.each(manifest.missing || [], function (i, profile) { self.missing[profile] = true; });
+
+            self.table.find('tbody').remove();
+            self.body = $('<tbody></tbody>').appendTo(self.table);
+            self.table.wrap('<div class="feed-viewport" style="height:80vh;overflow-y:auto;"></div>');
+            self.viewport = self.table.parent();
+            self.viewport.on('scroll', function () { self.render(); });
+            $(window).on('resize', function () { self.render(); });
+
+            self.renderFilters();
+
+            if (manifest.sparklines) {
+                $.getJSON(self.feedDir + '/' + manifest.sparklines, function (sparklines) {
+                    self.sparklines = sparklines;
+                    self.render();
+                }).fail(function () { self.render(); });
+            } else if (manifest.sprites) {
+                $.getJSON(manifest.sprites, function (atlasMap) {
+                    self.sprites = atlasMap;
+                    self.spriteDir = manifest.sprites.substring(0, manifest.sprites.lastIndexOf('/') + 1);
+                    self.render();
+                }).fail(function () { self.render(); });
+            } else {
+                self.render();
+            }
+        });
+    };
+
+    // Shows only the given row IDs, e.g. the result of a filter. null shows every row.
+    TestVectorFeed.prototype.setView = function (rowIds) {
+        this.view = rowIds;
+        this.viewport.scrollTop(0);
+        this.render();
+    };
+
+    // Adds the filter form above the table, if the feed has facet indexes.
+    TestVectorFeed.prototype.renderFilters = function () {
+        var self = this;
+        var facets = this.manifest.facets;
+        var form = $('<form class="feed-filters form-inline"></form>');
+
+        if (!facets) {
+            return;
+        }
+
+        if (this.manifest.search) {
+            form.append('Search <input type="text" class="input-medium" name="search" ' +
+                'placeholder="filename, pulsar or MD5" /> ');
+        }
+
+        $.each(RANGE_FILTERS, function (name, label) {
+            if (facets.numeric[name]) {
+                form.append(label + ' <input type="text" class="input-mini" name="' + name + '_min" placeholder="min" />' +
+                    ' - <input type="text" class="input-mini" name="' + name + '_max" placeholder="max" /> ');
+            }
+        });
+
+        $.each(VALUE_FILTERS, function (name, label) {
+            if (facets.categorical[name]) {
+                form.append(label + ' <input type="text" class="input-small" name="' + name + '" /> ');
+            }
+        });
+
+        form.append('<button type="submit" class="btn">Filter</button> <button type="reset" class="btn">Clear</button>');
+        form.on('submit', function (e) { e.preventDefault(); self.applyFilters(form); });
+        form.on('reset', function () { self.setView(null); });
+
+        this.viewport.before(form);
+    };
+
+    // Shows the rows matching every filter in the form.
+    TestVectorFeed.prototype.applyFilters = function (form) {
+        var self = this;
+        var facets = this.manifest.facets;
+        var queries = [];
+
+        $.each(facets.numeric, function (name) {
+            var min = parseFloat(form.find('[name="' + name + '_min"]').val());
+            var max = parseFloat(form.find('[name="' + name + '_max"]').val());
+
+            if (!isNaN(min) || !isNaN(max)) {
+                queries.push(self.rangeIds(name, isNaN(min) ? -Infinity : min, isNaN(max) ? Infinity : max));
+            }
+        });
+
+        $.each(facets.categorical, function (name) {
+            var value = $.trim(form.find('[name="' + name + '"]').val() || '');
+
+            if (value !== '') {
+                queries.push(self.valueIds(name, value));
+            }
+        });
+
+        var search = $.trim(form.find('[name="search"]').val() || '').toLowerCase();
+
+        if (search.length >= MIN_SEARCH) {
+            queries.push(this.searchIds(search));
+        }
+
+        if (queries.length === 0) {
+            this.setView(null);
+            return;
+        }
+
+        $.when.apply($, queries).done(function () {
+            self.setView(intersect(arguments, self.manifest.total));
+        });
+    };
+
+    // Fetches a facet or search index file once, resolving with its contents.
+    TestVectorFeed.prototype.loadIndex = function (file) {
+        if (!this.facets[file]) {
+            this.facets[file] = $.getJSON(this.feedDir + '/' + file).then(function (data) { return data; });
+        }
+
+        return this.facets[file];
+    };
+
+    // Resolves with the IDs of the rows whose value for a numeric facet is within [min, max].
+    TestVectorFeed.prototype.rangeIds = function (name, min, max) {
+        var self = this;
+        var buckets = $.grep(this.manifest.facets.numeric[name], function (bucket) {
+            return bucket[1] >= min && bucket[0] <= max;
+        });
+        var requests = $.map(buckets, function (bucket) { return self.loadIndex(bucket[2]); });
+
+        return $.when.apply($, requests).then(function () {
+            var ids = [];
+
+            for (var i = 0; i < arguments.length; i++) {
+                var bucket = arguments[i];
+                var end = bisect(bucket.values, max, true);
+
+                for (var j = bisect(bucket.values, min, false); j < end; j++) {
+                    ids.push(bucket.ids[j]);
+                }
+            }
+
+            return ids;
+        });
+    };
+
+    // Resolves with the IDs of the rows holding a value of a categorical facet.
+    TestVectorFeed.prototype.valueIds = function (name, value) {
+        var shard = $.grep(this.manifest.facets.categorical[name], function (shard) {
+            return shard[0] <= value && shard[1] >= value;
+        })[0];
+
+        if (!shard) {
+            return $.Deferred().resolve([]).promise();
+        }
+
+        return this.loadIndex(shard[2]).then(function (index) {
+            var i = bisect(index.values, value, false);
+            var deltas = index.values[i] === value ? index.ids[i] : [];
+            var ids = [];
+            var id = 0;
+
+            // The row IDs are delta encoded.
+            for (var i = 0; i < deltas.length; i++) {
+                id += deltas[i];
+                ids.push(id);
+            }
+
+            return ids;
+        });
+    };
+
+    // Resolves with the IDs of the rows with a search key starting with the (lower case) prefix.
+    TestVectorFeed.prototype.searchIds = function (prefix) {
+        var self = this;
+        var bounds = this.manifest.search.bounds;
+        var files = this.manifest.search.files;
+        var requests = [];
+
+        // Shard i holds the keys from bounds[i] up to bounds[i + 1]. So the matches start in
+        // the last shard whose bound sorts before the prefix, and continue through every
+        // following shard whose bound starts with the prefix.
+        var first = Math.max(0, bisect(bounds, prefix, true) - 1);
+
+        for (var i = first; i < bounds.length && (i === first || bounds[i].indexOf(prefix) === 0); i++) {
+            requests.push(this.loadIndex(files[i]));
+        }
+
+        return $.when.apply($, requests).then(function () {
+            var seen = {};
+            var ids = [];
+
+            for (var i = 0; i < arguments.length; i++) {
+                var shard = arguments[i];
+
+                for (var j = bisect(shard.keys, prefix, false); j < shard.keys.length; j++) {
+                    if (shard.keys[j].indexOf(prefix) !== 0) {
+                        break;
+                    }
+
+                    for (var k = 0; k < shard.ids[j].length; k++) {
+                        if (!seen[shard.ids[j][k]]) {
+                            seen[shard.ids[j][k]] = true;
+                            ids.push(shard.ids[j][k]);
+                        }
+                    }
+                }
+            }
+
+            return ids;
+        });
+    };
+
+    TestVectorFeed.prototype.count = function () {
+        return this.view === null ? this.manifest.total : this.view.length;
+    };
+
+    TestVectorFeed.prototype.rowId = function (index) {
+        return this.view === null ? index : this.view[index];
+    };
+
+    TestVectorFeed.prototype.loadChunk = function (chunk) {
+        var self = this;
+
+        if (this.chunks[chunk] || this.pending[chunk]) {
+            return;
+        }
+
+        this.pending[chunk] = $.getJSON(this.feedDir + '/' + this.manifest.chunks[chunk], function (rows) {
+            self.chunks[chunk] = rows;
+            delete self.pending[chunk];
+            self.render();
+        });
+    };
+
+    TestVectorFeed.prototype.render = function () {
+        var count = this.count();
+        var viewportHeight = this.viewport.height();
+        var scrollTop = this.viewport.scrollTop();
+        var height = Math.min(count * ROW_HEIGHT, MAX_HEIGHT);
+
+        // The (fractional) index of the row at the top of the viewport. When the table is
+        // capped, the scroll range covers every row, so the last row can still be reached.
+        var top = scrollTop / ROW_HEIGHT;
+        if (height < count * ROW_HEIGHT) {
+            var rows = Math.max(0, count - viewportHeight / ROW_HEIGHT);
+            top = rows * Math.min(1, scrollTop / Math.max(1, height - viewportHeight));
+        }
+
+        // The top row is drawn at the scroll position, less the part of it scrolled past,
+        // with as many rows of the overscan above it as there is room for.
+        var start = Math.floor(top);
+        var offset = scrollTop - (top - start) * ROW_HEIGHT;
+        var above = Math.max(0, Math.min(OVERSCAN, start, Math.floor(offset / ROW_HEIGHT)));
+
+        // Rows below the viewport are only rendered while they fit in the table's height.
+        var first = start - above;
+        var last = Math.min(count, start + Math.ceil(viewportHeight / ROW_HEIGHT) + OVERSCAN,
+            start + Math.ceil((height - offset) / ROW_HEIGHT));
+        var spacer = Math.max(0, offset - above * ROW_HEIGHT);
+        var html = [];
+
+        html.push('<tr style="height:' + spacer + 'px"></tr>');
+
+        for (var i = first; i < last; i++) {
+            var id = this.rowId(i);
+            var chunk = Math.floor(id / this.manifest.chunk_size);
+
+            if (this.chunks[chunk]) {
+                html.push(this.renderRow(this.chunks[chunk][id % this.manifest.chunk_size]));
+            } else {
+                this.loadChunk(chunk);
+                html.push('<tr style="height:' + ROW_HEIGHT + 'px"><td colspan="12">Loading...</td></tr>');
+            }
+        }
+
+        html.push('<tr style="height:' + Math.max(0, height - spacer - (last - first) * ROW_HEIGHT) + 'px"></tr>');
+
+        this.body.html(html.join(''));
+    };
+
+    // Renders a row in the same form as PageBuilder.createTableData.
+    TestVectorFeed.prototype.renderRow = function (row) {
+        var c = this.columns;
+        var batch = escapeHtml(row[c.batch]);
+        var epn = escapeHtml(row[c.epn]);
+        var cells = [escapeHtml(row[c.type])];
+
+        if (this.batches[row[c.batch]]) {
+            cells.push('<a href="#" onclick="return TestVectorBatches.show(\'' + batch + '\');">' + batch + '</a>');
+        } else {
+            cells.push(batch);
+        }
+
+        cells.push(escapeHtml(row[c.period]), escapeHtml(row[c.dm]), escapeHtml(row[c.z]), escapeHtml(row[c.snr]));
+        cells.push(this.renderThumbnail(row[c.epn]) + epn);
+        cells.push(escapeHtml(row[c.freq]));
+        cells.push('<a href="' + escapeHtml(row[c.path]) + '">' + escapeHtml(row[c.filename]) + '</a>');
+        cells.push(escapeHtml(row[c.size_gb]), escapeHtml(row[c.md5]), escapeHtml(row[c.size_bits]));
+
+        return '<tr style="height:' + ROW_HEIGHT + 'px"><td>' + cells.join('</td><td>') + '</td></tr>';
+    };
+
+    // Renders a profile thumbnail, as a sparkline or from the sprite atlases if the profile is in them.
+    TestVectorFeed.prototype.renderThumbnail = function (profile) {
+        var epn = escapeHtml(profile);
+        var s = this.sparklines;
+
+        // As ProfileSparkline.svg.
+        if (s !== null && s.paths.hasOwnProperty(profile)) {
+            return '<span class="flagicon"><svg class="sparkline" width="' + s.width + '" height="' + s.height +
+                '" viewBox="0 -1 ' + (s.points - 1) + ' ' + (s.height + 2) + '" preserveAspectRatio="none"><title>' +
+                epn + '</title><path d="' + s.paths[profile] + '" fill="#00a290" stroke="#00a290" stroke-width="1" ' +
+                'vector-effect="non-scaling-stroke"/></svg>&#160;</span>';
+        }
+
+        if (this.sprites !== null && this.sprites.profiles.hasOwnProperty(profile)) {
+            var tile = this.sprites.profiles[profile];
+            var atlas = this.spriteDir + this.sprites.atlases[tile[0]].file;
+
+            return '<span class="flagicon"><span class="sprite thumbborder" title="' + epn +
+                '" style="background-image:url(&quot;' + escapeHtml(atlas) + '&quot;);background-position:-' +
+                tile[1] + 'px -' + tile[2] + 'px"></span>&#160;</span>';
+        }
+
+        var src = escapeHtml(this.manifest.asc_dir) + '/' + epn + '.png';
+        if (this.missing.hasOwnProperty(profile)) {
+            src = escapeHtml(this.manifest.placeholder);
+        }
+
+        return '<span class="flagicon"><img alt="' + epn + '" src="' + src +
+            '" width="128" height="128" class="thumbborder" />&#160;</span>';
+    };
+
+    return TestVectorFeed;
+
+})(jQuery);
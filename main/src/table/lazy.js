@@ -0,0 +1,74 @@
+/*
+ * lazy.js
+ *
+ * Lazy loads the profile thumbnails in the SKA test vector table written by
+ * PageBuilder.py. Thumbnails are written without an image URL, i.e. as
+ *
+ *   <span class="sprite" data-sprite="<atlas URL>" style="background-position:...">
+ *   <img data-src="<image URL>">
+ *
+ * and the URL is only set once the row scrolls into view. Dynatable re-renders
+ * the table body whenever the page, sort or search changes, so the table is
+ * rescanned after every update.
+ *
+ * Author: Rob Lyon
+ * Email : robert.lyon@manchester.ac.uk
+ * web   : www.scienceguyrob.com
+ *
+ * License: GPLv3 (http://www.gnu.org/copyleft/gpl.html).
+ */
+
+var LazyThumbnails = (function ($) {
+
+    // Start loading thumbnails shortly before they scroll into view.
+    var MARGIN = '200px';
+
+    function load(element) {
+        var sprite = element.getAttribute('data-sprite');
+
+        if (sprite !== null) {
+            element.style.backgroundImage = 'url("' + sprite + '")';
+            element.removeAttribute('data-sprite');
+        } else {
+            element.src = element.getAttribute('data-src');
+            element.removeAttribute('data-src');
+        }
+    }
+
+    function watch(table) {
+        var observer = null;
+
+        if ('IntersectionObserver' in window) {
+            observer = new IntersectionObserver(function (entries) {
+                $.each(entries, function (i, entry) {
+                    if (entry.isIntersecting) {
+                        observer.unobserve(entry.target);
+                        load(entry.target);
+                    }
+                });
+            }, {rootMargin: MARGIN});
+        }
+
+        function scan() {
+            $(table).find('[data-sprite], img[data-src]').each(function () {
+                if (observer === null) {
+                    load(this);     // Older browsers simply load every thumbnail shown.
+                } else {
+                    observer.observe(this);
+                }
+            });
+        }
+
+        $(table).on('dynatable:afterUpdate', function () {
+            if (observer !== null) {
+                observer.disconnect();
+            }
+            scan();
+        });
+
+        $(scan);
+    }
+
+    return {watch: watch};
+
+})(jQuery);
@@ -41,6 +41,22 @@ import sys
 from unittest import TestLoader, TextTestRunner, TestSuite
 
 from test.src.utilities.TestCommon import TestCommon
+from test.src.utilities.TestTestVectorCorpusGenerator import TestTestVectorCorpusGenerator
+from test.src.utilities.TestTestVectorDirectoryParser import TestTestVectorDirectoryParser
+from test.src.utilities.TestHashCache import TestHashCache
+from test.src.utilities.TestPageBuilder import TestPageBuilder
+from test.src.utilities.TestFacetIndex import TestFacetIndex
+from test.src.utilities.TestSearchIndex import TestSearchIndex
+from test.src.utilities.TestThumbnailAtlas import TestThumbnailAtlas
+from test.src.utilities.TestProfileSparkline import TestProfileSparkline
+from test.src.utilities.TestSitePublisher import TestSitePublisher
+from test.src.utilities.TestCatalogueStatistics import TestCatalogueStatistics
+from test.src.utilities.TestCatalogueMerger import TestCatalogueMerger
+from test.src.utilities.TestExternalSorter import TestExternalSorter
+from test.src.utilities.TestAssetIndex import TestAssetIndex
+from test.src.utilities.TestProfileLibrary import TestProfileLibrary
+from test.src.utilities.TestProfileBatch import TestProfileBatch
+from test.src.utilities.TestProfileRasteriser import TestProfileRasteriser
 
 
 # ******************************
@@ -142,7 +158,23 @@ class TestSuiteRunner(TestSuite):
 
         loader = TestLoader()
         suite = TestSuite((
-            loader.loadTestsFromTestCase(TestCommon)
+            loader.loadTestsFromTestCase(TestCommon),
+            loader.loadTestsFromTestCase(TestTestVectorCorpusGenerator),
+            loader.loadTestsFromTestCase(TestTestVectorDirectoryParser),
+            loader.loadTestsFromTestCase(TestHashCache),
+            loader.loadTestsFromTestCase(TestPageBuilder),
+            loader.loadTestsFromTestCase(TestFacetIndex),
+            loader.loadTestsFromTestCase(TestSearchIndex),
+            loader.loadTestsFromTestCase(TestThumbnailAtlas),
+            loader.loadTestsFromTestCase(TestProfileSparkline),
+            loader.loadTestsFromTestCase(TestSitePublisher),
+            loader.loadTestsFromTestCase(TestCatalogueStatistics),
+            loader.loadTestsFromTestCase(TestCatalogueMerger),
+            loader.loadTestsFromTestCase(TestExternalSorter),
+            loader.loadTestsFromTestCase(TestAssetIndex),
+            loader.loadTestsFromTestCase(TestProfileLibrary),
+            loader.loadTestsFromTestCase(TestProfileBatch),
+            loader.loadTestsFromTestCase(TestProfileRasteriser)
         ))
 
         runner = TextTestRunner(verbosity=3)
@@ -0,0 +1,187 @@
+"""
+**************************************************************************
+
+ TestAssetIndex.py
+
+**************************************************************************
+ Description:
+
+ Tests the asset index finds the profile images, profile data and batch
+ files test vectors reference, and reports those missing.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from main.src.AssetIndex import AssetIndex
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestAssetIndex(unittest.TestCase):
+    """
+    The tests for the AssetIndex class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    @staticmethod
+    def vector(batch, epn):
+        """ Creates the parameters of a test vector, only the batch and EPN profile name are checked."""
+
+        return ['FakePulsar_' + batch + '_' + epn + '.fil', batch, 'FakePulsar', '0.1', '10', '0.0', '15', epn]
+
+    # ****************************************************************************************************
+
+    def report(self):
+        """ Reads the missing asset report written next to the page."""
+
+        with open(os.path.join(self.root, 'index_missing_assets.txt')) as f:
+            return f.read()
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_check(self):
+        """ Tests the missing assets are recorded, with the number of test vectors referencing them."""
+
+        index = AssetIndex(self.asc_dir, {'Batch_1.txt': 'Batch 1 parameters'})
+
+        vectors = [self.vector('1', 'J0000+0000_1400'), self.vector('1', 'J1111+1111_430'),
+                   self.vector('2', 'J1111+1111_430'), self.vector('2', 'J2222+2222_1400')]
+
+        # The test vectors are passed through unchanged.
+        self.assertEqual(list(index.track(iter(vectors))), vectors)
+
+        self.assertEqual(index.missing['image'], {'J1111+1111_430.png': 2, 'J2222+2222_1400.png': 1})
+        self.assertEqual(index.missing['profile'], {'J2222+2222_1400.asc': 1})
+        self.assertEqual(index.missing['batch'], {'Batch_2.txt': 2})
+        self.assertEqual(index.missingImages(), ['J1111+1111_430', 'J2222+2222_1400'])
+
+        self.assertEqual(index.imageFor('J0000+0000_1400'), self.asc_dir + '/J0000+0000_1400.png')
+        self.assertEqual(index.imageFor('J1111+1111_430'), AssetIndex.PLACEHOLDER)
+
+    # ****************************************************************************************************
+
+    def test_report(self):
+        """ Tests the report lists each missing asset, and is removed once nothing is missing."""
+
+        output_file = os.path.join(self.root, 'index.html')
+
+        index = AssetIndex(self.asc_dir)
+        index.check(self.vector('1', 'J1111+1111_430'))
+
+        self.assertEqual(index.writeReport(output_file), 2)
+
+        report = self.report()
+        self.assertTrue('Profile images (run CreatePulseProfilePng.py) missing: 1\n'
+                        '\tJ1111+1111_430.png (1 test vectors)' in report)
+        self.assertTrue('Batch files missing: 1\n\tBatch_1.txt (1 test vectors)' in report)
+        self.assertTrue('Profile data' not in report)
+
+        index = AssetIndex(self.asc_dir, {'Batch_1.txt': 'Batch 1 parameters'})
+        index.check(self.vector('1', 'J0000+0000_1400'))
+
+        self.assertEqual(index.writeReport(output_file), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'index_missing_assets.txt')))
+
+    # ****************************************************************************************************
+
+    def test_library_and_substitutes(self):
+        """ Tests library profiles are available, and images shown in place of another are not missing."""
+
+        library = {'J2222+2222_1400': None}
+
+        index = AssetIndex(self.asc_dir, library=library, substitutes=[lambda epn: epn == 'J1111+1111_430'])
+        index.check(self.vector('1', 'J1111+1111_430'))
+        index.check(self.vector('1', 'J2222+2222_1400'))
+
+        self.assertEqual(index.missingImages(), ['J2222+2222_1400'])
+        self.assertEqual(index.missing['profile'], {})
+
+        # An index given the image names found does not list the directory.
+        missing_dir = os.path.join(self.root, 'missing')
+        shared = AssetIndex(missing_dir, images=index.images)
+
+        self.assertEqual(shared.imageFor('J0000+0000_1400'), missing_dir + '/J0000+0000_1400.png')
+        self.assertEqual(shared.imageFor('J2222+2222_1400'), AssetIndex.PLACEHOLDER)
+
+    # ****************************************************************************************************
+
+    def test_no_asc_dir(self):
+        """ Tests every profile asset is missing without an .asc directory."""
+
+        index = AssetIndex(os.path.join(self.root, 'missing'))
+        index.check(self.vector('1', 'J0000+0000_1400'))
+
+        self.assertEqual(index.missingImages(), ['J0000+0000_1400'])
+        self.assertEqual(index.missing['profile'], {'J0000+0000_1400.asc': 1})
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates an .asc directory, holding one profile with its image, and one without."""
+
+        self.root = tempfile.mkdtemp()
+        self.asc_dir = os.path.join(self.root, 'asc')
+
+        os.mkdir(self.asc_dir)
+
+        for file_name in ['J0000+0000_1400.asc', 'J0000+0000_1400.png', 'J1111+1111_430.asc']:
+            open(os.path.join(self.asc_dir, file_name), 'w').close()
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Deletes the temporary directory."""
+
+        shutil.rmtree(self.root)
+
+    # ****************************************************************************************************
@@ -0,0 +1,138 @@
+"""
+**************************************************************************
+
+ TestCatalogueMerger.py
+
+**************************************************************************
+ Description:
+
+ Tests the merging of test vector catalogues, and the removal of test
+ vectors listed in more than one catalogue.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+from main.src.CatalogueMerger import CatalogueMerger
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestCatalogueMerger(unittest.TestCase):
+    """
+    The tests for the CatalogueMerger class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    @staticmethod
+    def vector(file_name, dm, md5):
+        """ Builds the parameter list of a test vector, see PageBuilder.readTestVectors."""
+
+        return [file_name, '1', 'FakePulsar', '5.0', dm, '0.0', '10', 'J0000+0000_1400', '1400',
+                '/tv/' + file_name, '/tv', '8', '1e-09', md5]
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_merge_removes_duplicates(self):
+        """ Tests sorted catalogues are merged, keeping the first copy of each test vector."""
+
+        a = [self.vector('a.fil', '10', 'aa'), self.vector('b.fil', '20', 'bb'), self.vector('d.fil', '5', 'dd')]
+        b = [self.vector('b.fil', '20', 'bb'), self.vector('c.fil', '1', 'cc'), self.vector('d.fil', '5', 'dd')]
+
+        merger = CatalogueMerger()
+        merged = list(merger.merge([('a.csv', a), ('b.csv', b)]))
+
+        self.assertEqual([parameters[0] for parameters in merged], ['a.fil', 'b.fil', 'c.fil', 'd.fil'])
+        self.assertEqual(merger.merged, 4)
+        self.assertEqual(merger.duplicates, 2)
+
+        # The duplicates come from the first catalogue listing them.
+        self.assertTrue(merged[1] is a[1])
+        self.assertTrue(merged[3] is a[2])
+
+    # ****************************************************************************************************
+
+    def test_same_name_different_hash(self):
+        """ Tests test vectors with the same file name but different contents are both kept."""
+
+        a = [self.vector('a.fil', '10', 'aa')]
+        b = [self.vector('a.fil', '10', 'ab')]
+
+        merger = CatalogueMerger()
+
+        self.assertEqual(len(list(merger.merge([('a.csv', a), ('b.csv', b)]))), 2)
+        self.assertEqual(merger.duplicates, 0)
+
+    # ****************************************************************************************************
+
+    def test_merge_unsorted(self):
+        """ Tests merging a catalogue that is not sorted by the merge column is an error."""
+
+        a = [self.vector('b.fil', '20', 'bb'), self.vector('a.fil', '10', 'aa')]
+
+        merger = CatalogueMerger()
+
+        self.assertFalse(merger.isSorted(a))
+        self.assertRaises(ValueError, list, merger.merge([('a.csv', a)]))
+
+    # ****************************************************************************************************
+
+    def test_sort_numeric_column(self):
+        """ Tests unsorted catalogues are sorted by a numeric column, then merged without duplicates."""
+
+        a = [self.vector('a.fil', '10', 'aa'), self.vector('b.fil', '9', 'bb'), self.vector('x.fil', '', 'xx')]
+        b = [self.vector('c.fil', '100', 'cc'), self.vector('a.fil', '10', 'aa'), self.vector('b.fil', '9', 'bb')]
+
+        merger = CatalogueMerger('dm')
+
+        # Sorted numerically, not as text, with values that are not numbers last.
+        self.assertFalse(merger.isSorted(b))
+        self.assertTrue(merger.isSorted(sorted(b, key=merger.key)))
+
+        merged = list(merger.sort([('a.csv', a), ('b.csv', b)], 1024))
+
+        self.assertEqual([parameters[0] for parameters in merged], ['b.fil', 'a.fil', 'c.fil', 'x.fil'])
+        self.assertEqual(merger.duplicates, 2)
+
+        # The sorted test vectors are the same as those read.
+        self.assertEqual(merged[0], a[1])
+
+    # ****************************************************************************************************
@@ -0,0 +1,141 @@
+"""
+**************************************************************************
+
+ TestCatalogueStatistics.py
+
+**************************************************************************
+ Description:
+
+ Tests the catalogue statistics gathered as the test vectors are read.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+import numpy
+
+from main.src.CatalogueStatistics import CatalogueStatistics
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestCatalogueStatistics(unittest.TestCase):
+    """
+    The tests for the CatalogueStatistics class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    @staticmethod
+    def parameters(batch, period, dm, epn, size_bits, size_gb):
+        """ Creates the parameters of a test vector, with its size in bits and rounded to GB."""
+
+        return ['name.fil', batch, 'FakePulsar', period, dm, '0.0', '15', epn, '1400', '', '', size_bits,
+                size_gb, '']
+
+    # ****************************************************************************************************
+
+    def catalogue(self):
+        """
+        The parameters of a small catalogue, including missing and invalid values. The sizes
+        in GB are rounded, so differ from the sizes in bits they are computed from.
+        """
+
+        return [self.parameters('1', '1.0', '10', 'J0000+0000_1400', '16000000000', '2.0'),
+                self.parameters('1', '10.0', '20', 'J0000+0000_1400', '16000000000', '2.0'),
+                self.parameters('2', '100.0', '30', 'J1111+1111_430', '4000000000', '0.5'),
+                self.parameters('3', '0', 'abc', 'J1111+1111_430', '2000000000', '0.3'),
+                self.parameters('<4>', 'abc', '40', 'J2222+2222_1400', '', '')]
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_compute(self):
+        """ Tests the histograms and groups, ignoring missing and invalid values."""
+
+        statistics = CatalogueStatistics(bins=3, top=2)
+
+        catalogue = self.catalogue()
+        self.assertEqual(list(statistics.track(iter(catalogue))), catalogue)
+
+        result = statistics.compute()
+
+        self.assertEqual(result['count'], 5)
+        self.assertAlmostEqual(result['size'], 4.75)
+
+        histograms = dict([(label, (counts, edges)) for label, counts, edges in result['histograms']])
+
+        # Periods are binned by log10, so 1, 10 and 100 fall in separate bins, and 0 is ignored.
+        counts, edges = histograms['Period (ms)']
+        self.assertEqual(counts.tolist(), [1, 1, 1])
+        self.assertTrue(numpy.allclose(edges, [1.0, 10 ** (2 / 3.0), 10 ** (4 / 3.0), 100.0]))
+
+        counts, edges = histograms['DM']
+        self.assertEqual(counts.tolist(), [1, 1, 2])
+        self.assertTrue(numpy.allclose(edges, [10, 20, 30, 40]))
+
+        groups = dict([(label, (rows, total)) for label, rows, total in result['groups']])
+
+        # The largest groups by size, largest first, summed in bits.
+        self.assertEqual(groups['Batch'], ([('1', 2, 4.0), ('2', 1, 0.5)], 4))
+        self.assertEqual(groups['EPN Template'], ([('J0000+0000_1400', 2, 4.0), ('J1111+1111_430', 2, 0.75)], 3))
+
+    # ****************************************************************************************************
+
+    def test_render(self):
+        """ Tests the statistics section lists the totals, charts and tables."""
+
+        statistics = CatalogueStatistics(bins=3, top=2)
+        self.assertEqual(statistics.render(), '')
+
+        for parameters in self.catalogue():
+            statistics.add(parameters)
+
+        html = statistics.render()
+
+        self.assertTrue('<p>5 test vectors, using 4.75 GB of storage.</p>' in html)
+        self.assertEqual(html.count('<svg '), 4)
+        self.assertTrue('<h4>Storage by Batch (largest 2 of 4)</h4>' in html)
+        self.assertTrue('<tr><td>1</td><td>2</td><td>4</td></tr>' in html)
+
+        # Group names are escaped.
+        statistics = CatalogueStatistics(top=10)
+        statistics.add(self.catalogue()[4])
+        self.assertTrue('<td>&lt;4&gt;</td>' in statistics.render())
+
+    # ****************************************************************************************************
@@ -0,0 +1,139 @@
+"""
+**************************************************************************
+
+ TestExternalSorter.py
+
+**************************************************************************
+ Description:
+
+ Tests the external merge sort, which spills rows to disk beyond a
+ memory budget.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import random
+import unittest
+
+from main.src.ExternalSorter import ExternalSorter
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestExternalSorter(unittest.TestCase):
+    """
+    The tests for the ExternalSorter class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    @staticmethod
+    def rows(count, seed=0):
+        """ Builds rows of (value, position) with many repeated values, in a random order."""
+
+        generator = random.Random(seed)
+
+        return [[str(generator.randint(0, count // 10)), str(position)] for position in range(count)]
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_sort_in_memory(self):
+        """ Tests rows within the memory budget are sorted without spilling."""
+
+        rows = self.rows(1000)
+        sorter = ExternalSorter(lambda row: int(row[0]))
+
+        self.assertEqual(list(sorter.sort(rows)), sorted(rows, key=lambda row: int(row[0])))
+        self.assertEqual(sorter.spilled, 0)
+
+    # ****************************************************************************************************
+
+    def test_sort_spilled(self):
+        """ Tests rows beyond the memory budget are spilled to runs, and merged in stable order."""
+
+        rows = self.rows(5000)
+
+        # Room for about 25 rows, so a couple of hundred runs, which are merged
+        # together (MAX_RUNS at a time) before the final merge.
+        sorter = ExternalSorter(lambda row: int(row[0]), memory=25 * 256)
+
+        # Python's sort is stable, so equal values keep their positions.
+        self.assertEqual(list(sorter.sort(rows)), sorted(rows, key=lambda row: int(row[0])))
+        self.assertTrue(sorter.spilled > ExternalSorter.MAX_RUNS)
+
+    # ****************************************************************************************************
+
+    def test_add_and_rows(self):
+        """ Tests adding rows one at a time is equivalent to sorting them, and empties the sorter."""
+
+        rows = self.rows(2000, seed=1)
+        sorter = ExternalSorter(lambda row: row[0], memory=100 * 256)
+
+        for row in rows:
+            sorter.add(tuple(row))
+
+        self.assertTrue(len(sorter.runs) > 0)
+
+        # Spilled rows are read back as lists.
+        self.assertEqual([list(row) for row in sorter.rows()], sorted(rows, key=lambda row: row[0]))
+        self.assertEqual(sorter.runs, [])
+        self.assertEqual(list(sorter.rows()), [])
+
+    # ****************************************************************************************************
+
+    def test_close(self):
+        """ Tests the runs of a sort stopped early are closed."""
+
+        sorter = ExternalSorter(lambda row: row[0], memory=10 * 256)
+
+        for row in self.rows(500):
+            sorter.add(row)
+
+        runs = list(sorter.runs)
+        self.assertTrue(len(runs) > 0)
+
+        sorter.close()
+
+        self.assertEqual(sorter.runs, [])
+        self.assertEqual(sorter.buffered, [])
+
+        for run in runs:
+            self.assertTrue(run.closed)
+
+    # ****************************************************************************************************
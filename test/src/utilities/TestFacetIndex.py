@@ -0,0 +1,175 @@
+"""
+**************************************************************************
+
+ TestFacetIndex.py
+
+**************************************************************************
+ Description:
+
+ Tests the facet indexes hold the row IDs of each facet value.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import json
+import unittest
+
+from main.src.FacetIndex import FacetIndex
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestFacetIndex(unittest.TestCase):
+    """
+    The tests for the FacetIndex class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def write(self, index):
+        """ Writes the index, returning the facet descriptions and the files written by name."""
+
+        files = {}
+
+        def write_json(path, data):
+            files[path.split('/')[-1]] = json.loads(json.dumps(data))
+
+        facets, file_names = index.write('feed', write_json)
+
+        self.assertEqual(sorted(file_names), sorted(files.keys()))
+
+        return json.loads(json.dumps(facets)), files
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def parameters(batch, vector_type, period, epn):
+        """ Creates the parameters of a test vector."""
+
+        return ['name.fil', batch, vector_type, period, '10', '0.0', '15', epn, '1400', '', '', '', '', '']
+
+    # ****************************************************************************************************
+
+    def categorical(self, facets, files, name):
+        """ Reads a categorical facet, as a dictionary mapping each value to its row IDs."""
+
+        rows = {}
+        previous = None
+
+        for first, last, file_name in facets['categorical'][name]:
+
+            shard = files[file_name]
+
+            self.assertEqual([first, last], [shard['values'][0], shard['values'][-1]])
+            self.assertTrue(previous is None or first > previous)
+            previous = last
+
+            for value, deltas in zip(shard['values'], shard['ids']):
+                row_ids = []
+                for delta in deltas:
+                    row_ids.append(delta + (row_ids[-1] if len(row_ids) > 0 else 0))
+                rows[value] = row_ids
+
+        return rows
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_numeric(self):
+        """ Tests numeric values are bucketed in value order, skipping those that are not numbers."""
+
+        index = FacetIndex(bucket_size=2, memory=1)
+
+        for row_id, period in enumerate(['5.0', '1.5', 'abc', '3', 'nan', '1.5', '10']):
+            index.add(row_id, self.parameters('1', 'FakePulsar', period, 'J0000+0000_1400'))
+
+        facets, files = self.write(index)
+
+        buckets = facets['numeric']['period']
+        self.assertEqual(buckets, [[1.5, 1.5, 'facet_period_0.json'], [3.0, 5.0, 'facet_period_1.json'],
+                                   [10.0, 10.0, 'facet_period_2.json']])
+
+        self.assertEqual(files['facet_period_0.json'], {'values': [1.5, 1.5], 'ids': [1, 5]})
+        self.assertEqual(files['facet_period_1.json'], {'values': [3.0, 5.0], 'ids': [3, 0]})
+        self.assertEqual(files['facet_period_2.json'], {'values': [10.0], 'ids': [6]})
+
+        # Every row has a DM, so its 7 values fill 4 buckets.
+        self.assertEqual(len(facets['numeric']['dm']), 4)
+
+    # ****************************************************************************************************
+
+    def test_categorical(self):
+        """ Tests categorical values map to their row IDs, with pulsars named without a frequency."""
+
+        index = FacetIndex()
+
+        rows = [('1', 'FakePulsar', 'J0000+0000_1400'), ('2', 'RFI', 'J0000+0000_430_1'),
+                ('1', 'FakePulsar', 'B1234+56_1400'), ('10', 'FakePulsar', 'J0000+0000_1400')]
+
+        for row_id, (batch, vector_type, epn) in enumerate(rows):
+            index.add(row_id, self.parameters(batch, vector_type, '1', epn))
+
+        facets, files = self.write(index)
+
+        self.assertEqual(self.categorical(facets, files, 'batch'), {'1': [0, 2], '2': [1], '10': [3]})
+        self.assertEqual(self.categorical(facets, files, 'type'), {'FakePulsar': [0, 2, 3], 'RFI': [1]})
+        self.assertEqual(self.categorical(facets, files, 'pulsar'), {'J0000+0000': [0, 1, 3], 'B1234+56': [2]})
+
+        self.assertEqual(FacetIndex.deltaEncode([3, 5, 9]), [3, 2, 4])
+
+    # ****************************************************************************************************
+
+    def test_categorical_shards(self):
+        """ Tests categorical facets with many values are split into shards of sorted values."""
+
+        index = FacetIndex(shard_bytes=64)
+
+        for row_id in range(200):
+            index.add(row_id, self.parameters(str(row_id % 50), 'FakePulsar', '1', 'J0000+0000_1400'))
+
+        facets, files = self.write(index)
+
+        self.assertTrue(len(facets['categorical']['batch']) > 1)
+        self.assertEqual(len(facets['categorical']['type']), 1)
+
+        batches = self.categorical(facets, files, 'batch')
+
+        self.assertEqual(len(batches), 50)
+        self.assertEqual(batches['7'], [7, 57, 107, 157])
+
+    # ****************************************************************************************************
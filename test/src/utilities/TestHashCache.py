@@ -0,0 +1,165 @@
+"""
+**************************************************************************
+
+ TestHashCache.py
+
+**************************************************************************
+ Description:
+
+ Tests the persistent, LRU bounded cache of test vector hashes.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from main.src.HashCache import HashCache
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestHashCache(unittest.TestCase):
+    """
+    The tests for the HashCache class.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_key(self):
+        """ Tests the key changes when a file changes, and is None for a missing file."""
+
+        path = os.path.join(self.cache_dir, 'a.fil')
+
+        with open(path, 'w') as f:
+            f.write('1234')
+
+        key = HashCache.key(path)
+        self.assertEqual(key[2], 4)
+        self.assertEqual(HashCache.key(path), key)
+
+        os.utime(path, (0, 1))
+        self.assertNotEqual(HashCache.key(path), key)
+
+        self.assertIsNone(HashCache.key(os.path.join(self.cache_dir, 'missing.fil')))
+
+    # ****************************************************************************************************
+
+    def test_get_and_put(self):
+        """ Tests hashes are returned once stored, and counted as hits or misses."""
+
+        cache = HashCache(self.cache_dir)
+
+        self.assertIsNone(cache.get((1, 2, 3, 4)))
+        cache.put((1, 2, 3, 4), 'aa')
+        self.assertEqual(cache.get((1, 2, 3, 4)), 'aa')
+
+        # Files that cannot be read have no key, so are never cached.
+        cache.put(None, 'bb')
+        self.assertIsNone(cache.get(None))
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+
+    # ****************************************************************************************************
+
+    def test_evict_least_recently_used(self):
+        """ Tests the least recently used entries are evicted once the cache is full."""
+
+        cache = HashCache(self.cache_dir, max_entries=2)
+
+        cache.put((1, 1, 1, 1), 'aa')
+        cache.put((2, 2, 2, 2), 'bb')
+
+        # Using the first entry makes the second the least recently used.
+        cache.get((1, 1, 1, 1))
+        cache.put((3, 3, 3, 3), 'cc')
+
+        self.assertEqual(cache.get((1, 1, 1, 1)), 'aa')
+        self.assertIsNone(cache.get((2, 2, 2, 2)))
+        self.assertEqual(cache.get((3, 3, 3, 3)), 'cc')
+
+    # ****************************************************************************************************
+
+    def test_save_and_load(self):
+        """ Tests the cache is saved, and merged with entries saved by another cache meanwhile."""
+
+        first = HashCache(self.cache_dir)
+        second = HashCache(self.cache_dir)
+
+        first.put((1, 1, 1, 1), 'aa')
+        first.save()
+
+        second.put((2, 2, 2, 2), 'bb')
+        second.save()
+
+        # Corrupt lines are skipped.
+        with open(os.path.join(self.cache_dir, HashCache.CACHE_FILE_NAME), 'a') as f:
+            f.write('x,1,1,1,cc,0\n')
+
+        loaded = HashCache(self.cache_dir)
+
+        self.assertEqual(loaded.get((1, 1, 1, 1)), 'aa')
+        self.assertEqual(loaded.get((2, 2, 2, 2)), 'bb')
+        self.assertEqual(len(loaded.entries), 2)
+
+        # No temporary files are left behind.
+        self.assertEqual(os.listdir(self.cache_dir), [HashCache.CACHE_FILE_NAME])
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates an empty cache directory."""
+
+        self.cache_dir = tempfile.mkdtemp()
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Deletes the cache directory."""
+
+        shutil.rmtree(self.cache_dir)
+
+    # ****************************************************************************************************
@@ -0,0 +1,329 @@
+"""
+**************************************************************************
+
+ TestPageBuilder.py
+
+**************************************************************************
+ Description:
+
+ Tests the page builder writes each output format from a test vector
+ database file.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from main.src.PageBuilder import PageBuilder
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestPageBuilder(unittest.TestCase):
+    """
+    The tests for the PageBuilder class.
+    """
+
+    # The page builder reads the HTML fragments relative to the source directory.
+    src_dir = os.path.abspath('../..') + '/main/src'
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def row(self, number, batch, epn):
+        """ Creates a test vector database line."""
+
+        file_name = 'FakePulsar_' + batch + '_0.' + str(number) + '_10_0.0_15_' + epn + '.fil'
+        path = os.path.join(self.root, 'vectors', file_name)
+
+        return ','.join([file_name, batch, 'FakePulsar', '0.' + str(number), '10', '0.0', '15', epn,
+                         epn.split('_')[1], path, os.path.dirname(path), '8192', '0.000001',
+                         '%032x' % number]) + '\n'
+
+    # ****************************************************************************************************
+
+    def writeCatalogue(self, rows):
+        """ Writes the test vector database file."""
+
+        with open(self.db_path, 'w') as f:
+            f.write(''.join(rows))
+
+    # ****************************************************************************************************
+
+    def catalogue(self):
+        """ The rows of a small catalogue, of two batches and two pulsars."""
+
+        return [self.row(1, '1', 'J0000+0000_1400'), self.row(2, '1', 'J1111+1111_430'),
+                self.row(3, '2', 'J0000+0000_1400'), self.row(4, '2', 'J0000+0000_430_1'),
+                self.row(5, '2', 'J1111+1111_430')]
+
+    # ****************************************************************************************************
+
+    def read(self, file_name):
+        """ Reads a file written to the output directory."""
+
+        with open(os.path.join(self.output_dir, file_name)) as f:
+            return f.read()
+
+    # ****************************************************************************************************
+
+    def build(self, output_format, builder=None):
+        """ Builds the page from the test vector database file."""
+
+        if builder is None:
+            builder = PageBuilder()
+
+        return builder.build(self.db_path, self.output_file, output_format, self.asc_dir, self.batch_dir)
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_write_page(self):
+        """ Tests the page lists every test vector, with the total filled in."""
+
+        self.writeCatalogue(self.catalogue())
+
+        self.assertTrue(self.build(1))
+
+        html = self.read('index.html')
+
+        self.assertEqual(html.count('\t<tr>\n'), 5)
+        self.assertTrue('All the test vectors (5) available' in html)
+        self.assertTrue('@TOTAL@' not in html)
+
+        for line in self.catalogue():
+            self.assertTrue('>' + line.split(',')[0] + '</a>' in html)
+
+        # The page is assembled in a temporary file, renamed into place.
+        self.assertEqual([name for name in os.listdir(self.output_dir) if name.endswith('.tmp')], [])
+
+    # ****************************************************************************************************
+
+    def test_failed_build_keeps_page(self):
+        """ Tests a build that fails part way leaves the previous page in place."""
+
+        self.writeCatalogue(self.catalogue())
+        self.assertTrue(self.build(1))
+
+        html = self.read('index.html')
+
+        self.writeCatalogue(self.catalogue() + ['not,a,test,vector\n'])
+        self.assertFalse(self.build(1))
+
+        self.assertEqual(self.read('index.html'), html)
+        self.assertEqual([name for name in os.listdir(self.output_dir) if name.endswith('.tmp')], [])
+
+    # ****************************************************************************************************
+
+    def test_write_feed(self):
+        """ Tests the data feed holds every row, in chunks listed by the manifest."""
+
+        self.writeCatalogue(self.catalogue())
+
+        self.assertTrue(self.build(2, PageBuilder(chunk_size=2)))
+
+        manifest = json.loads(self.read('index_data/manifest.json'))
+
+        self.assertEqual(manifest['total'], 5)
+        self.assertEqual(manifest['chunks'], ['chunk_0.json', 'chunk_1.json', 'chunk_2.json'])
+        self.assertEqual(manifest['columns'], [name for name, index in PageBuilder.FEED_COLUMNS])
+
+        rows = []
+        for chunk in manifest['chunks']:
+            rows += json.loads(self.read('index_data/' + chunk))
+
+        self.assertEqual(rows, [[line.rstrip('\n').split(',')[index] for name, index in PageBuilder.FEED_COLUMNS]
+                                for line in self.catalogue()])
+
+        # The page holds no rows, only the script that fetches them.
+        html = self.read('index.html')
+        self.assertEqual(html.count('\t<tr>\n'), 0)
+        self.assertTrue("new TestVectorFeed('#spec_table', 'index_data')" in html)
+
+        # Chunks left over from a larger catalogue are removed.
+        self.writeCatalogue(self.catalogue()[:3])
+        self.assertTrue(self.build(2, PageBuilder(chunk_size=2)))
+
+        self.assertEqual(json.loads(self.read('index_data/manifest.json'))['chunks'], ['chunk_0.json', 'chunk_1.json'])
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'index_data', 'chunk_2.json')))
+
+    # ****************************************************************************************************
+
+    def test_split_pages(self):
+        """ Tests there is a page per batch and per pulsar, and only changed pages are rebuilt."""
+
+        self.writeCatalogue(self.catalogue())
+
+        self.assertTrue(self.build(3, PageBuilder(workers=1)))
+
+        pages = ['index_batch_1.html', 'index_batch_2.html', 'index_pulsar_J0000+0000.html',
+                 'index_pulsar_J1111+1111.html']
+
+        self.assertEqual(sorted([name for name in os.listdir(self.output_dir) if name.startswith('index_batch_') or
+                                 name.startswith('index_pulsar_')]), pages)
+
+        self.assertEqual(self.read('index_batch_1.html').count('\t<tr>\n'), 2)
+        self.assertEqual(self.read('index_batch_2.html').count('\t<tr>\n'), 3)
+        self.assertEqual(self.read('index_pulsar_J0000+0000.html').count('\t<tr>\n'), 3)
+
+        index = self.read('index.html')
+        self.assertTrue('<a href="index_batch_2.html">Batch 2</a> (3)' in index)
+        self.assertTrue('<a href="index_pulsar_J1111+1111.html">J1111+1111</a> (2)' in index)
+
+        # Mark every page as old, then change a row of batch 2 only.
+        for page_name in pages:
+            os.utime(os.path.join(self.output_dir, page_name), (0, 0))
+
+        catalogue = self.catalogue()
+        catalogue[2] = catalogue[2].replace(',15,', ',16,')
+        self.writeCatalogue(catalogue)
+
+        self.assertTrue(self.build(3, PageBuilder(workers=1)))
+
+        rebuilt = [page_name for page_name in pages if os.path.getmtime(os.path.join(self.output_dir, page_name)) > 0]
+        self.assertEqual(rebuilt, ['index_batch_2.html', 'index_pulsar_J0000+0000.html'])
+
+        # The pages of batches no longer in the catalogue are removed.
+        self.writeCatalogue(catalogue[2:])
+        self.assertTrue(self.build(3, PageBuilder(workers=1)))
+
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'index_batch_1.html')))
+
+    # ****************************************************************************************************
+
+    def test_batch_descriptions(self):
+        """ Tests the page fetches the descriptions of only the batches it links to."""
+
+        self.writeCatalogue(self.catalogue()[:2])
+
+        self.assertTrue(self.build(1))
+
+        self.assertEqual(json.loads(self.read('index_batches.json')), {'1': 'Batch 1 parameters\n'})
+
+        html = self.read('index.html')
+        self.assertTrue("TestVectorBatches.init('index_batches.json');" in html)
+        self.assertTrue('onclick="' + PageBuilder.BATCH_LINK.replace('@BATCH@', '1') + '"' in html)
+        self.assertTrue('Batch 3 parameters' not in html)
+
+        # The feed lists the same batches.
+        self.assertTrue(self.build(2))
+
+        self.assertEqual(json.loads(self.read('index_data/manifest.json'))['batches'], ['1'])
+
+    # ****************************************************************************************************
+
+    def test_sprites(self):
+        """ Tests the thumbnails of the profiles the rows show are packed, reading the catalogue once."""
+
+        self.writeCatalogue(self.catalogue())
+
+        with open(os.path.join(self.asc_dir, 'J2222+2222_1400.asc'), 'w') as f:
+            f.write('1\n2\n1\n')
+
+        reads = []
+        builder = PageBuilder(sprites=True)
+        read_test_vectors = builder.readTestVectors
+
+        def counted(input_file):
+            reads.append(input_file)
+            return read_test_vectors(input_file)
+
+        builder.readTestVectors = counted
+
+        self.assertTrue(self.build(1, builder))
+        self.assertEqual(reads, [self.db_path])
+
+        # Packed in the order the rows first show them, and only those.
+        with open(os.path.join(self.asc_dir, 'atlas', 'atlas.json')) as f:
+            atlas_map = json.load(f)
+
+        self.assertEqual(atlas_map['profiles'], {'J0000+0000_1400': [0, 0, 0], 'J1111+1111_430': [0, 128, 0],
+                                                 'J0000+0000_430_1': [0, 256, 0]})
+
+        html = self.read('index.html')
+        self.assertEqual(html.count('data-sprite="' + self.asc_dir + '/atlas/atlas_0.png"'), 5)
+        self.assertTrue('background-position:-256px -0px' in html)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates the profile and batch directories, and moves to the source directory."""
+
+        self.root = tempfile.mkdtemp()
+        self.asc_dir = os.path.join(self.root, 'asc')
+        self.batch_dir = os.path.join(self.root, 'batches')
+        self.output_dir = os.path.join(self.root, 'site')
+        self.output_file = os.path.join(self.output_dir, 'index.html')
+        self.db_path = os.path.join(self.root, 'db.csv')
+
+        for directory in [self.asc_dir, self.batch_dir, self.output_dir]:
+            os.mkdir(directory)
+
+        for epn in ['J0000+0000_1400', 'J0000+0000_430_1', 'J1111+1111_430']:
+            with open(os.path.join(self.asc_dir, epn + '.asc'), 'w') as f:
+                f.write('\n'.join([str(abs(i - 32)) for i in range(64)]) + '\n')
+
+            open(os.path.join(self.asc_dir, epn + '.png'), 'w').close()
+
+        for batch in ['1', '2', '3']:
+            with open(os.path.join(self.batch_dir, 'Batch_' + batch + '.txt'), 'w') as f:
+                f.write('Batch ' + batch + ' parameters\n')
+
+        self.cwd = os.getcwd()
+        os.chdir(self.src_dir)
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Returns to the test directory, and deletes the temporary directory."""
+
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root)
+
+    # ****************************************************************************************************
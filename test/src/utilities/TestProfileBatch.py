@@ -0,0 +1,182 @@
+"""
+**************************************************************************
+
+ TestProfileBatch.py
+
+**************************************************************************
+ Description:
+
+ Tests the batched profile operations give the same results as the one
+ profile at a time code they replaced.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import operator
+import unittest
+import numpy
+
+from main.src.ProfileBatch import ProfileBatch
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestProfileBatch(unittest.TestCase):
+    """
+    The tests for the ProfileBatch class.
+    """
+
+    # Points to the directory of EPN profiles shipped with the scripts.
+    asc_dir = os.path.abspath('../..') + '/main/src/data/ASC'
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    @staticmethod
+    def centre_on_peak(data):
+        """ Centres a profile as CreatePulsarProfilePng.centre_on_peak did, one profile at a time."""
+
+        index, value = max(enumerate(data), key=operator.itemgetter(1))
+        midpoint = int(len(data) / 2)
+        a = (midpoint - index) % len(data)
+
+        return numpy.concatenate([data[-a:], data[:-a]])
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def envelope(data, points):
+        """ Downsamples a profile as ProfileSparkline.path did, one profile at a time."""
+
+        if len(data) < points:
+            data = numpy.repeat(data, -(-points // len(data)))
+
+        block = -(-len(data) // points)
+        padding = block * points - len(data)
+        if padding > 0:
+            data = numpy.concatenate([data, numpy.repeat(data[-1:], padding)])
+
+        blocks = data.reshape(points, block)
+
+        return blocks.min(axis=1), blocks.max(axis=1)
+
+    # ****************************************************************************************************
+
+    def profiles(self):
+        """ Reads some of the profiles shipped in data/ASC, plus some awkward cases."""
+
+        profiles = []
+
+        for file_name in sorted(os.listdir(self.asc_dir))[::50]:
+            if file_name.endswith('.asc'):
+                with open(os.path.join(self.asc_dir, file_name)) as f:
+                    profiles.append(numpy.array(f.read().split(), dtype=float))
+
+        # One bin, a tied maximum, a flat profile, and profiles shorter than the envelope.
+        profiles += [numpy.array([3.0]), numpy.array([1.0, 5.0, 2.0, 5.0, 0.0]), numpy.zeros(7),
+                     numpy.arange(10, dtype=float), numpy.array([-1.0, 4.0])]
+
+        return profiles
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_centre(self):
+        """ Tests centring matches centre_on_peak, for profiles of mixed lengths."""
+
+        profiles = self.profiles()
+        self.assertTrue(len(set([len(profile) for profile in profiles])) > 3)
+
+        batch = ProfileBatch(profiles)
+        batch.centre()
+
+        for row, profile in enumerate(profiles):
+            self.assertTrue(numpy.array_equal(batch.profile(row), self.centre_on_peak(profile)), row)
+
+        # The padding stays zero.
+        self.assertTrue((batch.data[~batch.mask()] == 0).all())
+
+    # ****************************************************************************************************
+
+    def test_normalise(self):
+        """ Tests normalising scales each profile to 0 to 1, and flat profiles to 0."""
+
+        profiles = self.profiles()
+
+        batch = ProfileBatch(profiles)
+        batch.normalise()
+
+        for row, profile in enumerate(profiles):
+            span = profile.max() - profile.min()
+            expected = (profile - profile.min()) / span if span > 0 else numpy.zeros(len(profile))
+
+            self.assertTrue(numpy.allclose(batch.profile(row), expected, rtol=0, atol=1e-12), row)
+
+    # ****************************************************************************************************
+
+    def test_envelope(self):
+        """ Tests the envelope of every profile matches the one at a time envelope."""
+
+        profiles = self.profiles()
+
+        for points in (1, 7, 64):
+            lows, highs = ProfileBatch(profiles).envelope(points)
+
+            self.assertEqual(lows.shape, (len(profiles), points))
+
+            for row, profile in enumerate(profiles):
+                expected_lows, expected_highs = self.envelope(profile, points)
+
+                self.assertTrue(numpy.array_equal(lows[row], expected_lows), (points, row))
+                self.assertTrue(numpy.array_equal(highs[row], expected_highs), (points, row))
+
+    # ****************************************************************************************************
+
+    def test_empty(self):
+        """ Tests an empty batch can be centred, normalised and enveloped."""
+
+        batch = ProfileBatch([])
+        batch.centre()
+        batch.normalise()
+
+        lows, highs = batch.envelope(64)
+
+        self.assertEqual(lows.shape, (0, 64))
+        self.assertEqual(highs.shape, (0, 64))
+
+    # ****************************************************************************************************
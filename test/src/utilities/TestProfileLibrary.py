@@ -0,0 +1,175 @@
+"""
+**************************************************************************
+
+ TestProfileLibrary.py
+
+**************************************************************************
+ Description:
+
+ Tests the binary profile library round trips the .asc profiles.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+import numpy
+
+from main.src.ProfileLibrary import ProfileLibrary
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestProfileLibrary(unittest.TestCase):
+    """
+    The tests for the ProfileLibrary class.
+    """
+
+    # Points to the directory of EPN profiles shipped with the scripts.
+    asc_dir = os.path.abspath('../..') + '/main/src/data/ASC'
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def write(self, name, content):
+        """ Writes an .asc file to the temporary .asc directory."""
+
+        path = os.path.join(self.root, 'asc', name)
+
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, 'w') as f:
+            f.write(content)
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_round_trip(self):
+        """ Tests every profile is read back exactly as parsed from its .asc file."""
+
+        self.write('J0000+0000_1400.asc', '1.0\n2.5\n-3.25\n0.1\n')
+        self.write('J0000+0000_430_1.asc', '0.333333333333333314829616256247\n7\n')
+        self.write('B1234-56_1400.asc', '1e-300\n5\n')
+        self.write('old/J0000+0000_1400.asc', '9\n')
+
+        # Files without a valid profile are left out.
+        self.write('J9999+9999_1400.asc', '')
+        self.write('J8888+8888_1400.asc', '1.0\nabc\n')
+
+        count, errors = ProfileLibrary.build(os.path.join(self.root, 'asc'), self.library_path)
+
+        self.assertEqual(count, 4)
+        self.assertEqual(len(errors), 2)
+
+        library = ProfileLibrary(self.library_path)
+
+        self.assertEqual(library.keys(), ['B1234-56_1400', 'J0000+0000_1400', 'J0000+0000_430_1',
+                                          'old/J0000+0000_1400'])
+        self.assertFalse(library.has('J9999+9999_1400'))
+
+        for key in library.keys():
+            with open(os.path.join(self.root, 'asc', key + '.asc')) as f:
+                content = f.read()
+
+            self.assertTrue(numpy.array_equal(library.profile(key), numpy.array(content.split(), dtype=float)))
+            self.assertEqual(library.digest(key), hashlib.md5(content).hexdigest())
+
+        self.assertEqual(library.select(name='J0000+0000'), ['J0000+0000_1400', 'J0000+0000_430_1',
+                                                             'old/J0000+0000_1400'])
+        self.assertEqual(library.select(freq='1400'), ['B1234-56_1400', 'J0000+0000_1400',
+                                                       'old/J0000+0000_1400'])
+        self.assertEqual(library.select(name='J0000+0000', freq='430'), ['J0000+0000_430_1'])
+
+        # Profiles are views of the read only mapped data.
+        self.assertRaises(ValueError, library.profile('J0000+0000_1400').__setitem__, 0, 1.0)
+
+    # ****************************************************************************************************
+
+    def test_shipped_profiles(self):
+        """ Tests the profiles shipped in data/ASC round trip."""
+
+        count, errors = ProfileLibrary.build(self.asc_dir, self.library_path)
+        library = ProfileLibrary(self.library_path)
+
+        self.assertEqual(count, len(library.keys()))
+        self.assertTrue(count > 0)
+
+        for key in library.keys()[::100]:
+            with open(os.path.join(self.asc_dir, key + '.asc')) as f:
+                values = numpy.array(f.read().split(), dtype=float)
+
+            self.assertTrue(numpy.array_equal(library.profile(key), values), key)
+
+    # ****************************************************************************************************
+
+    def test_invalid_library(self):
+        """ Tests a file that is not a library is an error."""
+
+        with open(self.library_path, 'w') as f:
+            f.write('PROFLIB1' + '\0' * 8)
+
+        self.assertRaises(ValueError, ProfileLibrary, self.library_path)
+        self.assertRaises(IOError, ProfileLibrary, os.path.join(self.root, 'missing.lib'))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates a temporary directory for the .asc files and library."""
+
+        self.root = tempfile.mkdtemp()
+        self.library_path = os.path.join(self.root, ProfileLibrary.DEFAULT_NAME)
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Deletes the temporary directory."""
+
+        shutil.rmtree(self.root)
+
+    # ****************************************************************************************************
@@ -0,0 +1,123 @@
+"""
+**************************************************************************
+
+ TestProfileRasteriser.py
+
+**************************************************************************
+ Description:
+
+ Tests the Matplotlib free profile plot renderer.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import unittest
+import numpy
+
+from main.src.ProfileRasteriser import ProfileRasteriser
+from main.src.CreatePulseProfilePng import CreatePulsarProfilePng
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestProfileRasteriser(unittest.TestCase):
+    """
+    The tests for the ProfileRasteriser class.
+    """
+
+    # Points to the directory of EPN profiles shipped with the scripts.
+    asc_dir = os.path.abspath('../..') + '/main/src/data/ASC'
+
+    # The signature every PNG file starts with.
+    PNG_SIGNATURE = '\x89PNG\r\n\x1a\n'
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_glyphs(self):
+        """ Tests every glyph of the bitmap font is 5 x 7 pixels, and the font covers the letters."""
+
+        for c, rows in ProfileRasteriser.GLYPHS.iteritems():
+            self.assertEqual(len(rows), 7, c)
+            for row in rows:
+                self.assertEqual(len(row), 5, c)
+
+        for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_+-.@ ':
+            self.assertTrue(c in ProfileRasteriser.GLYPHS, c)
+
+    # ****************************************************************************************************
+
+    def test_render_every_title(self):
+        """ Tests the title of every profile in data/ASC can be drawn."""
+
+        renderer = CreatePulsarProfilePng()
+        rasteriser = ProfileRasteriser()
+        data = numpy.sin(numpy.linspace(0, numpy.pi, 64))
+
+        titles = set()
+        for file_name in os.listdir(self.asc_dir):
+            if file_name.endswith('.asc'):
+                title, error = renderer.titleFor(file_name)
+                if error is None:
+                    titles.add(title)
+
+        # Includes pulsars named with a letter suffix, i.e. J1748-2446A.
+        self.assertTrue('J1748-2446A @ 1410 MHz' in titles)
+
+        for title in sorted(titles):
+            self.assertTrue(rasteriser.render(data, title).startswith(self.PNG_SIGNATURE), title)
+
+    # ****************************************************************************************************
+
+    def test_draw_text(self):
+        """ Tests each character is drawn, and a character without a glyph is an error."""
+
+        rasteriser = ProfileRasteriser()
+
+        with_suffix = numpy.zeros((rasteriser.height, rasteriser.width), dtype=numpy.uint8)
+        rasteriser.drawText(with_suffix, 'J1748-2446A', 150, 30)
+
+        without_suffix = numpy.zeros((rasteriser.height, rasteriser.width), dtype=numpy.uint8)
+        rasteriser.drawText(without_suffix, 'J1748-2446 ', 150, 30)
+
+        self.assertTrue((with_suffix == rasteriser.TEXT).sum() > (without_suffix == rasteriser.TEXT).sum())
+
+        # Nothing is drawn when the text cannot be drawn in full.
+        pixels = numpy.zeros((rasteriser.height, rasteriser.width), dtype=numpy.uint8)
+        self.assertRaises(ValueError, rasteriser.drawText, pixels, 'J1748-2446! @ 1410 MHz', 150, 30)
+        self.assertEqual(pixels.sum(), 0)
+        self.assertRaises(ValueError, rasteriser.render, numpy.ones(8), u'J1748\u22122446 @ 1410 MHz')
+
+    # ****************************************************************************************************
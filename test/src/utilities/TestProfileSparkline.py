@@ -0,0 +1,232 @@
+"""
+**************************************************************************
+
+ TestProfileSparkline.py
+
+**************************************************************************
+ Description:
+
+ Tests the SVG sparklines drawn from .asc profiles, and their cache.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import re
+import json
+import shutil
+import tempfile
+import unittest
+import numpy
+
+from main.src.ProfileSparkline import ProfileSparkline
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestProfileSparkline(unittest.TestCase):
+    """
+    The tests for the ProfileSparkline class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def writeProfile(self, name, values):
+        """ Writes an .asc profile, returning its path."""
+
+        path = os.path.join(self.root, name + '.asc')
+
+        with open(path, 'w') as f:
+            f.write('\n'.join([str(value) for value in values]) + '\n')
+
+        return path
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def coordinates(path):
+        """ Reads the (x, y) coordinates of an SVG path."""
+
+        values = [int(value) for value in re.findall(r'-?\d+', path)]
+
+        return zip(values[0::2], values[1::2])
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_path(self):
+        """ Tests a profile is drawn as its envelope, centred on its peak, on the integer grid."""
+
+        sparkline = ProfileSparkline(points=16, height=32)
+
+        path = sparkline.path(numpy.array([1.0 / (1 + abs(i - 10)) for i in range(256)]))
+
+        self.assertTrue(path.startswith('M') and path.endswith('Z'))
+
+        coordinates = self.coordinates(path)
+
+        # Along the top of the envelope, then back along the bottom.
+        self.assertEqual([x for x, y in coordinates], range(16) + range(15, -1, -1))
+        self.assertTrue(all([0 <= y <= 32 for x, y in coordinates]))
+
+        # The peak is in the centre, at the top.
+        tops = [y for x, y in coordinates[:16]]
+        self.assertEqual(tops.index(min(tops)), 8)
+        self.assertEqual(min(tops), 0)
+        self.assertEqual(max([y for x, y in coordinates[16:]]), 32)
+
+        # Flat and short profiles are still drawn, empty profiles are not.
+        self.assertEqual(set([y for x, y in self.coordinates(sparkline.path(numpy.ones(100)))]), set([32]))
+        self.assertEqual(len(self.coordinates(sparkline.path(numpy.array([1.0, 3.0, 2.0])))), 32)
+        self.assertEqual(sparkline.path(numpy.array([])), None)
+
+    # ****************************************************************************************************
+
+    def test_find(self):
+        """ Tests sparklines are rendered once per profile content, and missing profiles have none."""
+
+        values = [abs(i - 20) for i in range(128)]
+        first = self.writeProfile('J0000+0000_1400', values)
+        second = self.writeProfile('J1111+1111_1400', values)
+
+        sparkline = ProfileSparkline()
+        path = sparkline.find(first)
+
+        self.assertEqual(path, sparkline.path(numpy.array(values, dtype=float)))
+        self.assertEqual(sparkline.find(first), path)
+        self.assertEqual(sparkline.find(second), path)
+        self.assertEqual((sparkline.misses, sparkline.hits), (1, 1))
+
+        self.assertEqual(sparkline.find(os.path.join(self.root, 'missing.asc')), None)
+        self.assertEqual(sparkline.find(self.writeProfile('J2222+2222_1400', ['1.0', 'abc'])), None)
+
+        svg = sparkline.svg(path, 'J0000+0000_1400')
+        self.assertTrue('<title>J0000+0000_1400</title>' in svg)
+        self.assertTrue('d="' + path + '"' in svg)
+
+    # ****************************************************************************************************
+
+    def test_paths(self):
+        """ Tests profiles of mixed lengths drawn together match those drawn one at a time."""
+
+        profiles = [numpy.array([1.0 / (1 + abs(i - peak)) for i in range(length)])
+                    for peak, length in [(10, 256), (3, 1024), (0, 64), (40, 50)]]
+        profiles += [numpy.ones(100), numpy.array([1.0, 3.0, 2.0]), numpy.array([])]
+
+        for points in (1, 16, 64):
+            sparkline = ProfileSparkline(points=points)
+
+            self.assertEqual(sparkline.paths(profiles), [sparkline.path(data) for data in profiles])
+
+    # ****************************************************************************************************
+
+    def test_find_all(self):
+        """ Tests a batch of profiles is drawn together, reading and drawing each distinct content once."""
+
+        first = self.writeProfile('J0000+0000_1400', range(64))
+        second = self.writeProfile('J1111+1111_1400', range(64))
+        third = self.writeProfile('J2222+2222_1400', [abs(i - 20) for i in range(128)])
+        invalid = self.writeProfile('J3333+3333_1400', ['1.0', 'abc'])
+        missing = os.path.join(self.root, 'missing.asc')
+
+        sparkline = ProfileSparkline()
+        paths = sparkline.findAll([first, second, invalid, first, missing, third])
+
+        expected = sparkline.paths([numpy.arange(64.0), numpy.array([abs(i - 20) for i in range(128)], dtype=float)])
+
+        self.assertEqual(paths, [expected[0], expected[0], None, expected[0], None, expected[1]])
+        self.assertEqual((sparkline.misses, sparkline.hits), (2, 1))
+
+        # Found again without being drawn.
+        self.assertEqual(sparkline.find(third), expected[1])
+        self.assertEqual(sparkline.findAll([second, invalid]), [expected[0], None])
+        self.assertEqual((sparkline.misses, sparkline.hits), (2, 1))
+
+    # ****************************************************************************************************
+
+    def test_cache(self):
+        """ Tests cached sparklines are reused by later builds, and unused ones dropped."""
+
+        cache_path = os.path.join(self.root, 'sparklines.json')
+        first = self.writeProfile('J0000+0000_1400', range(64))
+        second = self.writeProfile('J1111+1111_1400', range(32))
+
+        sparkline = ProfileSparkline(cache_path=cache_path)
+        paths = [sparkline.find(first), sparkline.find(second)]
+        sparkline.save()
+
+        sparkline = ProfileSparkline(cache_path=cache_path)
+        self.assertEqual([sparkline.find(first), sparkline.find(second)], paths)
+        self.assertEqual((sparkline.misses, sparkline.hits), (0, 2))
+
+        # A build using one profile only keeps that profile's sparkline.
+        sparkline = ProfileSparkline(cache_path=cache_path)
+        sparkline.find(second)
+        sparkline.save()
+
+        with open(cache_path) as f:
+            self.assertEqual(json.load(f).values(), [paths[1]])
+
+        # The cache is keyed by the render settings, as well as the profile.
+        sparkline = ProfileSparkline(points=32, cache_path=cache_path)
+        sparkline.find(second)
+        self.assertEqual(sparkline.misses, 1)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates a temporary directory for the profiles and cache."""
+
+        self.root = tempfile.mkdtemp()
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Deletes the temporary directory."""
+
+        shutil.rmtree(self.root)
+
+    # ****************************************************************************************************
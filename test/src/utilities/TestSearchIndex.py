@@ -0,0 +1,160 @@
+"""
+**************************************************************************
+
+ TestSearchIndex.py
+
+**************************************************************************
+ Description:
+
+ Tests the search index shards can be searched by prefix.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import json
+import bisect
+import unittest
+
+from main.src.SearchIndex import SearchIndex
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestSearchIndex(unittest.TestCase):
+    """
+    The tests for the SearchIndex class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def write(self, index):
+        """ Writes the index, returning the shard descriptions and the files written by name."""
+
+        files = {}
+
+        def write_json(path, data):
+            files[path.split('/')[-1]] = json.loads(json.dumps(data))
+
+        shards, file_names = index.write('feed', write_json)
+
+        self.assertEqual(file_names, shards['files'])
+        self.assertEqual(sorted(file_names), sorted(files.keys()))
+
+        return shards, files
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def search(shards, files, key):
+        """ Finds the row IDs matching a key, by finding its shard from the bounds, as table/feed.js does."""
+
+        position = bisect.bisect_right(shards['bounds'], key) - 1
+
+        if position < 0:
+            return []
+
+        shard = files[shards['files'][position]]
+
+        if key not in shard['keys']:
+            return []
+
+        return shard['ids'][shard['keys'].index(key)]
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def parameters(number, epn):
+        """ Creates the parameters of a test vector."""
+
+        return ['FakePulsar_' + str(number) + '.fil', '1', 'FakePulsar', '1', '10', '0.0', '15', epn, '1400',
+                '', '', '', '', 'ABCDEF' + str(number)]
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_keys(self):
+        """ Tests rows are found by file name, MD5 and EPN profile, with or without the J or B."""
+
+        index = SearchIndex()
+
+        index.add(0, self.parameters(0, 'J0000+0000_1400'))
+        index.add(1, self.parameters(1, 'B1234+56_430'))
+        index.add(2, self.parameters(2, 'J0000+0000_1400'))
+
+        shards, files = self.write(index)
+
+        self.assertEqual(self.search(shards, files, 'fakepulsar_1.fil'), [1])
+        self.assertEqual(self.search(shards, files, 'abcdef2'), [2])
+        self.assertEqual(self.search(shards, files, 'j0000+0000_1400'), [0, 2])
+        self.assertEqual(self.search(shards, files, '0000+0000_1400'), [0, 2])
+        self.assertEqual(self.search(shards, files, '1234+56_430'), [1])
+        self.assertEqual(self.search(shards, files, 'FakePulsar_1.fil'), [])
+
+    # ****************************************************************************************************
+
+    def test_shards(self):
+        """ Tests every key is found in its shard, when the keys are split across many shards."""
+
+        index = SearchIndex(shard_bytes=100, memory=1)
+
+        for row_id in range(100):
+            index.add(row_id, self.parameters(row_id, 'J%04d+0000_1400' % (row_id % 10)))
+
+        shards, files = self.write(index)
+
+        self.assertTrue(len(shards['files']) > 5)
+        self.assertEqual(shards['bounds'], sorted(shards['bounds']))
+
+        for row_id in range(100):
+            self.assertEqual(self.search(shards, files, 'fakepulsar_%d.fil' % row_id), [row_id])
+            self.assertEqual(self.search(shards, files, 'abcdef%d' % row_id), [row_id])
+
+        self.assertEqual(self.search(shards, files, 'j0003+0000_1400'), range(3, 100, 10))
+        self.assertEqual(self.search(shards, files, '0003+0000_1400'), range(3, 100, 10))
+
+    # ****************************************************************************************************
+
+    def test_shortest_prefix(self):
+        """ Tests a shard bound is the shortest prefix sorting after the previous shard."""
+
+        self.assertEqual(SearchIndex.shortestPrefix('fakepulsar_2.fil', 'fakepulsar_19.fil'), 'fakepulsar_2')
+        self.assertEqual(SearchIndex.shortestPrefix('j0000', 'b1234'), 'j')
+        self.assertEqual(SearchIndex.shortestPrefix('abc', ''), 'a')
+        self.assertEqual(SearchIndex.shortestPrefix('abc', 'abc'), 'abc')
+
+    # ****************************************************************************************************
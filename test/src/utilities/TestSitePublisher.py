@@ -0,0 +1,244 @@
+"""
+**************************************************************************
+
+ TestSitePublisher.py
+
+**************************************************************************
+ Description:
+
+ Tests the site publisher minifies the pages, fingerprints the assets they
+ reference, and precompresses every file.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import gzip
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+from main.src.SitePublisher import SitePublisher, brotli
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestSitePublisher(unittest.TestCase):
+    """
+    The tests for the SitePublisher class.
+    """
+
+    # A page of the form written by PageBuilder, referencing local, remote and missing assets.
+    PAGE = """<!DOCTYPE html>
+<html>
+    <head>
+        <!-- The table style. -->
+        <link href='table/main.css' rel="stylesheet">
+        <script type="text/javascript" src="table/feed.js"></script>
+        <script src="https://code.jquery.com/jquery.js"></script>
+        <script src="/absolute.js"></script>
+        <script src="missing.js"></script>
+    </head>
+    <body>
+<pre class="prettyprint">
+    indented   text
+</pre>
+
+        <script>TestVectorBatches.init('index_batches.json');</script>
+    </body>
+</html>
+"""
+
+    # The batch descriptions the page fetches.
+    BATCHES = '{"1": "Batch 1 parameters"}'
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def write(self, name, content):
+        """ Writes a file to the site directory."""
+
+        path = os.path.join(self.site_dir, name)
+
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, 'w') as f:
+            f.write(content)
+
+    # ****************************************************************************************************
+
+    def read(self, name):
+        """ Reads a file from the site directory."""
+
+        with open(os.path.join(self.site_dir, name)) as f:
+            return f.read()
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def fingerprinted(name, content):
+        """ Gets the fingerprinted name of an asset."""
+
+        base, extension = os.path.splitext(name)
+
+        return base + '.' + hashlib.md5(content).hexdigest()[:8] + extension
+
+    # ****************************************************************************************************
+
+    def publish(self):
+        """ Publishes the site."""
+
+        return SitePublisher(workers=1).publish(os.path.join(self.site_dir, 'index.html'))
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_minify(self):
+        """ Tests pages are stripped of comments and indentation, except within preformatted text."""
+
+        self.assertTrue(self.publish())
+
+        page = self.read('index.html')
+
+        self.assertTrue('<!--' not in page)
+        self.assertTrue('\n    <head>' not in page)
+        self.assertTrue('<head>\n' in page)
+        self.assertTrue('<pre class="prettyprint">\n    indented   text\n</pre>\n' in page)
+        self.assertTrue('\n\n' not in page)
+
+        # Split pages are minified too.
+        self.assertEqual(self.read('index_batch_1.html'), '<html>\n<body>\n</body>\n</html>\n')
+
+    # ****************************************************************************************************
+
+    def test_fingerprint(self):
+        """ Tests local assets are copied to content hashed names, and the pages updated to match."""
+
+        self.assertTrue(self.publish())
+
+        page = self.read('index.html')
+        css = self.fingerprinted('table/main.css', 'table { }')
+        js = self.fingerprinted('table/feed.js', 'var feed;')
+
+        self.assertTrue("href='" + css + "'" in page)
+        self.assertTrue('src="' + js + '"' in page)
+        self.assertEqual(self.read(css), 'table { }')
+        self.assertEqual(self.read('table/feed.js'), 'var feed;')
+
+        # Remote, absolute and missing assets are left alone.
+        for reference in ['https://code.jquery.com/jquery.js', '/absolute.js', 'missing.js']:
+            self.assertTrue('src="' + reference + '"' in page)
+
+        # Publishing again leaves the page as it is.
+        self.assertTrue(self.publish())
+        self.assertEqual(self.read('index.html'), page)
+        self.assertFalse(os.path.exists(os.path.join(self.site_dir, self.fingerprinted(css, 'table { }'))))
+
+    # ****************************************************************************************************
+
+    def test_compress(self):
+        """ Tests every page, asset and data feed file gets precompressed siblings."""
+
+        self.assertTrue(self.publish())
+
+        css = self.fingerprinted('table/main.css', 'table { }')
+        files = ['index.html', 'index_batch_1.html', css, self.fingerprinted('table/feed.js', 'var feed;'),
+                 'index_data/chunk_0.json']
+
+        for name in files:
+            with open(os.path.join(self.site_dir, name + '.gz'), 'rb') as f:
+                self.assertEqual(gzip.GzipFile(fileobj=f).read(), self.read(name))
+
+            if brotli is not None:
+                with open(os.path.join(self.site_dir, name + '.br'), 'rb') as f:
+                    self.assertEqual(brotli.decompress(f.read()), self.read(name))
+
+        # Siblings already up to date are not written again.
+        os.utime(os.path.join(self.site_dir, css + '.gz'), (2 ** 31, 2 ** 31))
+        self.assertTrue(self.publish())
+        self.assertEqual(os.path.getmtime(os.path.join(self.site_dir, css + '.gz')), 2 ** 31)
+
+        self.assertFalse(os.path.exists(os.path.join(self.site_dir, 'table', 'main.css.gz')))
+
+    # ****************************************************************************************************
+
+    def test_batch_file(self):
+        """ Tests the batch description file the page fetches is fingerprinted and precompressed."""
+
+        self.assertTrue(self.publish())
+
+        batches = self.fingerprinted('index_batches.json', self.BATCHES)
+
+        self.assertTrue("TestVectorBatches.init('" + batches + "');" in self.read('index.html'))
+        self.assertEqual(self.read(batches), self.BATCHES)
+
+        with open(os.path.join(self.site_dir, batches + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.GzipFile(fileobj=f).read(), self.BATCHES)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates a site of a page, a split page, their assets, batch descriptions and a data feed."""
+
+        self.root = tempfile.mkdtemp()
+        self.site_dir = os.path.join(self.root, 'site')
+
+        self.write('index.html', self.PAGE)
+        self.write('index_batch_1.html', '<html>\n    <body>\n    </body>\n</html>\n')
+        self.write('table/main.css', 'table { }')
+        self.write('table/feed.js', 'var feed;')
+        self.write('index_data/chunk_0.json', '[["FakePulsar_1.fil"]]')
+        self.write('index_batches.json', self.BATCHES)
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Deletes the temporary directory."""
+
+        shutil.rmtree(self.root)
+
+    # ****************************************************************************************************
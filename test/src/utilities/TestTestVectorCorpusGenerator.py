@@ -0,0 +1,188 @@
+"""
+**************************************************************************
+
+ TestTestVectorCorpusGenerator.py
+
+**************************************************************************
+ Description:
+
+ Tests the synthetic test vector corpus generator.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from main.src.TestVectorCorpusGenerator import TestVectorCorpusGenerator
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestTestVectorCorpusGenerator(unittest.TestCase):
+    """
+    The tests for the TestVectorCorpusGenerator class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def writeProfiles(self, names):
+        """ Writes empty .asc files with the given profile names, returning their directory."""
+
+        asc_dir = os.path.join(self.root, 'asc')
+        os.mkdir(asc_dir)
+
+        for name in names:
+            open(os.path.join(asc_dir, name + '.asc'), 'w').close()
+
+        return asc_dir
+
+    # ****************************************************************************************************
+
+    def vectors(self, output_dir):
+        """ Lists the vectors of a corpus, as (batch directory, file name) pairs."""
+
+        vector_dir = os.path.join(output_dir, 'vectors')
+
+        return sorted([(batch, file_name) for batch in os.listdir(vector_dir)
+                       for file_name in os.listdir(os.path.join(vector_dir, batch))])
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_generate(self):
+        """ Tests the vectors are named like real vectors, spread across the batches, and sized."""
+
+        asc_dir = self.writeProfiles(['J0006+1834_430', 'J0108-1431_436_1'])
+        output_dir = os.path.join(self.root, 'corpus')
+
+        created = TestVectorCorpusGenerator().generate(output_dir, asc_dir, 20, 3, 4096, False)
+
+        self.assertEqual(created, 20)
+        self.assertEqual(sorted(os.listdir(os.path.join(output_dir, 'batches'))),
+                         ['Batch_1.txt', 'Batch_2.txt', 'Batch_3.txt'])
+
+        vectors = self.vectors(output_dir)
+        self.assertEqual(len(vectors), 20)
+        self.assertEqual(len(set([file_name for batch, file_name in vectors])), 20)
+
+        for batch, file_name in vectors:
+            components = file_name[:-len('.fil')].split('_')
+
+            self.assertTrue(components[0] in TestVectorCorpusGenerator.VECTOR_TYPES)
+            self.assertEqual('Batch_' + components[1], batch)
+            self.assertTrue('_'.join(components[6:]) in ['J0006+1834_430', 'J0108-1431_436_1'])
+
+            float(components[2]), float(components[3]), float(components[4]), int(components[5])
+
+            path = os.path.join(output_dir, 'vectors', batch, file_name)
+            self.assertEqual(os.path.getsize(path), 4096)
+
+            # A SIGPROC header, naming the pulsar as the source.
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            self.assertEqual(data[:16], struct.pack('<i', 12) + 'HEADER_START')
+            self.assertTrue(components[6] in data[:200])
+            self.assertTrue(data.rstrip('\x00').endswith('HEADER_END'))
+
+    # ****************************************************************************************************
+
+    def test_reproducible(self):
+        """ Tests the same seed creates the same corpus, and sparse vectors have the same size."""
+
+        asc_dir = self.writeProfiles(['J0006+1834_430', 'J0034-0721_1400', 'B1237+25_410'])
+
+        first = os.path.join(self.root, 'first')
+        second = os.path.join(self.root, 'second')
+
+        TestVectorCorpusGenerator(seed=7).generate(first, asc_dir, 10, 2, 1024 * 1024, True)
+        TestVectorCorpusGenerator(seed=7).generate(second, asc_dir, 10, 2, 1024 * 1024, False)
+
+        self.assertEqual(self.vectors(first), self.vectors(second))
+
+        for batch, file_name in self.vectors(first):
+            self.assertEqual(os.path.getsize(os.path.join(first, 'vectors', batch, file_name)), 1024 * 1024)
+
+        with open(os.path.join(first, 'batches', 'Batch_1.txt')) as f:
+            batch_text = f.read()
+
+        with open(os.path.join(second, 'batches', 'Batch_1.txt')) as f:
+            self.assertEqual(f.read(), batch_text)
+
+        self.assertTrue('Seed: 700001' in batch_text)
+
+    # ****************************************************************************************************
+
+    def test_profile_names(self):
+        """ Tests only profile names the directory parser can read back are used."""
+
+        asc_dir = self.writeProfiles(['J0006+1834_430', 'J0108-1431_436_1', 'J0942-5552_1382_1_2', 'README'])
+
+        generator = TestVectorCorpusGenerator()
+
+        self.assertEqual(generator.getProfileNames(asc_dir), ['J0006+1834_430', 'J0108-1431_436_1'])
+        self.assertEqual(generator.getProfileNames(os.path.join(self.root, 'missing')), [])
+        self.assertEqual(generator.generate(os.path.join(self.root, 'corpus'), None, 10, 1, 1024, True), 0)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates a temporary directory for the profiles and corpus."""
+
+        self.root = tempfile.mkdtemp()
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Deletes the temporary directory."""
+
+        shutil.rmtree(self.root)
+
+    # ****************************************************************************************************
@@ -0,0 +1,314 @@
+"""
+**************************************************************************
+
+ TestTestVectorDirectoryParser.py
+
+**************************************************************************
+ Description:
+
+ Tests the test vector directory parser reuses known hashes, i.e. those
+ in checksum sidecars, those held in the hash cache, and those of vectors
+ moved or renamed since they were recorded, rather than reading the
+ vectors again.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+from main.src.HashCache import HashCache
+from main.src.TestVectorDirectoryParser import TestVectorDirectoryParser
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestTestVectorDirectoryParser(unittest.TestCase):
+    """
+    The tests for the TestVectorDirectoryParser class.
+    """
+
+    # The name of a test vector, and its contents.
+    VECTOR_NAME = 'FakePulsar_1_0.1_10_0.0_15_J0000+0000_1400.fil'
+    VECTOR_DATA = 'fake filterbank data' * 1000
+
+    # A hash that is not the vector's, to show where a recorded hash came from.
+    FAKE_MD5 = '0123456789abcdef0123456789abcdef'
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def parse(self, parser, directories=None):
+        """ Parses the vector directory, returning the database rows by file name."""
+
+        parser.parse(directories or self.vector_dir, ['.fil'], self.db_path, 1)
+
+        with open(self.db_path) as f:
+            rows = [line.strip().split(',') for line in f if line.strip() != '']
+
+        return dict([(row[0], row) for row in rows])
+
+    # ****************************************************************************************************
+
+    def write(self, path, content):
+        """ Writes a file, creating its directory if need be."""
+
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, 'w') as f:
+            f.write(content)
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_md5_sidecar(self):
+        """ Tests the hash in a <vector>.md5 sidecar is used instead of reading the vector."""
+
+        self.write(self.vector_path + '.md5', self.FAKE_MD5 + '  ' + self.VECTOR_NAME + '\n')
+
+        parser = TestVectorDirectoryParser()
+        self.assertEqual(self.parse(parser)[self.VECTOR_NAME][13], self.FAKE_MD5)
+        self.assertEqual(parser.sidecar_hits, 1)
+        self.assertEqual(parser.hashes_computed, 0)
+
+    # ****************************************************************************************************
+
+    def test_manifest(self):
+        """ Tests the hash in an md5sum manifest in the vector's directory is used."""
+
+        self.write(os.path.join(self.vector_dir, 'MD5SUMS'), self.FAKE_MD5.upper() + ' *' + self.VECTOR_NAME + '\n' +
+                   '0' * 32 + '  Other.fil\n')
+
+        parser = TestVectorDirectoryParser()
+        self.assertEqual(self.parse(parser)[self.VECTOR_NAME][13], self.FAKE_MD5)
+        self.assertEqual(parser.hashes_computed, 0)
+
+    # ****************************************************************************************************
+
+    def test_stale_sidecar(self):
+        """ Tests a sidecar older than its vector, or describing another file, is not trusted."""
+
+        sidecar = self.vector_path + '.md5'
+        self.write(sidecar, self.FAKE_MD5 + '\n')
+
+        modified = os.path.getmtime(self.vector_path)
+        os.utime(sidecar, (modified - 60, modified - 60))
+
+        self.write(os.path.join(self.vector_dir, 'MD5SUMS'), self.FAKE_MD5 + '  Other.fil\n')
+
+        parser = TestVectorDirectoryParser()
+        self.assertEqual(self.parse(parser)[self.VECTOR_NAME][13], self.digest)
+        self.assertEqual(parser.sidecar_hits, 0)
+        self.assertEqual(parser.hashes_computed, 1)
+
+    # ****************************************************************************************************
+
+    def test_verify_sidecar(self):
+        """ Tests a sidecar hash failing verification is replaced by the computed hash."""
+
+        self.write(self.vector_path + '.md5', self.FAKE_MD5 + '\n')
+
+        parser = TestVectorDirectoryParser(verify_rate=1.0)
+        self.assertEqual(self.parse(parser)[self.VECTOR_NAME][13], self.digest)
+        self.assertEqual(parser.sidecar_failures, 1)
+
+        # Sidecars are ignored altogether when disabled.
+        parser = TestVectorDirectoryParser(use_sidecars=False)
+        self.assertEqual(parser.get_file_md5(self.vector_path), self.digest)
+        self.assertEqual(parser.sidecar_hits, 0)
+
+    # ****************************************************************************************************
+
+    def test_read_md5_manifest(self):
+        """ Tests md5sum format lines are read, and other lines ignored."""
+
+        path = os.path.join(self.root, 'MD5SUMS')
+        self.write(path, self.FAKE_MD5 + '  a.fil\n' +
+                   self.FAKE_MD5.upper() + ' *Batch_1/b.fil\n' +
+                   '0' * 32 + '\n' +
+                   '\n' +
+                   'not a hash  c.fil\n')
+
+        self.assertEqual(TestVectorDirectoryParser().read_md5_manifest(path),
+                         {'a.fil': self.FAKE_MD5, 'b.fil': self.FAKE_MD5, None: '0' * 32})
+        self.assertEqual(TestVectorDirectoryParser().read_md5_manifest(os.path.join(self.root, 'missing')), {})
+
+    # ****************************************************************************************************
+
+    def test_hash_cache(self):
+        """ Tests a vector hashed once is not read again while in the hash cache."""
+
+        parser = TestVectorDirectoryParser(use_sidecars=False, hash_cache=HashCache(self.cache_dir))
+        self.assertEqual(self.parse(parser)[self.VECTOR_NAME][13], self.digest)
+        self.assertEqual(parser.hashes_computed, 1)
+
+        # A new database, so the vector is new again, but its hash is in the cache.
+        os.remove(self.db_path)
+
+        parser = TestVectorDirectoryParser(use_sidecars=False, hash_cache=HashCache(self.cache_dir))
+        self.assertEqual(self.parse(parser)[self.VECTOR_NAME][13], self.digest)
+        self.assertEqual(parser.hashes_computed, 0)
+        self.assertEqual(parser.hash_cache.hits, 1)
+
+    # ****************************************************************************************************
+
+    def test_rename_carries_hash(self):
+        """ Tests a renamed vector replaces its previous row, keeping the hash recorded for it."""
+
+        parser = TestVectorDirectoryParser(use_sidecars=False)
+        rows = self.parse(parser)
+        self.assertEqual(parser.hashes_computed, 1)
+
+        # The recorded hash is carried over as is, so a fake hash shows it is not recomputed.
+        rows[self.VECTOR_NAME][13] = 'carried'
+
+        with open(self.db_path, 'w') as f:
+            f.write(','.join(rows[self.VECTOR_NAME]) + '\n')
+
+        new_name = self.VECTOR_NAME.replace('_0.1_', '_0.2_')
+        os.rename(self.vector_path, os.path.join(self.vector_dir, new_name))
+
+        parser = TestVectorDirectoryParser(use_sidecars=False)
+        rows = self.parse(parser)
+
+        self.assertEqual(parser.hashes_computed, 0)
+        self.assertEqual(rows.keys(), [new_name])
+        self.assertEqual(rows[new_name][3], '0.2')
+        self.assertEqual(rows[new_name][13], 'carried')
+
+    # ****************************************************************************************************
+
+    def test_move_within_root(self):
+        """ Tests a vector moved to another directory has its path updated, keeping its hash."""
+
+        parser = TestVectorDirectoryParser(use_sidecars=False)
+        self.parse(parser)
+
+        moved_dir = os.path.join(self.vector_dir, 'Batch_2')
+        os.mkdir(moved_dir)
+        os.rename(self.vector_path, os.path.join(moved_dir, self.VECTOR_NAME))
+
+        parser = TestVectorDirectoryParser(use_sidecars=False)
+        rows = self.parse(parser)
+
+        self.assertEqual(parser.hashes_computed, 0)
+        self.assertEqual(rows.keys(), [self.VECTOR_NAME])
+        self.assertEqual(rows[self.VECTOR_NAME][9], os.path.join(moved_dir, self.VECTOR_NAME))
+        self.assertEqual(rows[self.VECTOR_NAME][10], moved_dir)
+        self.assertEqual(rows[self.VECTOR_NAME][13], self.digest)
+
+    # ****************************************************************************************************
+
+    def test_move_across_roots(self):
+        """ Tests a vector moved to another scan root, and renamed, is matched to its previous row."""
+
+        other_dir = os.path.join(self.root, 'other')
+        os.mkdir(other_dir)
+
+        parser = TestVectorDirectoryParser(use_sidecars=False)
+        self.parse(parser, [self.vector_dir, other_dir])
+
+        new_name = self.VECTOR_NAME.replace('_0.1_', '_0.2_')
+        shutil.move(self.vector_path, os.path.join(other_dir, new_name))
+
+        parser = TestVectorDirectoryParser(use_sidecars=False)
+        rows = self.parse(parser, [self.vector_dir, other_dir])
+
+        self.assertEqual(parser.hashes_computed, 0)
+        self.assertEqual(rows.keys(), [new_name])
+        self.assertEqual(rows[new_name][9], os.path.join(other_dir, new_name))
+        self.assertEqual(rows[new_name][13], self.digest)
+
+    # ****************************************************************************************************
+
+    def test_hash_by_device(self):
+        """ Tests every vector across several scan roots is hashed once, and missing files skipped."""
+
+        other_dir = os.path.join(self.root, 'other')
+        paths = [self.vector_path]
+
+        for i in range(5):
+            paths.append(os.path.join(other_dir, 'FakePulsar_1_0.%d_10_0.0_15_J0000+0000_1400.fil' % (i + 2)))
+            self.write(paths[-1], 'vector %d' % i)
+
+        parser = TestVectorDirectoryParser(use_sidecars=False, per_device_workers=3)
+        hashes = parser.hash_by_device(paths + [os.path.join(other_dir, 'missing.fil')])
+
+        self.assertEqual(sorted(hashes.keys()), sorted(paths))
+        self.assertEqual(hashes[self.vector_path], self.digest)
+        self.assertEqual(hashes[paths[1]], hashlib.md5('vector 0').hexdigest())
+        self.assertEqual(parser.hashes_computed, 6)
+
+        # Both roots are parsed into the one database.
+        rows = self.parse(TestVectorDirectoryParser(use_sidecars=False), [self.vector_dir, other_dir])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[os.path.basename(paths[5])][13], hashlib.md5('vector 4').hexdigest())
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates a vector directory holding one test vector."""
+
+        self.root = tempfile.mkdtemp()
+        self.vector_dir = os.path.join(self.root, 'vectors')
+        self.cache_dir = os.path.join(self.root, 'cache')
+        self.db_path = os.path.join(self.root, 'db.csv')
+        self.vector_path = os.path.join(self.vector_dir, self.VECTOR_NAME)
+        self.digest = hashlib.md5(self.VECTOR_DATA).hexdigest()
+
+        self.write(self.vector_path, self.VECTOR_DATA)
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Deletes the vector directory, database and cache."""
+
+        shutil.rmtree(self.root)
+
+    # ****************************************************************************************************
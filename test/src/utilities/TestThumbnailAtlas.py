@@ -0,0 +1,264 @@
+"""
+**************************************************************************
+
+ TestThumbnailAtlas.py
+
+**************************************************************************
+ Description:
+
+ Tests the thumbnails of the profiles the rows reference are packed into
+ sprite atlases, and only replotted when their profiles change.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@postgrad.manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from main.src.ThumbnailAtlas import ThumbnailAtlas
+
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+class TestThumbnailAtlas(unittest.TestCase):
+    """
+    The tests for the ThumbnailAtlas class.
+    """
+
+    # ******************************
+    #
+    # HELPERS
+    #
+    # ******************************
+
+    def writeProfile(self, name, peak=10):
+        """ Writes an .asc profile, with its peak at the given bin."""
+
+        with open(os.path.join(self.asc_dir, name + '.asc'), 'w') as f:
+            f.write('\n'.join([str(1.0 / (1 + abs(i - peak))) for i in range(64)]) + '\n')
+
+    # ****************************************************************************************************
+
+    def atlas(self):
+        """ Creates an atlas of 2 by 2 small thumbnails."""
+
+        return ThumbnailAtlas(self.asc_dir, tile_size=16, columns=2)
+
+    # ****************************************************************************************************
+
+    def pack(self, names):
+        """ Packs the thumbnails of the profiles rows reference, in row order, returning the atlas and thumbnails."""
+
+        atlas = self.atlas()
+        self.assertTrue(atlas.open())
+
+        thumbnails = [atlas.find(name) for name in names]
+        self.assertTrue(atlas.save())
+
+        return atlas, thumbnails
+
+    # ****************************************************************************************************
+
+    def atlasPath(self, number):
+        """ Gets the path of an atlas PNG."""
+
+        return os.path.join(self.asc_dir, 'atlas', 'atlas_' + str(number) + '.png')
+
+    # ****************************************************************************************************
+
+    def age(self):
+        """ Marks every atlas PNG as old, so those replotted can be told apart."""
+
+        for file_name in os.listdir(os.path.join(self.asc_dir, 'atlas')):
+            if file_name.endswith('.png'):
+                os.utime(os.path.join(self.asc_dir, 'atlas', file_name), (0, 0))
+
+    # ****************************************************************************************************
+
+    def replotted(self):
+        """ Lists the atlas PNGs written since age was called."""
+
+        return sorted([file_name for file_name in os.listdir(os.path.join(self.asc_dir, 'atlas'))
+                       if file_name.endswith('.png') and
+                       os.path.getmtime(os.path.join(self.asc_dir, 'atlas', file_name)) > 0])
+
+    # ****************************************************************************************************
+
+    @staticmethod
+    def imageSize(path):
+        """ Reads the width and height of a PNG from its header."""
+
+        with open(path, 'rb') as f:
+            return struct.unpack('>II', f.read(24)[16:24])
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_pack(self):
+        """ Tests each valid profile the rows reference has a thumbnail, packed in the order first referenced."""
+
+        names = ['J0000+0000_1400', 'J0001+0000_1400', 'J0002+0000_1400', 'J0003+0000_1400', 'J0004+0000_430']
+        for peak, name in enumerate(names + ['J0005+0000_1400']):
+            self.writeProfile(name, peak)
+
+        open(os.path.join(self.asc_dir, 'J9999+9999_1400.asc'), 'w').close()
+
+        rows = [names[3], names[0], names[3], 'J5555+5555_1400', names[1], names[2], names[4], 'J9999+9999_1400']
+        atlas, thumbnails = self.pack(rows)
+
+        self.assertEqual([thumbnail[1:] for thumbnail in thumbnails[:2] + thumbnails[4:7]],
+                         [(0, 0), (16, 0), (0, 16), (16, 16), (0, 0)])
+        self.assertEqual(thumbnails[2], thumbnails[0])
+        self.assertEqual(thumbnails[3], None)
+        self.assertEqual(thumbnails[7], None)
+
+        self.assertEqual(thumbnails[0][0], self.asc_dir + '/atlas/atlas_0.png')
+        self.assertEqual(thumbnails[6][0], self.asc_dir + '/atlas/atlas_1.png')
+
+        # The rows were given the coordinates the map records.
+        self.assertEqual([atlas.find(name) for name in rows], thumbnails)
+
+        # Profiles no row references are not packed.
+        self.assertEqual(atlas.find('J0005+0000_1400'), None)
+        self.assertEqual(atlas.atlas_map['unplotted'], {'J9999+9999_1400': 5})
+
+        self.assertEqual(self.imageSize(self.atlasPath(0)), (32, 32))
+        self.assertTrue(os.path.exists(self.atlasPath(1)))
+
+        # The pages rendered in parallel read the same coordinates.
+        loaded = self.atlas()
+        self.assertTrue(loaded.load())
+        self.assertEqual([loaded.find(name) for name in rows], thumbnails)
+
+    # ****************************************************************************************************
+
+    def test_rebuild(self):
+        """ Tests only the atlases of changed profiles are replotted, and unused atlases removed."""
+
+        names = ['J000%d+0000_1400' % i for i in range(6)]
+        for name in names:
+            self.writeProfile(name)
+
+        atlas, thumbnails = self.pack(names)
+
+        changed = os.path.basename(thumbnails[5][0])
+
+        self.age()
+        self.pack(names)
+        self.assertEqual(self.replotted(), [])
+
+        # A changed profile replots only its own atlas.
+        self.writeProfile(names[5], 30)
+        os.utime(os.path.join(self.asc_dir, names[5] + '.asc'), (1000, 1000))
+
+        self.pack(names)
+        self.assertEqual(self.replotted(), [changed])
+
+        # Atlases no longer needed are removed.
+        for name in names[2:]:
+            os.remove(os.path.join(self.asc_dir, name + '.asc'))
+
+        atlas, thumbnails = self.pack(names)
+
+        self.assertEqual(len(atlas.atlas_map['atlases']), 1)
+        self.assertFalse(os.path.exists(self.atlasPath(1)))
+        self.assertEqual(thumbnails[2:], [None] * 4)
+
+    # ****************************************************************************************************
+
+    def test_fixed_slots(self):
+        """ Tests new profiles are packed after the existing ones, which keep their slots."""
+
+        names = ['J000%d+0000_1400' % i for i in range(1, 5)]
+        for name in names + ['J0000+0000_1400']:
+            self.writeProfile(name)
+
+        atlas, thumbnails = self.pack(names)
+
+        # A profile referenced first is packed into the next free slot, in a new atlas.
+        self.age()
+
+        atlas, packed = self.pack(['J0000+0000_1400'] + names)
+
+        self.assertEqual(packed[1:], thumbnails)
+        self.assertEqual(packed[0], (self.atlasPath(1), 0, 0))
+        self.assertEqual(self.replotted(), ['atlas_1.png'])
+
+        # A deleted profile, or one no longer referenced, leaves its slot empty.
+        os.remove(os.path.join(self.asc_dir, names[0] + '.asc'))
+
+        atlas, packed = self.pack(names[:3] + ['J0000+0000_1400'])
+
+        self.assertEqual(packed, [None] + thumbnails[1:3] + [(self.atlasPath(1), 0, 0)])
+        self.assertEqual(atlas.find(names[3]), None)
+
+    # ****************************************************************************************************
+
+    def test_no_asc_dir(self):
+        """ Tests there are no thumbnails without an .asc directory."""
+
+        atlas = ThumbnailAtlas(os.path.join(self.root, 'missing'))
+
+        self.assertFalse(atlas.open())
+        self.assertEqual(atlas.find('J0000+0000_1400'), None)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Creates a temporary .asc directory."""
+
+        self.root = tempfile.mkdtemp()
+        self.asc_dir = os.path.join(self.root, 'asc')
+
+        os.mkdir(self.asc_dir)
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """ Deletes the temporary directory."""
+
+        shutil.rmtree(self.root)
+
+    # ****************************************************************************************************